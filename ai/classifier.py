@@ -4,9 +4,11 @@
 import requests
 import json
 import re
-from time import sleep
+import sys
+import time
 from typing import List, Dict, Optional
 from langdetect import detect
+from utils.cancellation import CancellationToken
 
 def read_api_key_from_reference(file_path="requirements.txt"):
     """
@@ -22,15 +24,38 @@ def read_api_key_from_reference(file_path="requirements.txt"):
                     key = line.split("=", 1)[1].strip().strip('"').strip("'")
                     return key
     except FileNotFoundError:
-        print(f"Файл {file_path} не найден")
+        # Ключ читается при импорте main: сообщение не должно попадать в stdout
+        # пакетной проверки, где идут результаты в NDJSON
+        print(f"Файл {file_path} не найден", file=sys.stderr)
     except Exception as e:
-        print(f"Ошибка при чтении API ключа: {e}")
+        print(f"Ошибка при чтении API ключа: {e}", file=sys.stderr)
     return None
 
 
 class AIClassifier:
     """Классификатор текста с улучшенной логикой для валидации документов"""
 
+    # Флаги состояния, от которых зависит классификация следующих абзацев
+    CONTEXT_FLAGS = (
+        'title_ru_assigned', 'title_en_assigned',
+        'abstract_ru_assigned', 'abstract_en_assigned',
+        'authors_ru_assigned', 'authors_en_assigned',
+        'keywords_ru_assigned', 'keywords_en_assigned'
+    )
+
+    # Сколько предыдущих абзацев учитывают контекстные правила
+    CONTEXT_HISTORY = 3
+
+    # Номера абзацев, до которых правила зависят от позиции в документе
+    CONTEXT_POSITION_LIMIT = 8
+
+    # Наибольшее время ожидания ответа API, с
+    REQUEST_TIMEOUT = 15
+
+    # Версия запроса к модели и правил классификации: увеличивается при их
+    # изменении, чтобы не использовать сохраненные результаты прежней версии
+    PROMPT_VERSION = 1
+
     def __init__(self, api_key: str = None):
         """Инициализация классификатора"""
         self.api_key = api_key
@@ -44,6 +69,14 @@ class AIClassifier:
             'аннотация_английская', 'ключевые_слова_английские', 'основной_текст'
         ]
 
+        # Ограничение истории обработанных абзацев (None - без ограничения)
+        self.max_history = None
+
+        # Признак отмены текущего анализа: прерывает повторы запросов к API
+        self.cancel_token: Optional[CancellationToken] = None
+        # Обращаться ли к ИИ для абзацев, не распознанных правилами
+        self.use_ai = True
+
         # Состояние классификации для контекстной логики
         self.classification_state = {
             'title_ru_assigned': False,
@@ -58,8 +91,26 @@ class AIClassifier:
             'current_language_context': 'ru'
         }
 
-    def reset_state(self):
-        """Сброс состояния для новой статьи"""
+    def config_key(self, use_ai: bool = True) -> str:
+        """Настройки классификации, от которых зависит результат: модель и версия запроса"""
+        if use_ai and self.api_key:
+            return f"{self.model}:{self.PROMPT_VERSION}"
+        return f"rules:{self.PROMPT_VERSION}"
+
+    def reset_state(self, max_history: Optional[int] = None, cancel_token: Optional[CancellationToken] = None,
+                    use_ai: bool = True):
+        """Сброс состояния для новой статьи
+
+        Args:
+            max_history: Сколько последних абзацев хранить в истории
+                (контекстные правила используют только несколько последних)
+            cancel_token: Признак отмены анализа статьи; после отмены запросы
+                к API не выполняются и используется классификация по правилам
+            use_ai: False - только правила и резервная классификация, без запросов к API
+        """
+        self.max_history = max_history
+        self.cancel_token = cancel_token
+        self.use_ai = use_ai
         self.classification_state = {
             'title_ru_assigned': False,
             'title_en_assigned': False,
@@ -73,6 +124,30 @@ class AIClassifier:
             'current_language_context': 'ru'
         }
 
+    def get_context_signature(self) -> int:
+        """Компактная сигнатура флагов состояния классификации"""
+        signature = 0
+        for bit, flag in enumerate(self.CONTEXT_FLAGS):
+            if self.classification_state[flag]:
+                signature |= 1 << bit
+        return signature
+
+    def restore_context(self, signature: int, paragraph_index: int, text: str):
+        """Продвижение состояния без классификации абзаца, результат которого переиспользуется"""
+        for bit, flag in enumerate(self.CONTEXT_FLAGS):
+            self.classification_state[flag] = bool(signature & (1 << bit))
+
+        text_clean = text.strip()
+        self.classification_state['processed_paragraphs'].append({
+            'index': paragraph_index,
+            'text': text_clean[:100],
+            'length': len(text_clean)
+        })
+
+    def is_position_compatible(self, old_index: int, new_index: int) -> bool:
+        """Дает ли абзац на новой позиции тот же результат правил, что и на старой"""
+        return old_index == new_index or min(old_index, new_index) > self.CONTEXT_POSITION_LIMIT
+
     def classify_paragraph(self, text: str, paragraph_index: int = 0,
                           formatting_info: Dict = None) -> str:
         """
@@ -93,6 +168,10 @@ class AIClassifier:
             'text': text_clean[:100],
             'length': len(text_clean)
         })
+        if self.max_history is not None:
+            history = self.classification_state['processed_paragraphs']
+            if len(history) > self.max_history:
+                del history[:len(history) - self.max_history]
 
         # Определяем язык текста
         english_ratio = self._calculate_english_ratio(text_clean)
@@ -154,7 +233,7 @@ class AIClassifier:
         #     return abstract_result
 
         # 8. Если правила не дали результата, используем ИИ
-        if self.api_key:
+        if self.api_key and self.use_ai:
             ai_result = self._classify_with_ai(text, is_predominantly_english)
             if ai_result in self.valid_classes:
                 return ai_result
@@ -205,7 +284,7 @@ class AIClassifier:
 
         # Сведения об авторе обычно идут после списка авторов
         authors_found = any(
-            para['text'] for para in self.classification_state['processed_paragraphs'][-3:]
+            para['text'] for para in self.classification_state['processed_paragraphs'][-self.CONTEXT_HISTORY:]
             if self._looks_like_author(para['text'], False) or self._looks_like_author(para['text'], True)
         )
 
@@ -517,6 +596,9 @@ class AIClassifier:
 Тип:"""
 
         for attempt in range(max_retries):
+            timeout = self._request_timeout()
+            if timeout is None:
+                break
             try:
                 response = requests.post(
                     url="https://openrouter.ai/api/v1/chat/completions",
@@ -532,7 +614,7 @@ class AIClassifier:
                         "max_tokens": 10,
                         "top_p": 0.3
                     }),
-                    timeout=15
+                    timeout=timeout
                 )
 
                 if response.status_code == 200:
@@ -552,16 +634,32 @@ class AIClassifier:
 
                 else:
                     if response.status_code == 429:
-                        sleep(2 ** attempt)
+                        self._wait(2 ** attempt)
                     elif attempt < max_retries - 1:
-                        sleep(1)
+                        self._wait(1)
 
             except Exception as e:
                 if attempt < max_retries - 1:
-                    sleep(2)
+                    self._wait(2)
 
         return self._fallback_classification(text, is_predominantly_english)
 
+    def _request_timeout(self) -> Optional[float]:
+        """Время ожидания очередного запроса к API; None - анализ отменен"""
+        if self.cancel_token is None:
+            return self.REQUEST_TIMEOUT
+        if self.cancel_token.is_stopped():
+            return None
+        remaining = self.cancel_token.remaining()
+        return self.REQUEST_TIMEOUT if remaining is None else min(self.REQUEST_TIMEOUT, remaining)
+
+    def _wait(self, seconds: float):
+        """Пауза перед повтором запроса, прерываемая отменой анализа"""
+        if self.cancel_token is None:
+            time.sleep(seconds)
+        else:
+            self.cancel_token.wait(seconds)
+
     def _build_context_for_ai(self) -> str:
         """Создание контекстной информации для ИИ"""
         context_parts = []
@@ -0,0 +1,364 @@
+"""
+Пакетная проверка документов: файлы, каталоги и шаблоны glob проверяются в пуле
+процессов с прогретыми валидаторами или локальным сервисом, результаты пишутся
+в NDJSON, контрольная точка позволяет продолжить прерванный запуск. Проверка
+.docx из zip-архива без распаковки на диск - analyze_bundle.
+
+Запуск: python -m batch файлы|каталоги|шаблоны [-o результаты.ndjson] [-j 4] [--service адрес]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config.analysis_profiles import ANALYSIS_PROFILES, DEFAULT_PROFILE, check_profile_modes, get_analysis_profile
+from main import DocxValidator
+from reports.serialization import results_to_json
+from service.client import ServiceError, ValidationClient
+from service.protocol import BULK_LANE
+from utils.document_source import DocumentSource, BufferReader, open_document_buffer
+from validators.rule_plan import get_rule_plan, install_rule_plan
+
+
+def analyze_bundle(archive: DocumentSource, max_workers: int = 4,
+                   **analyze_kwargs) -> Iterator[Tuple[str, Dict]]:
+    """Проверка всех .docx из zip-архива без распаковки на диск
+
+    Члены архива читаются один раз, последовательно в порядке их расположения
+    в архиве, и передаются в загрузчик как байты. Анализ идет в пуле потоков
+    с ограниченным числом документов в работе; результаты выдаются по мере
+    готовности в виде пар (имя в архиве, результаты анализа).
+    """
+    local = threading.local()
+
+    def worker(name: str, data: bytes) -> Dict:
+        # У каждого потока свой валидатор: классификатор хранит состояние документа
+        if not hasattr(local, 'validator'):
+            local.validator = DocxValidator(verbose=False)
+        return local.validator.analyze_document(data, **analyze_kwargs)
+
+    max_in_flight = max(1, max_workers) * 2
+
+    with open_document_buffer(archive) as buffer, BufferReader(buffer) as stream, \
+            zipfile.ZipFile(stream) as bundle, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        members = [
+            info for info in bundle.infolist()
+            if not info.is_dir()
+            and info.filename.lower().endswith('.docx')
+            and not info.filename.startswith('__MACOSX/')
+            and not os.path.basename(info.filename).startswith('~$')
+        ]
+        members.sort(key=lambda info: info.header_offset)
+
+        pending = {}
+        for info in members:
+            # Ограничиваем число документов в памяти одновременно
+            while len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), _bundle_result(future)
+
+            data = bundle.read(info)
+            pending[executor.submit(worker, info.filename, data)] = info.filename
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), _bundle_result(future)
+
+
+def _bundle_result(future) -> Dict:
+    """Результат анализа члена архива или описание ошибки"""
+    try:
+        return future.result()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+# Валидатор рабочего процесса пакетной проверки; создается один раз при запуске процесса
+_batch_validator = None
+_batch_kwargs: Dict = {}
+
+
+def _init_batch_worker(analyze_kwargs: Dict, rule_plan):
+    """Инициализация рабочего процесса: прогретый валидатор и готовый план проверки"""
+    global _batch_validator, _batch_kwargs
+    # stdout процесса общий с родительским, где идет NDJSON: сообщения загрузчика
+    # и классификатора (ошибки чтения, предупреждения) направляются в stderr
+    sys.stdout = sys.stderr
+    if rule_plan is not None:
+        install_rule_plan(rule_plan)
+    _batch_kwargs = analyze_kwargs
+    _batch_validator = DocxValidator(verbose=False)
+
+
+def _analyze_batch_file(path: str) -> Tuple[str, Optional[str], Optional[str], float]:
+    """Анализ одного файла в рабочем процессе: (путь, результаты JSON, ошибка, время)"""
+    start = time.perf_counter()
+    try:
+        results = _batch_validator.analyze_document(path, **_batch_kwargs)
+        return path, results_to_json(results), None, time.perf_counter() - start
+    except Exception as e:
+        return path, None, str(e), time.perf_counter() - start
+
+
+def _analyze_via_service(client: ValidationClient, analyze_kwargs: Dict,
+                         path: str) -> Tuple[str, Optional[str], Optional[str], float]:
+    """Анализ одного файла локальным сервисом (пакетная полоса)"""
+    start = time.perf_counter()
+    try:
+        return path, client.analyze_json(path, BULK_LANE, **analyze_kwargs), None, time.perf_counter() - start
+    except (OSError, ServiceError) as e:
+        return path, None, str(e), time.perf_counter() - start
+
+
+def collect_batch_files(inputs: List[str]) -> List[str]:
+    """Файлы .docx из путей к файлам, каталогов (рекурсивно) и шаблонов glob"""
+    found = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = glob.glob(os.path.join(item, '**', '*.docx'), recursive=True)
+        elif os.path.isfile(item):
+            candidates = [item]
+        else:
+            candidates = glob.glob(item, recursive=True)
+        for path in candidates:
+            if path.lower().endswith('.docx') and not os.path.basename(path).startswith('~$') \
+                    and os.path.isfile(path):
+                found.add(os.path.abspath(path))
+    return sorted(found)
+
+
+def _file_key(path: str) -> str:
+    """Ключ файла для контрольной точки: путь, размер и время изменения"""
+    stat = os.stat(path)
+    return f"{path}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def _read_checkpoint(path: Optional[str]) -> set:
+    """Ключи файлов, уже обработанных в прошлых запусках"""
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+
+def run_batch(inputs: List[str], output: Optional[str] = None, checkpoint: Optional[str] = None,
+              max_workers: Optional[int] = None, timings_limit: int = 20, service: Optional[str] = None,
+              **analyze_kwargs) -> Dict:
+    """Пакетная проверка документов в пуле процессов или локальным сервисом (service - его адрес)
+
+    Результаты пишутся построчно в NDJSON (в файл output или stdout) по мере
+    готовности. Ключ каждого успешно проверенного файла дописывается в файл
+    контрольной точки, поэтому прерванный запуск продолжается без повторной
+    проверки готовых файлов (измененные с тех пор файлы и файлы с ошибками
+    проверяются заново). Падение рабочего процесса дает ошибку только у файлов,
+    которые были в пуле в этот момент.
+    Файлы, которые с теми же содержимым, критериями и настройками уже
+    проверялись (в том числе в других каталогах и запусках), не анализируются:
+    их результаты берутся из кэша результатов (если не передано use_result_cache=False).
+    В конце в stderr выводятся производительность и время по файлам.
+    """
+    if checkpoint is None and output:
+        checkpoint = output + '.checkpoint'
+
+    # Несовместимые профиль и режим - ошибка всего запуска, а не каждого файла
+    check_profile_modes(get_analysis_profile(analyze_kwargs.get('profile', DEFAULT_PROFILE)),
+                        **{name: analyze_kwargs.get(name) for name in ('streaming', 'pipelined', 'sample_size')})
+    files = collect_batch_files(inputs)
+    done_keys = _read_checkpoint(checkpoint)
+    keys = {path: _file_key(path) for path in files}
+    todo = [path for path in files if keys[path] not in done_keys]
+    skipped = len(files) - len(todo)
+    print(f"Файлов: {len(files)}, уже проверено: {skipped}, к проверке: {len(todo)}", file=sys.stderr)
+
+    # Как make: не изменившиеся с прошлой проверки файлы не анализируются заново
+    up_to_date = {}
+    analyze_kwargs.setdefault('use_result_cache', True)
+    if analyze_kwargs['use_result_cache'] and analyze_kwargs.get('sample_size') is None:
+        checker = DocxValidator(verbose=False)
+        lookup_kwargs = {name: analyze_kwargs[name] for name in ('journal', 'profile', 'streaming', 'pipelined',
+                                                                 'window_size', 'memory_limit_mb', 'queue_size')
+                         if name in analyze_kwargs}
+        for path in todo:
+            try:
+                cached = checker.cached_results(path, **lookup_kwargs)
+            except OSError:
+                continue
+            if cached is not None:
+                up_to_date[path] = cached
+        todo = [path for path in todo if path not in up_to_date]
+        if up_to_date:
+            print(f"Без изменений с прошлой проверки: {len(up_to_date)}, к анализу: {len(todo)}", file=sys.stderr)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if service:
+        # Валидаторы уже прогреты в сервисе: здесь только отправка файлов
+        make_executor = partial(ThreadPoolExecutor, max_workers=max_workers)
+        task = partial(_analyze_via_service, ValidationClient(service), analyze_kwargs)
+    else:
+        # Скомпилированный план передается в процессы, чтобы не собирать правила в каждом из них
+        rule_plan = get_rule_plan() if analyze_kwargs.get('journal') is None else None
+        make_executor = partial(ProcessPoolExecutor, max_workers=max_workers, initializer=_init_batch_worker,
+                                initargs=(analyze_kwargs, rule_plan))
+        task = _analyze_batch_file
+    max_in_flight = max_workers * 2
+
+    out = open(output, 'a', encoding='utf-8') if output else sys.stdout
+    checkpoint_file = open(checkpoint, 'a', encoding='utf-8') if checkpoint else None
+    timings = []
+    errors = 0
+    total_bytes = 0
+    start = time.perf_counter()
+
+    def write_result(path: str, results_json: Optional[str], error: Optional[str], elapsed: float,
+                     cached: bool = False):
+        nonlocal errors, total_bytes
+        status = 'ok' if error is None else 'error'
+        payload = results_json if error is None else json.dumps(error, ensure_ascii=False)
+        key = 'result' if error is None else 'error'
+        cached_field = '"cached":true,' if cached else ''
+        out.write(f'{{"file":{json.dumps(path, ensure_ascii=False)},"status":"{status}",{cached_field}'
+                  f'"elapsed":{elapsed:.4f},"{key}":{payload}}}\n')
+        out.flush()
+        # Файлы с ошибкой проверяются заново при следующем запуске
+        if checkpoint_file is not None and error is None:
+            checkpoint_file.write(keys[path] + '\n')
+            checkpoint_file.flush()
+        if cached:
+            return
+        timings.append((elapsed, path))
+        total_bytes += os.path.getsize(path)
+        if error is not None:
+            errors += 1
+
+    def write_done(done):
+        for future in done:
+            path = pending.pop(future)
+            try:
+                write_result(*future.result())
+            except BrokenProcessPool as e:
+                # Рабочий процесс упал (нехватка памяти, сбой в lxml): ошибка у всех файлов,
+                # которые были в пуле, остальные проверяются в новом пуле
+                write_result(path, None, f"Рабочий процесс аварийно завершился: {e}", 0.0)
+
+    executor = make_executor()
+    pending = {}
+    try:
+        for path, cached in up_to_date.items():
+            write_result(path, results_to_json(cached), None, 0.0, cached=True)
+        for path in todo:
+            while len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                write_done(done)
+            try:
+                future = executor.submit(task, path)
+            except BrokenProcessPool:
+                executor.shutdown(wait=False)
+                executor = make_executor()
+                future = executor.submit(task, path)
+            pending[future] = path
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            write_done(done)
+    finally:
+        executor.shutdown()
+        if output:
+            out.close()
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "files": len(files),
+        "processed": len(timings),
+        "skipped": skipped,
+        "up_to_date": len(up_to_date),
+        "errors": errors,
+        "elapsed": elapsed,
+        "files_per_second": len(timings) / elapsed if elapsed > 0 else 0.0,
+        "mb_per_second": total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+        "timings": sorted(timings, reverse=True)
+    }
+    _print_batch_stats(stats, timings_limit)
+    return stats
+
+
+def _print_batch_stats(stats: Dict, timings_limit: int):
+    """Итоги пакетной проверки в stderr"""
+    print(f"\n📦 Проверено файлов: {stats['processed']} (пропущено по контрольной точке: {stats['skipped']}, "
+          f"без изменений: {stats.get('up_to_date', 0)}, с ошибками: {stats['errors']})", file=sys.stderr)
+    print(f"  • Общее время: {stats['elapsed']:.2f} с", file=sys.stderr)
+    print(f"  • Производительность: {stats['files_per_second']:.2f} файл/с, "
+          f"{stats['mb_per_second']:.2f} МБ/с", file=sys.stderr)
+    timings = stats['timings']
+    if timings:
+        ordered = sorted(elapsed for elapsed, _ in timings)
+        p50 = ordered[len(ordered) // 2]
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        print(f"  • Время на файл: медиана {p50:.2f} с, 95% {p95:.2f} с, максимум {ordered[-1]:.2f} с",
+              file=sys.stderr)
+        shown = timings if timings_limit <= 0 else timings[:timings_limit]
+        print(f"  • Время по файлам{' (самые долгие)' if len(shown) < len(timings) else ''}:", file=sys.stderr)
+        for elapsed, path in shown:
+            print(f"    {elapsed:8.2f} с  {path}", file=sys.stderr)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Пакетная проверка документов .docx")
+    parser.add_argument('inputs', nargs='+', help="Файлы, каталоги или шаблоны glob")
+    parser.add_argument('-o', '--output', help="Файл NDJSON с результатами (по умолчанию stdout)")
+    parser.add_argument('--checkpoint', help="Файл контрольной точки (по умолчанию <output>.checkpoint)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Число рабочих процессов")
+    parser.add_argument('--journal', default=None,
+                        help="Профиль журнала (config/journals/*.json) или 'auto' - выбор по признакам "
+                             "шаблона из раздела match профилей")
+    parser.add_argument('--profile', choices=list(ANALYSIS_PROFILES), default=DEFAULT_PROFILE,
+                        help="Профиль анализа: fast, standard или thorough")
+    parser.add_argument('--service', default=None,
+                        help="Адрес локального сервиса проверки (http://хост:порт или unix:/путь) "
+                             "вместо пула процессов")
+    parser.add_argument('--streaming', action='store_true', help="Потоковый режим с ограничением памяти")
+    parser.add_argument('--pipelined', action='store_true', help="Конвейерный режим анализа абзацев")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="Ограничение времени анализа одного документа, с")
+    parser.add_argument('--sample-size', type=int, default=None, help="Размер выборки основного текста")
+    parser.add_argument('--no-result-cache', action='store_true',
+                        help="Анализировать заново и файлы, не изменившиеся с прошлой проверки")
+    parser.add_argument('--timings', type=int, default=20,
+                        help="Сколько самых долгих файлов показать в итогах (0 - все)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    analyze_kwargs = {"journal": args.journal, "profile": args.profile}
+    if args.streaming:
+        analyze_kwargs["streaming"] = True
+    if args.pipelined:
+        analyze_kwargs["pipelined"] = True
+    if args.time_budget is not None:
+        analyze_kwargs["time_budget"] = args.time_budget
+    if args.sample_size is not None:
+        analyze_kwargs["sample_size"] = args.sample_size
+    if args.no_result_cache:
+        analyze_kwargs["use_result_cache"] = False
+    try:
+        run_batch(args.inputs, output=args.output, checkpoint=args.checkpoint, max_workers=args.workers,
+                  timings_limit=args.timings, service=args.service, **analyze_kwargs)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
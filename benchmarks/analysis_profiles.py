@@ -0,0 +1,48 @@
+"""
+Время анализа документа в каждом профиле и сравнение с целевым временем профиля.
+
+Каждый запуск - первая проверка документа: кэш разобранных документов
+очищается перед запуском, кэш результатов не используется. Без ключа API профили standard и thorough не
+обращаются к ИИ, поэтому измеряется их время без ожидания ответов API.
+
+Запуск: python -m benchmarks.analysis_profiles [путь к .docx] [число запусков]
+"""
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from config.analysis_profiles import ANALYSIS_PROFILES
+from main import DocxValidator
+from utils.cache import DiskCache
+from utils.document_loader import DocumentLoader
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(path: str = 'test.docx', repeats: int = 10):
+    validator = DocxValidator()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        DocumentLoader.document_cache = DiskCache(cache_dir)
+        print(f"Документ: {path}, запусков на профиль: {repeats}")
+        print(f"{'Профиль':<10} {'медиана':>9} {'95%':>9} {'цель':>7}  абзацев  ошибок")
+        for name, profile in ANALYSIS_PROFILES.items():
+            timings = []
+            for _ in range(repeats):
+                DocumentLoader.document_cache.clear()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start = time.perf_counter()
+                    results = validator.analyze_document(path, profile=name, use_result_cache=False)
+                    timings.append(time.perf_counter() - start)
+            p95 = _percentile(timings, 0.95)
+            summary = results["summary"]
+            verdict = "✅" if p95 <= profile.latency_target else "❌"
+            print(f"{name:<10} {_percentile(timings, 0.5):8.3f}с {p95:8.3f}с {profile.latency_target:6.1f}с  "
+                  f"{summary['total_paragraphs']:7d}  {summary['total_errors'] + summary['document_errors']:6d} {verdict}")
+
+
+if __name__ == "__main__":
+    run(*(sys.argv[1:2] or ['test.docx']), *(int(arg) for arg in sys.argv[2:3]))
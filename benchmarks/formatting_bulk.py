@@ -0,0 +1,58 @@
+"""
+Сравнение поабзацной и пакетной (NumPy) проверки форматирования.
+
+Абзацы берутся из документа и размножаются до нужного количества, классы
+назначаются по кругу из критериев, поэтому классификатор не требуется.
+
+Запуск: python -m benchmarks.formatting_bulk [путь к .docx] [число абзацев]
+"""
+import sys
+import time
+from config.criteria import FormattingCriteria
+from utils.document_loader import DocumentLoader
+from validators.rule_plan import get_rule_plan
+from validators.vectorized import validate_formatting_bulk
+
+
+def _measure(func, repeats: int = 5) -> float:
+    """Лучшее время из нескольких запусков, с"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(path: str = 'test.docx', total: int = 20000):
+    document_info = DocumentLoader.load_document_with_formatting(path)
+    source = document_info.get('paragraphs', [])
+    if not source:
+        print(f"В документе {path} нет абзацев")
+        return
+
+    class_names = FormattingCriteria.get_all_classes()
+    paragraphs = [source[i % len(source)] for i in range(total)]
+    classes = [class_names[i % len(class_names)] for i in range(total)]
+    plan = get_rule_plan()
+
+    def per_paragraph():
+        return [plan.formatting[cls].check(para) for para, cls in zip(paragraphs, classes)]
+
+    def bulk():
+        return validate_formatting_bulk(paragraphs, classes, plan=plan)
+
+    if per_paragraph() != bulk():
+        print("❌ Результаты пакетной и поабзацной проверки различаются")
+        return
+
+    per_paragraph_time = _measure(per_paragraph)
+    bulk_time = _measure(bulk)
+    print(f"Абзацев: {total}")
+    print(f"Поабзацная проверка: {per_paragraph_time * 1000:.1f} мс")
+    print(f"Пакетная проверка:   {bulk_time * 1000:.1f} мс "
+          f"(ускорение x{per_paragraph_time / bulk_time:.1f})")
+
+
+if __name__ == "__main__":
+    run(*(sys.argv[1:2] or ['test.docx']), *(int(arg) for arg in sys.argv[2:3]))
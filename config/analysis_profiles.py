@@ -0,0 +1,78 @@
+"""
+Профили анализа: выбор между скоростью и полнотой проверки для каждого запроса
+
+Целевое время - 95-й процентиль полного анализа типичной статьи (до 60 абзацев,
+3-8 страниц) при первой проверке документа, без кэша разобранных документов.
+Проверка: python -m benchmarks.analysis_profiles [путь к .docx]
+
+    fast      0.5 с  правила без ИИ, без отладочных сведений - проверка перед отправкой
+    standard  20 с   классификация ИИ абзацев, не распознанных правилами (время
+                     определяется ответами API: около 1 с на запрос)
+    thorough  40 с   как standard, плюс таблицы, колонтитулы и сноски и перекрестные
+                     проверки документа (пары русских и английских элементов,
+                     число ключевых слов, шрифт вне основного текста)
+"""
+from typing import Dict, Tuple
+
+FAST_PROFILE = 'fast'
+STANDARD_PROFILE = 'standard'
+THOROUGH_PROFILE = 'thorough'
+DEFAULT_PROFILE = STANDARD_PROFILE
+
+
+class AnalysisProfile:
+    """Набор настроек анализа документа"""
+
+    def __init__(self, name: str, title: str, latency_target: float, use_ai: bool = True,
+                 include_debug: bool = True, parts: Tuple[str, ...] = ('body',), cross_checks: bool = False):
+        self.name = name
+        self.title = title
+        # Целевое время анализа типичной статьи, с (95-й процентиль)
+        self.latency_target = latency_target
+        # Классификация ИИ абзацев, не распознанных правилами
+        self.use_ai = use_ai
+        # Отладочные сведения о шрифтах и XML абзацев
+        self.include_debug = include_debug
+        # Разбираемые части документа (см. DocumentLoader.DOCUMENT_PARTS)
+        self.parts = parts
+        # Перекрестные проверки документа (DocumentChecker.cross_check)
+        self.cross_checks = cross_checks
+
+    @property
+    def full_mode_only(self) -> bool:
+        """Части вне основного текста и перекрестные проверки есть только в полном режиме"""
+        return self.parts != ('body',) or self.cross_checks
+
+
+ANALYSIS_PROFILES: Dict[str, AnalysisProfile] = {
+    FAST_PROFILE: AnalysisProfile(FAST_PROFILE, "Быстрая проверка", 0.5, use_ai=False, include_debug=False),
+    STANDARD_PROFILE: AnalysisProfile(STANDARD_PROFILE, "Стандартная проверка", 20.0),
+    THOROUGH_PROFILE: AnalysisProfile(THOROUGH_PROFILE, "Полная проверка", 40.0,
+                                      parts=('body', 'tables', 'headers', 'footers', 'footnotes'),
+                                      cross_checks=True)
+}
+
+
+def get_analysis_profile(name: str) -> AnalysisProfile:
+    """Профиль анализа по имени"""
+    profile = ANALYSIS_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Неизвестный профиль анализа: {name} (доступны: {', '.join(ANALYSIS_PROFILES)})")
+    return profile
+
+
+def check_profile_modes(profile: AnalysisProfile, **modes):
+    """Проверка выбранных режимов анализа и применимости к ним профиля.
+
+    modes - режимы по именам параметров analyze_document (streaming, pipelined,
+    sample_size, previous_results); режим включен, если значение не None и не False.
+    Режимы взаимоисключающие: из нескольких режимов выполнялся бы только один.
+    Профиль, которому нужен полный режим, с другими режимами не сочетается:
+    иначе результаты выглядели бы как полная проверка без ее дополнительных частей.
+    """
+    enabled = [name for name, value in modes.items() if value is not None and value is not False]
+    if len(enabled) > 1:
+        raise ValueError(f"Режимы анализа взаимоисключающие, выбраны сразу: {', '.join(enabled)}")
+    if enabled and profile.full_mode_only:
+        raise ValueError(f"Профиль анализа '{profile.name}' работает только в полном режиме "
+                         f"и несовместим с {', '.join(enabled)}")
@@ -1,213 +1,66 @@
 """
 Конфигурация критериев для проверки документов по новым требованиям
 """
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.shared import Pt, Cm,Mm
-import re
+import os
+import threading
+import time
 from typing import Dict, List
+from config import rules
+from config.criteria_file import (CRITERIA_FILE, compile_criteria_data, criteria_to_data,
+                                  fingerprint_criteria, load_criteria_file)
+
 
 class FormattingCriteria:
-    """Критерии форматирования для различных типов текста"""
+    """Критерии форматирования для различных типов текста.
+
+    Критерии загружаются из файла config/criteria.json, правила содержания
+    ссылаются на именованные функции из config/rules.py.
+    """
+
+    # Файл критериев и минимальный интервал между проверками его изменения, с
+    SOURCE_FILE = CRITERIA_FILE
+    RELOAD_CHECK_INTERVAL = 1.0
+
+    _loaded = load_criteria_file(SOURCE_FILE)
 
     # Общие требования к документу
-    DOCUMENT_REQUIREMENTS = {
-        "margins": {
-            "top": Mm(15),  # 15 мм
-            "bottom": Mm(15),  # 15 мм
-            "left": Mm(25),  # 25 мм
-            "right": Mm(10)  # 10 мм
-        },
-        "line_spacing": 1.0,
-        "font_name": "Times New Roman",
-        "min_pages": 3
-    }
-
-    CRITERIA = {
-        "удк": {
-            "font_name": "Times New Roman",
-            "font_size": 10.5,
-            "alignment": WD_ALIGN_PARAGRAPH.LEFT,
-            "bold": False,
-            "italic": False,
-            "content_rules": [
-                ("должен начинаться с 'УДК'", lambda t: t.strip().upper().startswith('УДК')),
-                ("должен содержать код классификации", lambda t: len(t.split()) >= 2)
-            ]
-        },
-        "автор": {
-            "font_name": "Times New Roman",
-            "font_size": 12,
-            "alignment": WD_ALIGN_PARAGRAPH.LEFT,
-            "bold": False,
-            "italic": False,
-            "content_rules": [
-                ("должен содержать корректный формат ФИО с инициалами", lambda t: FormattingCriteria._check_author_format_improved(t)),
-                ("инициалы без пробелов", lambda t: FormattingCriteria._check_initials_format(t))
-            ]
-        },
-        "заголовок": {
-            "font_name": "Times New Roman",
-            "font_size": 12,
-            "alignment": WD_ALIGN_PARAGRAPH.LEFT,
-            "bold": True,
-            "italic": False,
-            "content_rules": [
-                ("не должен содержать аббревиатуры", lambda t: not FormattingCriteria._has_abbreviations(t)),
-                ("должен начинаться с заглавной буквы", lambda t: t[0].isupper() if t else False)
-            ]
-        },
-        "сведения_об_авторе": {
-            "font_name": "Times New Roman",
-            "font_size": 10.5,
-            "alignment": WD_ALIGN_PARAGRAPH.LEFT,
-            "bold": False,
-            "italic": False,
-            "content_rules": [
-                ("должен содержать профессиональную информацию", lambda t: FormattingCriteria._has_professional_info(t)),
-                ("должен быть в именительном падеже", lambda t: True)  # Упрощенная проверка
-            ]
-        },
-        "аннотация": {
-            "font_name": "Times New Roman",
-            "font_size": 10.5,
-            "alignment": WD_ALIGN_PARAGRAPH.JUSTIFY,
-            "bold": False,
-            "italic": True,
-            "content_rules": [
-                ("должна быть 300-650 символов", lambda t: 300 <= len(t) <= 650),
-                ("не должна содержать заголовок 'Аннотация'", lambda t: 'аннотация' not in t.lower()[:20])
-            ]
-        },
-        "ключевые_слова": {
-            "font_name": "Times New Roman",
-            "font_size": 10.5,
-            "alignment": WD_ALIGN_PARAGRAPH.JUSTIFY,
-            "bold": False,
-            "italic": True,
-            "content_rules": [
-                ("должно быть 4-6 ключевых слов", lambda t: 4 <= len([w.strip() for w in t.split(',') if w.strip()]) <= 6),
-                ("не более 100 символов", lambda t: len(t) <= 100)
-            ]
-        },
-        "заголовок_английский": {
-            "font_name": "Times New Roman",
-            "font_size": 10.5,
-            "alignment": WD_ALIGN_PARAGRAPH.LEFT,
-            "bold": True,
-            "italic": False,
-            "content_rules": [
-                ("должен содержать английский текст", lambda t: re.search(r'[a-zA-Z]', t)),
-                ("должен быть корректно написан", lambda t: len(re.findall(r'[a-zA-Z]+', t)) >= 3)
-            ]
-        },
-        "автор_английский": {
-            "font_name": "Times New Roman",
-            "font_size": 10.5,
-            "alignment": WD_ALIGN_PARAGRAPH.LEFT,
-            "bold": False,
-            "italic": False,
-            "content_rules": [
-                ("фамилия + инициалы без пробела", lambda t: FormattingCriteria._check_english_author_format(t)),
-                ("должен содержать английский текст", lambda t: re.search(r'[a-zA-Z]', t))
-            ]
-        },
-        "место_работы_английский": {
-            "font_name": "Times New Roman",
-            "font_size": 10.5,
-            "alignment": WD_ALIGN_PARAGRAPH.LEFT,
-            "bold": False,
-            "italic": False,
-            "content_rules": [
-                ("должно содержать название организации", lambda t: len(t.split()) >= 3),
-                ("должно содержать город и страну", lambda t: ',' in t)
-            ]
-        },
-        "аннотация_английская": {
-            "font_name": "Times New Roman",
-            "font_size": 10.5,
-            "alignment": WD_ALIGN_PARAGRAPH.JUSTIFY,
-            "bold": False,
-            "italic": True,
-            "content_rules": [
-                ("должна содержать английский текст", lambda t: re.search(r'[a-zA-Z]', t)),
-                ("должна быть достаточной длины", lambda t: len(t) >= 100)
-            ]
-        },
-        "ключевые_слова_английские": {
-            "font_name": "Times New Roman",
-            "font_size": 10.5,
-            "alignment": WD_ALIGN_PARAGRAPH.JUSTIFY,
-            "bold": False,
-            "italic": True,
-            "content_rules": [
-                ("должны содержать английский текст", lambda t: re.search(r'[a-zA-Z]', t)),
-                ("должно быть 4-6 слов", lambda t: 4 <= len([w.strip() for w in t.split(',') if w.strip()]) <= 6)
-            ]
-        },
-        "основной_текст": {
-            "font_name": "Times New Roman",
-            "font_size": 10.5,
-            "alignment": WD_ALIGN_PARAGRAPH.JUSTIFY,
-            "bold": False,
-            "italic": False,
-            "paragraph_indent": Cm(0.6),  # 0.6 см отступ абзаца
-            "content_rules": [
-                ("должен содержать законченные предложения", lambda t: t.count('.') >= 1),
-                ("не должен быть слишком коротким", lambda t: len(t.split()) >= 10)
-            ]
-        }
-    }
+    DOCUMENT_REQUIREMENTS = _loaded['document_requirements']
+
+    CRITERIA = _loaded['criteria']
+
+    # Версия критериев: увеличивается при каждой замене через set_criteria
+    VERSION = 0
+
+    # Ревизия из файла и хэш содержимого текущих критериев
+    REVISION = _loaded['revision']
+    FINGERPRINT = _loaded['fingerprint']
+
+    # Согласованный снимок (критерии, требования, версия, хэш), заменяется одним присваиванием
+    _state = (CRITERIA, DOCUMENT_REQUIREMENTS, VERSION, FINGERPRINT)
+    _source_mtime = os.stat(SOURCE_FILE).st_mtime_ns
+    _last_reload_check = time.monotonic()
+    _reload_lock = threading.Lock()
+    del _loaded
 
     @staticmethod
     def _has_abbreviations(text: str) -> bool:
         """Проверка на наличие аббревиатур"""
-        # Исключаем из проверки известные ученые степени и сокращения
-        allowed_abbr = ['к.т.н', 'д.т.н', 'к.э.н', 'д.э.н', 'к.ф.-м.н', 'д.ф.-м.н']
-
-        # Удаляем разрешенные сокращения для проверки
-        text_clean = text
-        for abbr in allowed_abbr:
-            text_clean = text_clean.replace(abbr, '')
-
-        # Ищем аббревиатуры (2-6 заглавных букв подряд)
-        abbreviations = re.findall(r'\b[А-ЯA-Z]{2,6}\b', text_clean)
-        return len(abbreviations) > 0
+        return rules.has_abbreviations(text)
 
     @staticmethod
     def _check_author_format_improved(text: str) -> bool:
         """Улучшенная проверка формата авторов - может быть несколько через запятую"""
-        # Убираем лишние пробелы и разделяем по запятым
-        authors = [author.strip() for author in text.split(',')]
-
-        # Проверяем каждого автора
-        for author in authors:
-            if not author:
-                continue
-            # Паттерн: Фамилия И.О. (с возможными пробелами)
-            pattern = r'^[А-ЯЁ][а-яё]+\s+[А-ЯЁ]\.\s*[А-ЯЁ]\.$'
-            if not re.match(pattern, author.strip()):
-                return False
-
-        return len(authors) > 0
+        return rules.author_format(text)
 
     @staticmethod
     def _check_initials_format(text: str) -> bool:
         """Проверка формата инициалов без пробелов"""
-        if '.' in text:
-            # Ищем инициалы в тексте
-            initials_matches = re.findall(r'[А-ЯЁ]\.[А-ЯЁ]\.', text)
-            if initials_matches:
-                # Проверяем, что между инициалами нет пробелов
-                for match in initials_matches:
-                    if ' ' in match:
-                        return False
-        return True
+        return rules.initials_format(text)
 
     @staticmethod
     def _check_english_author_format(text: str) -> bool:
         """Проверка формата английского автора"""
-        pattern = r'[A-Z][a-z]+\s*[A-Z]\.[A-Z]\.'
-        return bool(re.search(pattern, text))
+        return rules.english_author_format(text)
 
     @staticmethod
     def _has_full_name_complete(text: str) -> bool:
@@ -219,13 +72,7 @@ class FormattingCriteria:
     @staticmethod
     def _has_professional_info(text: str) -> bool:
         """Проверка профессиональной информации"""
-        info_keywords = [
-            'к.т.н', 'д.т.н', 'кандидат', 'доктор', 'профессор', 'доцент',
-            'аспирант', 'магистр', 'заведующий', 'директор', 'кафедра',
-            'университет', 'институт', 'факультет', 'область', 'город'
-        ]
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in info_keywords)
+        return rules.professional_info(text)
 
     @staticmethod
     def _has_workplace_info(text: str) -> bool:
@@ -247,4 +94,72 @@ class FormattingCriteria:
     @classmethod
     def get_document_requirements(cls):
         """Получить общие требования к документу"""
-        return cls.DOCUMENT_REQUIREMENTS
\ No newline at end of file
+        return cls.DOCUMENT_REQUIREMENTS
+
+    @classmethod
+    def get_state(cls):
+        """Согласованный снимок текущих критериев: (критерии, требования, версия, хэш)"""
+        return cls._state
+
+    @classmethod
+    def set_criteria(cls, criteria: Dict = None, document_requirements: Dict = None, revision: str = None):
+        """Замена критериев и требований к документу с увеличением версии.
+
+        Переданные словари после вызова не изменяются: для правки нужна копия
+        (copy_criteria), иначе уже идущие анализы не увидят согласованный снимок.
+        """
+        with cls._reload_lock:
+            criteria = cls.CRITERIA if criteria is None else criteria
+            document_requirements = cls.DOCUMENT_REQUIREMENTS if document_requirements is None else document_requirements
+            try:
+                fingerprint = fingerprint_criteria(criteria, document_requirements)
+            except Exception:
+                # Критерии с правилами вне реестра не имеют стабильного хэша
+                fingerprint = None
+            cls.CRITERIA = criteria
+            cls.DOCUMENT_REQUIREMENTS = document_requirements
+            cls.REVISION = revision
+            cls.FINGERPRINT = fingerprint
+            cls.VERSION += 1
+            cls._state = (criteria, document_requirements, cls.VERSION, fingerprint)
+
+    @classmethod
+    def reload_if_changed(cls, force: bool = False) -> bool:
+        """Перезагрузка критериев при изменении файла (не чаще RELOAD_CHECK_INTERVAL).
+
+        Новый файл полностью компилируется до замены, поэтому при ошибке в
+        файле продолжают действовать прежние критерии.
+        """
+        now = time.monotonic()
+        if not force and now - cls._last_reload_check < cls.RELOAD_CHECK_INTERVAL:
+            return False
+        cls._last_reload_check = now
+
+        try:
+            mtime = os.stat(cls.SOURCE_FILE).st_mtime_ns
+        except OSError:
+            return False
+        if not force and mtime == cls._source_mtime:
+            return False
+
+        try:
+            loaded = load_criteria_file(cls.SOURCE_FILE)
+        except Exception as e:
+            print(f"Ошибка загрузки критериев из {cls.SOURCE_FILE}: {e}")
+            cls._source_mtime = mtime
+            return False
+
+        cls._source_mtime = mtime
+        cls.set_criteria(loaded['criteria'], loaded['document_requirements'], loaded['revision'])
+        return True
+
+    @classmethod
+    def copy_criteria(cls):
+        """Независимая копия текущих критериев и требований.
+
+        copy.deepcopy не подходит: размеры docx (Mm, Cm) при копировании
+        пересчитываются из EMU как из миллиметров и становятся неверными.
+        """
+        criteria, document_requirements, _, _ = cls._state
+        copied = compile_criteria_data(criteria_to_data(criteria, document_requirements))
+        return copied['criteria'], copied['document_requirements']
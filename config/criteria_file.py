@@ -0,0 +1,143 @@
+"""
+Загрузка критериев проверки из версионированного файла JSON
+"""
+import hashlib
+import json
+import os
+from functools import partial
+from typing import Dict
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Cm, Mm
+from config.rules import RULES, build_rule
+
+CRITERIA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'criteria.json')
+
+# Версии схемы файла, которые умеет читать загрузчик
+SUPPORTED_SCHEMA_VERSIONS = (1,)
+
+ALIGNMENTS = {
+    'LEFT': WD_ALIGN_PARAGRAPH.LEFT,
+    'CENTER': WD_ALIGN_PARAGRAPH.CENTER,
+    'RIGHT': WD_ALIGN_PARAGRAPH.RIGHT,
+    'JUSTIFY': WD_ALIGN_PARAGRAPH.JUSTIFY
+}
+
+MARGIN_KEYS = ('top', 'bottom', 'left', 'right')
+
+
+class CriteriaFileError(ValueError):
+    """Ошибка содержимого файла критериев"""
+
+
+def read_criteria_file(path: str = CRITERIA_FILE) -> Dict:
+    """Чтение данных файла критериев без компиляции"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_criteria_file(path: str = CRITERIA_FILE) -> Dict:
+    """Чтение и компиляция файла критериев"""
+    return compile_criteria_data(read_criteria_file(path))
+
+
+def compile_criteria_data(data: Dict) -> Dict:
+    """Преобразование данных файла в критерии с размерами docx и функциями правил.
+
+    Возвращает словарь с ключами criteria, document_requirements, revision и
+    fingerprint (хэш канонического представления критериев).
+    """
+    schema_version = data.get('schema_version')
+    if schema_version not in SUPPORTED_SCHEMA_VERSIONS:
+        raise CriteriaFileError(f"Неподдерживаемая версия схемы критериев: {schema_version}")
+
+    requirements = data['document_requirements']
+    document_requirements = {
+        'margins': {key: Mm(requirements['margins_mm'][key]) for key in MARGIN_KEYS},
+        'line_spacing': requirements['line_spacing'],
+        'font_name': requirements['font_name'],
+        'min_pages': requirements['min_pages']
+    }
+
+    criteria = {}
+    for class_name, class_data in data['classes'].items():
+        class_criteria = {}
+        for key in ('font_name', 'font_size'):
+            if key in class_data:
+                class_criteria[key] = class_data[key]
+        if 'alignment' in class_data:
+            if class_data['alignment'] not in ALIGNMENTS:
+                raise CriteriaFileError(f"Неизвестное выравнивание для '{class_name}': {class_data['alignment']}")
+            class_criteria['alignment'] = ALIGNMENTS[class_data['alignment']]
+        for key in ('bold', 'italic'):
+            if key in class_data:
+                class_criteria[key] = class_data[key]
+        if 'paragraph_indent_cm' in class_data:
+            class_criteria['paragraph_indent'] = Cm(class_data['paragraph_indent_cm'])
+
+        content_rules = []
+        for rule in class_data.get('content_rules', []):
+            try:
+                content_rules.append((rule['name'], build_rule(rule['rule'], rule.get('params'))))
+            except KeyError as e:
+                raise CriteriaFileError(f"Ошибка правила класса '{class_name}': {e}")
+        class_criteria['content_rules'] = content_rules
+        criteria[class_name] = class_criteria
+
+    return {
+        'criteria': criteria,
+        'document_requirements': document_requirements,
+        'revision': data.get('revision'),
+        'fingerprint': fingerprint_criteria(criteria, document_requirements)
+    }
+
+
+def criteria_to_data(criteria: Dict, document_requirements: Dict, revision: str = None) -> Dict:
+    """Обратное преобразование критериев в данные файла (для копирования и сохранения)"""
+    alignment_names = {value: name for name, value in ALIGNMENTS.items()}
+    rule_names = {func: name for name, func in RULES.items()}
+
+    classes = {}
+    for class_name, class_criteria in criteria.items():
+        class_data = {}
+        for key in ('font_name', 'font_size'):
+            if key in class_criteria:
+                class_data[key] = class_criteria[key]
+        if class_criteria.get('alignment') is not None:
+            class_data['alignment'] = alignment_names[class_criteria['alignment']]
+        for key in ('bold', 'italic'):
+            if key in class_criteria:
+                class_data[key] = class_criteria[key]
+        if class_criteria.get('paragraph_indent') is not None:
+            class_data['paragraph_indent_cm'] = round(class_criteria['paragraph_indent'].cm, 4)
+
+        content_rules = []
+        for rule_name, rule_func in class_criteria.get('content_rules', []):
+            if not isinstance(rule_func, partial) or rule_func.func not in rule_names:
+                raise CriteriaFileError(f"Правило '{rule_name}' не из реестра правил")
+            rule = {'name': rule_name, 'rule': rule_names[rule_func.func]}
+            if rule_func.keywords:
+                rule['params'] = dict(rule_func.keywords)
+            content_rules.append(rule)
+        class_data['content_rules'] = content_rules
+        classes[class_name] = class_data
+
+    margins = document_requirements['margins']
+    return {
+        'schema_version': SUPPORTED_SCHEMA_VERSIONS[-1],
+        'revision': revision,
+        'document_requirements': {
+            'margins_mm': {key: round(margins[key].mm, 4) for key in MARGIN_KEYS},
+            'line_spacing': document_requirements['line_spacing'],
+            'font_name': document_requirements['font_name'],
+            'min_pages': document_requirements['min_pages']
+        },
+        'classes': classes
+    }
+
+
+def fingerprint_criteria(criteria: Dict, document_requirements: Dict) -> str:
+    """Хэш содержимого критериев, не зависящий от форматирования файла и ревизии"""
+    data = criteria_to_data(criteria, document_requirements)
+    del data['revision']
+    canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
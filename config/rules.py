@@ -0,0 +1,165 @@
+"""
+Реестр именованных правил проверки содержания.
+
+Файл критериев ссылается на правила по имени и передает им параметры,
+поэтому скомпилированные критерии не содержат lambda и сериализуются pickle.
+"""
+import re
+from functools import partial
+from typing import Callable, Dict
+
+RULES: Dict[str, Callable[..., bool]] = {}
+
+# Предкомпилированные шаблоны для правил содержания
+_LATIN_LETTER_RE = re.compile(r'[a-zA-Z]')
+_LATIN_WORD_RE = re.compile(r'[a-zA-Z]+')
+_ABBREVIATION_RE = re.compile(r'\b[А-ЯA-Z]{2,6}\b')
+_ALLOWED_ABBREVIATIONS_RE = re.compile(
+    '|'.join(re.escape(abbr) for abbr in ['к.ф.-м.н', 'д.ф.-м.н', 'к.т.н', 'д.т.н', 'к.э.н', 'д.э.н'])
+)
+_AUTHOR_RE = re.compile(r'^[А-ЯЁ][а-яё]+\s+[А-ЯЁ]\.\s*[А-ЯЁ]\.$')
+_INITIALS_RE = re.compile(r'[А-ЯЁ]\.[А-ЯЁ]\.')
+_ENGLISH_AUTHOR_RE = re.compile(r'[A-Z][a-z]+\s*[A-Z]\.[A-Z]\.')
+
+PROFESSIONAL_KEYWORDS = (
+    'к.т.н', 'д.т.н', 'кандидат', 'доктор', 'профессор', 'доцент',
+    'аспирант', 'магистр', 'заведующий', 'директор', 'кафедра',
+    'университет', 'институт', 'факультет', 'область', 'город'
+)
+
+
+def register_rule(name: str):
+    """Декоратор регистрации правила под именем из файла критериев"""
+    def decorator(func):
+        RULES[name] = func
+        return func
+    return decorator
+
+
+def build_rule(name: str, params: Dict = None) -> Callable[[str], bool]:
+    """Правило с привязанными параметрами (partial сериализуется pickle)"""
+    if name not in RULES:
+        raise KeyError(f"Неизвестное правило содержания: {name}")
+    return partial(RULES[name], **(params or {}))
+
+
+@register_rule('always')
+def always(text: str) -> bool:
+    """Упрощенная проверка, которая всегда проходит"""
+    return True
+
+
+@register_rule('starts_with')
+def starts_with(text: str, prefix: str) -> bool:
+    """Текст начинается с префикса без учета регистра"""
+    return text.strip().upper().startswith(prefix.upper())
+
+
+@register_rule('starts_with_uppercase')
+def starts_with_uppercase(text: str) -> bool:
+    """Текст начинается с заглавной буквы"""
+    return text[0].isupper() if text else False
+
+
+@register_rule('min_words')
+def min_words(text: str, count: int) -> bool:
+    """Не меньше заданного числа слов"""
+    return len(text.split()) >= count
+
+
+@register_rule('length_between')
+def length_between(text: str, min_length: int = 0, max_length: int = None) -> bool:
+    """Длина текста в заданных пределах"""
+    return len(text) >= min_length and (max_length is None or len(text) <= max_length)
+
+
+@register_rule('not_in_head')
+def not_in_head(text: str, word: str, head_length: int) -> bool:
+    """Слово не встречается в начале текста"""
+    return word not in text.lower()[:head_length]
+
+
+@register_rule('list_items_between')
+def list_items_between(text: str, min_items: int, max_items: int, separator: str = ',') -> bool:
+    """Число непустых элементов списка в заданных пределах"""
+    return min_items <= len([item for item in text.split(separator) if item.strip()]) <= max_items
+
+
+@register_rule('min_char_count')
+def min_char_count(text: str, char: str, count: int) -> bool:
+    """Символ встречается не меньше заданного числа раз"""
+    return text.count(char) >= count
+
+
+@register_rule('contains')
+def contains(text: str, substring: str) -> bool:
+    """Текст содержит подстроку"""
+    return substring in text
+
+
+@register_rule('has_latin')
+def has_latin(text: str) -> bool:
+    """Текст содержит латинские буквы"""
+    return _LATIN_LETTER_RE.search(text) is not None
+
+
+@register_rule('min_latin_words')
+def min_latin_words(text: str, count: int) -> bool:
+    """Не меньше заданного числа латинских слов"""
+    return len(_LATIN_WORD_RE.findall(text)) >= count
+
+
+@register_rule('no_abbreviations')
+def no_abbreviations(text: str) -> bool:
+    """Нет аббревиатур, кроме ученых степеней"""
+    return not has_abbreviations(text)
+
+
+@register_rule('author_format')
+def author_format(text: str) -> bool:
+    """Улучшенная проверка формата авторов - может быть несколько через запятую"""
+    # Убираем лишние пробелы и разделяем по запятым
+    authors = [author.strip() for author in text.split(',')]
+
+    # Проверяем каждого автора
+    for author in authors:
+        if not author:
+            continue
+        # Паттерн: Фамилия И.О. (с возможными пробелами)
+        if not _AUTHOR_RE.match(author.strip()):
+            return False
+
+    return len(authors) > 0
+
+
+@register_rule('initials_format')
+def initials_format(text: str) -> bool:
+    """Проверка формата инициалов без пробелов"""
+    if '.' in text:
+        # Ищем инициалы в тексте и проверяем, что между ними нет пробелов
+        for match in _INITIALS_RE.findall(text):
+            if ' ' in match:
+                return False
+    return True
+
+
+@register_rule('english_author_format')
+def english_author_format(text: str) -> bool:
+    """Проверка формата английского автора"""
+    return bool(_ENGLISH_AUTHOR_RE.search(text))
+
+
+@register_rule('professional_info')
+def professional_info(text: str, keywords=PROFESSIONAL_KEYWORDS) -> bool:
+    """Проверка профессиональной информации"""
+    text_lower = text.lower()
+    return any(keyword in text_lower for keyword in keywords)
+
+
+def has_abbreviations(text: str) -> bool:
+    """Проверка на наличие аббревиатур"""
+    # Удаляем известные ученые степени и сокращения за один проход
+    text_clean = _ALLOWED_ABBREVIATIONS_RE.sub('', text)
+
+    # Ищем аббревиатуры (2-6 заглавных букв подряд)
+    return _ABBREVIATION_RE.search(text_clean) is not None
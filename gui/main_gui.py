@@ -14,6 +14,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from main import DocxValidator
 from gui.settings_window import SettingsWindow
 from config.criteria import FormattingCriteria
+from utils.cancellation import CancellationToken
 
 
 class ValidatorGUI:
@@ -33,6 +34,8 @@ class ValidatorGUI:
         self.validator = None
         self.current_file_path = None
         self.analysis_results = None
+        # Признак отмены выполняемого анализа
+        self.cancel_token = None
 
         # Создание интерфейса
         self.create_widgets()
@@ -140,12 +143,13 @@ class ValidatorGUI:
         self.file_menu.add_command(label="Выход", command=self.root.quit)
 
         # Меню "Анализ"
-        analysis_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="Анализ", menu=analysis_menu)
-        analysis_menu.add_command(label="Запустить анализ", command=self.start_analysis, accelerator="F5")
-        analysis_menu.add_command(label="Остановить анализ", command=self.stop_analysis, state='disabled')
-        analysis_menu.add_separator()
-        analysis_menu.add_command(label="Настройки критериев", command=self.open_settings)
+        self.analysis_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Анализ", menu=self.analysis_menu)
+        self.analysis_menu.add_command(label="Запустить анализ", command=self.start_analysis, accelerator="F5")
+        self.analysis_menu.add_command(label="Остановить анализ", command=self.stop_analysis, state='disabled',
+                                       accelerator="Esc")
+        self.analysis_menu.add_separator()
+        self.analysis_menu.add_command(label="Настройки критериев", command=self.open_settings)
 
         # Меню "Вид"
         view_menu = tk.Menu(menubar, tearoff=0)
@@ -160,6 +164,7 @@ class ValidatorGUI:
         # Привязка горячих клавиш
         self.root.bind('<Control-o>', lambda e: self.browse_file())
         self.root.bind('<F5>', lambda e: self.start_analysis())
+        self.root.bind('<Escape>', lambda e: self.stop_analysis())
 
     def setup_layout(self):
         """Размещение виджетов"""
@@ -250,11 +255,15 @@ class ValidatorGUI:
         self.browse_button.config(state='disabled')
         self.progress_bar.start()
         self.progress_var.set("Анализ документа...")
+        self.analysis_menu.entryconfig("Остановить анализ", state='normal')
 
         # Запуск анализа в отдельном потоке
+        cancel_token = CancellationToken()
+        self.cancel_token = cancel_token
+
         def analysis_worker():
             try:
-                results = self.validator.analyze_document(self.current_file_path)
+                results = self.validator.analyze_document(self.current_file_path, cancel_token=cancel_token)
                 self.root.after(0, self.on_analysis_complete, results)
             except Exception as e:
                 self.root.after(0, self.on_analysis_error, str(e))
@@ -265,13 +274,16 @@ class ValidatorGUI:
     def on_analysis_complete(self, results):
         """Обработчик завершения анализа"""
         self.analysis_results = results
+        self.cancel_token = None
+        cancellation = results['summary'].get('cancellation')
 
         # Разблокировка интерфейса
         self.analyze_button.config(state='normal')
         self.browse_button.config(state='normal')
         self.progress_bar.stop()
+        self.analysis_menu.entryconfig("Остановить анализ", state='disabled')
         self.file_menu.entryconfig("Сохранить отчет...", state='normal')
-        self.progress_var.set("Анализ завершен")
+        self.progress_var.set("Анализ остановлен" if cancellation else "Анализ завершен")
 
         # Обновление результатов
         self.update_summary_view()
@@ -280,7 +292,11 @@ class ValidatorGUI:
         # Обновление статуса
         summary = results['summary']
         total_errors = summary['total_errors'] + summary.get('document_errors', 0)
-        self.status_var.set(f"Анализ завершен. Найдено ошибок: {total_errors}")
+        if cancellation:
+            self.status_var.set(f"Анализ остановлен. Найдено ошибок: {total_errors}, "
+                                f"не проверено абзацев: {cancellation['unprocessed_paragraphs']}")
+        else:
+            self.status_var.set(f"Анализ завершен. Найдено ошибок: {total_errors}")
 
         # Включение сохранения отчета
         self.root.nametowidget('.!menu').entryconfig("Файл", state='normal')
@@ -288,9 +304,11 @@ class ValidatorGUI:
     def on_analysis_error(self, error_msg):
         """Обработчик ошибки анализа"""
         # Разблокировка интерфейса
+        self.cancel_token = None
         self.analyze_button.config(state='normal')
         self.browse_button.config(state='normal')
         self.progress_bar.stop()
+        self.analysis_menu.entryconfig("Остановить анализ", state='disabled')
         self.progress_var.set("Ошибка анализа")
 
         messagebox.showerror("Ошибка анализа", f"Произошла ошибка при анализе документа:\n{error_msg}")
@@ -422,7 +440,8 @@ class ValidatorGUI:
         # Обновление фильтра классов
         classes = set()
         for para in self.analysis_results['paragraphs']:
-            classes.add(para['classified_as'])
+            if not para.get('unprocessed'):
+                classes.add(para['classified_as'])
 
         class_values = ["Все"] + sorted(list(classes))
         self.class_filter_combo['values'] = class_values
@@ -450,11 +469,14 @@ class ValidatorGUI:
             # Главная запись параграфа
             icon = "📄" if para['total_errors'] == 0 else "❌"
             error_text = f"{para['total_errors']}" if para['total_errors'] > 0 else "Нет"
+            class_text = para['classified_as']
+            if para.get('unprocessed'):
+                icon, error_text, class_text = "⏸", "—", "не проверен"
 
             parent_id = self.detail_tree.insert('', 'end',
                                                 text=icon,
                                                 values=(
-                                                para['index'], para['classified_as'], error_text, para['text_preview']),
+                                                para['index'], class_text, error_text, para['text_preview']),
                                                 tags=('error' if para['total_errors'] > 0 else 'normal',)
                                                 )
 
@@ -463,14 +485,14 @@ class ValidatorGUI:
                 for error in para['formatting_errors']:
                     self.detail_tree.insert(parent_id, 'end',
                                             text="📐",
-                                            values=("", "Форматирование", "", error),
+                                            values=("", "Форматирование", "", str(error)),
                                             tags=('formatting_error',)
                                             )
 
                 for error in para['content_errors']:
                     self.detail_tree.insert(parent_id, 'end',
                                             text="📝",
-                                            values=("", "Содержание", "", error),
+                                            values=("", "Содержание", "", str(error)),
                                             tags=('content_error',)
                                             )
 
@@ -537,8 +559,12 @@ class ValidatorGUI:
                 messagebox.showerror("Ошибка", f"Не удалось сохранить отчет:\n{str(e)}")
 
     def stop_analysis(self):
-        """Остановка анализа (заглушка)"""
-        messagebox.showinfo("Информация", "Функция остановки анализа пока не реализована")
+        """Остановка анализа: будут показаны результаты уже проверенных абзацев"""
+        if self.cancel_token is None:
+            return
+        self.cancel_token.cancel()
+        self.analysis_menu.entryconfig("Остановить анализ", state='disabled')
+        self.progress_var.set("Остановка анализа...")
 
     def show_about(self):
         """Показ информации о программе"""
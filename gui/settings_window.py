@@ -6,7 +6,6 @@ from tkinter import ttk, messagebox
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Pt, Cm
 from config.criteria import FormattingCriteria
-import copy
 
 
 class SettingsWindow:
@@ -21,8 +20,7 @@ class SettingsWindow:
         self.window.grab_set()
 
         # Копируем текущие критерии
-        self.current_criteria = copy.deepcopy(FormattingCriteria.CRITERIA)
-        self.document_requirements = copy.deepcopy(FormattingCriteria.DOCUMENT_REQUIREMENTS)
+        self.current_criteria, self.document_requirements = FormattingCriteria.copy_criteria()
 
         self.setup_ui()
 
@@ -248,8 +246,7 @@ class SettingsWindow:
                         criteria[var_name] = var.get()
 
             # Применяем изменения к основному классу
-            FormattingCriteria.CRITERIA = self.current_criteria
-            FormattingCriteria.DOCUMENT_REQUIREMENTS = self.document_requirements
+            FormattingCriteria.set_criteria(self.current_criteria, self.document_requirements)
 
             messagebox.showinfo("Настройки", "Настройки успешно сохранены!")
             self.window.destroy()
@@ -267,13 +264,8 @@ class SettingsWindow:
         """Загрузка настроек по умолчанию"""
         if messagebox.askyesno("По умолчанию",
                                "Загрузить настройки по умолчанию? Все текущие изменения будут потеряны."):
-            # Перезагружаем класс критериев
-            import importlib
-            from config import criteria
-            importlib.reload(criteria)
-
-            self.current_criteria = copy.deepcopy(criteria.FormattingCriteria.CRITERIA)
-            self.document_requirements = copy.deepcopy(criteria.FormattingCriteria.DOCUMENT_REQUIREMENTS)
+            # Перечитываем критерии из файла
+            FormattingCriteria.reload_if_changed(force=True)
 
             self.window.destroy()
             SettingsWindow(self.parent)
\ No newline at end of file
@@ -0,0 +1,95 @@
+"""
+Управление очередью заданий: постановка файлов, состояние, выгрузка результатов
+
+Запуск:
+    python -m jobs.manage очередь.db enqueue каталог/ [--profile fast] [--max-attempts 3]
+    python -m jobs.manage очередь.db status
+    python -m jobs.manage очередь.db results [-o результаты.ndjson] [--dead]
+    python -m jobs.manage очередь.db requeue-dead
+"""
+import argparse
+import json
+import sys
+
+from config.analysis_profiles import ANALYSIS_PROFILES, DEFAULT_PROFILE
+from jobs.store import DEAD, DONE, JobStore, open_store
+from batch import collect_batch_files
+
+
+def enqueue(store: JobStore, inputs, options, max_attempts: int):
+    """Постановка файлов .docx из путей, каталогов и шаблонов glob"""
+    files = collect_batch_files(inputs)
+    added = store.enqueue(files, options, max_attempts)
+    print(f"Файлов: {len(files)}, новых заданий: {added}, уже в очереди: {len(files) - added}", file=sys.stderr)
+
+
+def print_status(store: JobStore):
+    """Число заданий по состояниям в JSON"""
+    counts = store.counts()
+    print(json.dumps(counts, ensure_ascii=False))
+
+
+def export_results(store: JobStore, output=None, dead: bool = False):
+    """Результаты в NDJSON, как у пакетной проверки (batch.run_batch); dead - ошибки DEAD"""
+    out = open(output, 'w', encoding='utf-8') if output else sys.stdout
+    written = 0
+    try:
+        for job in store.jobs(DEAD if dead else DONE):
+            if dead:
+                out.write(f'{{"file":{json.dumps(job.path, ensure_ascii=False)},"status":"error",'
+                          f'"attempts":{job.attempts},"error":{json.dumps(job.error, ensure_ascii=False)}}}\n')
+            else:
+                out.write(f'{{"file":{json.dumps(job.path, ensure_ascii=False)},"status":"ok",'
+                          f'"elapsed":{job.elapsed or 0.0:.4f},"result":{job.result}}}\n')
+            written += 1
+    finally:
+        if output:
+            out.close()
+    print(f"Выгружено заданий: {written}", file=sys.stderr)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Управление очередью заданий проверки документов")
+    parser.add_argument('store', help="Очередь: путь к файлу SQLite или sqlite:///путь")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('enqueue', help="Поставить файлы в очередь")
+    add.add_argument('inputs', nargs='+', help="Файлы, каталоги или шаблоны glob")
+    add.add_argument('--journal', default=None, help="Профиль журнала или 'auto'")
+    add.add_argument('--profile', choices=list(ANALYSIS_PROFILES), default=DEFAULT_PROFILE,
+                     help="Профиль анализа: fast, standard или thorough")
+    add.add_argument('--time-budget', type=float, default=None,
+                     help="Ограничение времени анализа одного документа, с")
+    add.add_argument('--max-attempts', type=int, default=3,
+                     help="Число попыток, после которого задание переходит в dead")
+
+    commands.add_parser('status', help="Число заданий по состояниям")
+
+    results = commands.add_parser('results', help="Выгрузить результаты в NDJSON")
+    results.add_argument('-o', '--output', help="Файл NDJSON (по умолчанию stdout)")
+    results.add_argument('--dead', action='store_true', help="Выгрузить ошибки заданий в состоянии dead")
+
+    commands.add_parser('requeue-dead', help="Вернуть задания из dead в очередь")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    store = open_store(args.store)
+    try:
+        if args.command == 'enqueue':
+            options = {"journal": args.journal, "profile": args.profile, "time_budget": args.time_budget}
+            enqueue(store, args.inputs, {name: value for name, value in options.items() if value is not None},
+                    args.max_attempts)
+        elif args.command == 'status':
+            print_status(store)
+        elif args.command == 'results':
+            export_results(store, args.output, args.dead)
+        elif args.command == 'requeue-dead':
+            print(f"Возвращено в очередь: {store.requeue_dead()}", file=sys.stderr)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Очередь заданий в SQLite: хранилище по умолчанию
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+from jobs.store import DEAD, DONE, PENDING, RUNNING, STATUSES, Job, JobStore, check_options, job_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_key TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    error TEXT,
+    result TEXT,
+    elapsed REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_leases ON jobs (status, lease_expires);
+"""
+
+_COLUMNS = 'id, path, options, status, attempts, max_attempts, worker, lease_expires, error, result, elapsed'
+
+
+class SQLiteJobStore(JobStore):
+    """Очередь в файле SQLite.
+
+    Несколько процессов на одной машине (или контейнеров с общим томом)
+    работают с одним файлом: выдача задания - короткая транзакция
+    BEGIN IMMEDIATE, журнал WAL не блокирует чтение. Для нескольких машин
+    файл нужен на диске, где блокировки SQLite надежны; сетевые файловые
+    системы этого не гарантируют - там нужно другое хранилище JobStore.
+    Сроки аренды отсчитываются по time.time(), поэтому часы машин должны
+    быть синхронизированы.
+    """
+
+    # Ожидание блокировки базы другим процессом, с
+    BUSY_TIMEOUT = 30.0
+
+    def __init__(self, path: str):
+        self.path = path
+        # Соединение SQLite нельзя использовать из разных потоков
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Транзакциями управляем сами (isolation_level=None)
+            connection = sqlite3.connect(self.path, timeout=self.BUSY_TIMEOUT, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def enqueue(self, paths: List[str], options: Optional[Dict] = None, max_attempts: int = 3) -> int:
+        options = dict(options or {})
+        check_options(options)
+        options_json = json.dumps(options, sort_keys=True)
+        now = time.time()
+        added = 0
+        with self._transaction() as connection:
+            for path in paths:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO jobs (job_key, path, options, status, max_attempts, available_at, "
+                    "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_key(path, options), path, options_json, PENDING, max(1, max_attempts), now, now, now)
+                )
+                added += cursor.rowcount
+        return added
+
+    def claim(self, worker: str, visibility_timeout: float) -> Optional[Job]:
+        now = time.time()
+        with self._transaction() as connection:
+            # Задания упавших обработчиков, исчерпавшие попытки, больше не выдаются
+            connection.execute(
+                "UPDATE jobs SET status = ?, worker = NULL, lease_expires = NULL, updated_at = ?, "
+                "error = COALESCE(error, 'Истек срок аренды: обработчик не завершил задание') "
+                "WHERE status = ? AND lease_expires <= ? AND attempts >= max_attempts",
+                (DEAD, now, RUNNING, now)
+            )
+            row = connection.execute(
+                f"SELECT {_COLUMNS} FROM jobs "
+                "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires <= ?) "
+                "ORDER BY id LIMIT 1",
+                (PENDING, now, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            job = self._job(row)
+            job.status = RUNNING
+            job.attempts += 1
+            job.worker = worker
+            job.lease_expires = now + visibility_timeout
+            connection.execute(
+                "UPDATE jobs SET status = ?, attempts = ?, worker = ?, lease_expires = ?, updated_at = ? "
+                "WHERE id = ?",
+                (RUNNING, job.attempts, worker, job.lease_expires, now, job.id)
+            )
+        return job
+
+    def extend(self, job_id: int, worker: str, visibility_timeout: float) -> bool:
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND worker = ?",
+                (now + visibility_timeout, now, job_id, RUNNING, worker)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker: str, result: str, elapsed: float) -> bool:
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, elapsed = ?, error = NULL, lease_expires = NULL, "
+                "updated_at = ? WHERE id = ? AND status = ? AND worker = ?",
+                (DONE, result, elapsed, time.time(), job_id, RUNNING, worker)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str, retry_delay: float = 0.0) -> Optional[str]:
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND worker = ?",
+                (job_id, RUNNING, worker)
+            ).fetchone()
+            if row is None:
+                return None
+            attempts, max_attempts = row
+            status = DEAD if attempts >= max_attempts else PENDING
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, worker = NULL, lease_expires = NULL, available_at = ?, "
+                "updated_at = ? WHERE id = ?",
+                (status, error, now + retry_delay, now, job_id)
+            )
+        return status
+
+    def release(self, job_id: int, worker: str) -> bool:
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts - 1, worker = NULL, lease_expires = NULL, "
+                "available_at = ?, updated_at = ? WHERE id = ? AND status = ? AND worker = ?",
+                (PENDING, now, now, job_id, RUNNING, worker)
+            )
+            return cursor.rowcount == 1
+
+    def requeue_dead(self) -> int:
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?",
+                (PENDING, now, now, DEAD)
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(STATUSES, 0)
+        now = time.time()
+        connection = self._connection()
+        for status, count in connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = count
+        # Задания с истекшей арендой ждут повторной выдачи
+        counts['expired'] = connection.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = ? AND lease_expires <= ?", (RUNNING, now)
+        ).fetchone()[0]
+        return counts
+
+    def jobs(self, status: Optional[str] = None) -> Iterator[Job]:
+        if status is None:
+            rows = self._connection().execute(f"SELECT {_COLUMNS} FROM jobs ORDER BY id")
+        else:
+            rows = self._connection().execute(f"SELECT {_COLUMNS} FROM jobs WHERE status = ? ORDER BY id",
+                                              (status,))
+        for row in rows:
+            yield self._job(row)
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    @staticmethod
+    def _job(row) -> Job:
+        job_id, path, options, status, attempts, max_attempts, worker, lease_expires, error, result, elapsed = row
+        return Job(job_id, path, json.loads(options), status, attempts, max_attempts, worker, lease_expires,
+                   error, result, elapsed)
+
+
+class _Transaction:
+    """Транзакция BEGIN IMMEDIATE: блокировка записи берется сразу, поэтому
+    два обработчика не могут выбрать одно и то же задание"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+        return False
@@ -0,0 +1,125 @@
+"""
+Очередь заданий на проверку документов: общий интерфейс хранилищ
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional
+
+from config.analysis_profiles import DEFAULT_PROFILE, check_profile_modes, get_analysis_profile
+from service.protocol import REQUEST_OPTIONS
+
+# Состояния задания
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+DEAD = 'dead'
+STATUSES = (PENDING, RUNNING, DONE, DEAD)
+
+
+class Job:
+    """Задание на проверку одного документа"""
+
+    __slots__ = ('id', 'path', 'options', 'status', 'attempts', 'max_attempts', 'worker',
+                 'lease_expires', 'error', 'result', 'elapsed')
+
+    def __init__(self, id: int, path: str, options: Dict, status: str = PENDING, attempts: int = 0,
+                 max_attempts: int = 3, worker: Optional[str] = None, lease_expires: Optional[float] = None,
+                 error: Optional[str] = None, result: Optional[str] = None, elapsed: Optional[float] = None):
+        self.id = id
+        self.path = path
+        # Параметры analyze_document (см. service.protocol.REQUEST_OPTIONS)
+        self.options = options
+        self.status = status
+        # Число выдач задания обработчикам, включая текущую
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.worker = worker
+        # Момент (time.time()), после которого задание можно выдать другому обработчику
+        self.lease_expires = lease_expires
+        self.error = error
+        # Результаты анализа в JSON (reports.serialization.results_to_json)
+        self.result = result
+        self.elapsed = elapsed
+
+
+def job_key(path: str, options: Dict) -> str:
+    """Ключ задания: путь, размер, время изменения файла и параметры анализа.
+
+    Повторная постановка того же каталога не создает дубликатов, а измененный
+    с тех пор файл получает новое задание.
+    """
+    stat = os.stat(path)
+    return f"{path}|{stat.st_size}|{stat.st_mtime_ns}|{json.dumps(options, sort_keys=True)}"
+
+
+def check_options(options: Dict):
+    """Проверка параметров анализа задания"""
+    unknown = set(options) - set(REQUEST_OPTIONS)
+    if unknown:
+        raise ValueError(f"Неподдерживаемые параметры анализа: {', '.join(sorted(unknown))}")
+    check_profile_modes(get_analysis_profile(options.get('profile', DEFAULT_PROFILE)),
+                        **{name: options.get(name) for name in ('streaming', 'pipelined', 'sample_size')})
+
+
+class JobStore(ABC):
+    """Хранилище очереди заданий.
+
+    Задание выдается обработчику с арендой на visibility_timeout секунд;
+    обработчик продлевает аренду, пока идет анализ. Если аренда истекла
+    (процесс или машина обработчика упали), задание снова выдается другому
+    обработчику. После max_attempts выдач или неудачных попыток задание
+    переходит в состояние DEAD и больше не выдается, пока его не вернут
+    в очередь вручную (requeue_dead).
+    """
+
+    @abstractmethod
+    def enqueue(self, paths: List[str], options: Optional[Dict] = None, max_attempts: int = 3) -> int:
+        """Постановка файлов в очередь; число новых заданий"""
+
+    @abstractmethod
+    def claim(self, worker: str, visibility_timeout: float) -> Optional[Job]:
+        """Выдача следующего задания обработчику (None - доступных заданий нет)"""
+
+    @abstractmethod
+    def extend(self, job_id: int, worker: str, visibility_timeout: float) -> bool:
+        """Продление аренды; False - задание уже выдано другому обработчику"""
+
+    @abstractmethod
+    def complete(self, job_id: int, worker: str, result: str, elapsed: float) -> bool:
+        """Запись результатов; False - аренда потеряна, результаты не приняты"""
+
+    @abstractmethod
+    def fail(self, job_id: int, worker: str, error: str, retry_delay: float = 0.0) -> Optional[str]:
+        """Неудачная попытка: повтор после retry_delay или DEAD; новое состояние
+        задания (None - аренда потеряна)"""
+
+    @abstractmethod
+    def release(self, job_id: int, worker: str) -> bool:
+        """Возврат задания в очередь без учета попытки (обработчик остановлен)"""
+
+    @abstractmethod
+    def requeue_dead(self) -> int:
+        """Возврат заданий из DEAD в очередь с обнулением попыток; число заданий"""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Число заданий по состояниям"""
+
+    @abstractmethod
+    def jobs(self, status: Optional[str] = None) -> Iterator[Job]:
+        """Задания в порядке постановки, все или в одном состоянии"""
+
+    def close(self):
+        """Освобождение ресурсов хранилища"""
+
+
+def open_store(location: str) -> JobStore:
+    """Хранилище по адресу: путь к файлу SQLite или sqlite:///путь"""
+    # sqlite:///abs/path -> /abs/path, sqlite://rel/path -> rel/path
+    if location.startswith('sqlite://'):
+        location = location[len('sqlite://'):]
+    elif '://' in location:
+        raise ValueError(f"Неподдерживаемое хранилище очереди: {location}")
+    from jobs.sqlite_store import SQLiteJobStore
+    return SQLiteJobStore(location)
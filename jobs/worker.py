@@ -0,0 +1,192 @@
+"""
+Обработчик очереди заданий: берет документы из общей очереди, проверяет их
+прогретым DocxValidator и записывает результаты обратно.
+
+Запуск: python -m jobs.worker очередь.db [-j 4] [--until-empty]
+Несколько запусков (процессы, контейнеры, машины) могут работать с одной очередью.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from functools import partial
+from typing import Callable, Dict, Optional
+
+from jobs.store import JobStore, Job, open_store
+from main import DocxValidator
+from reports.serialization import results_to_json
+from utils.cancellation import CancellationToken
+
+
+class JobWorker:
+    """Цикл обработки заданий одним валидатором.
+
+    Пока идет анализ, отдельный поток продлевает аренду задания каждые
+    visibility_timeout / 3 секунд. Если продлить не удалось (обработчик
+    завис дольше срока аренды и задание выдано другому), анализ отменяется,
+    а его результаты не записываются. Ошибка анализа возвращает задание
+    в очередь с растущей задержкой; после max_attempts попыток задание
+    переходит в DEAD.
+    """
+
+    def __init__(self, store: JobStore, worker_id: Optional[str] = None, visibility_timeout: float = 120.0,
+                 poll_interval: float = 1.0, retry_delay: float = 5.0,
+                 validator_factory: Callable = DocxValidator):
+        self.store = store
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.validator = validator_factory()
+        self.stats = {"done": 0, "failed": 0, "lost": 0, "analysis_time": 0.0}
+        self._stop = threading.Event()
+        # Признак отмены текущего анализа
+        self._cancel_token: Optional[CancellationToken] = None
+
+    def stop(self, cancel_running: bool = False):
+        """Остановка после текущего задания (или сразу, с отменой анализа)"""
+        self._stop.set()
+        if cancel_running and self._cancel_token is not None:
+            self._cancel_token.cancel()
+
+    def run(self, max_jobs: Optional[int] = None, until_empty: bool = False) -> Dict:
+        """Обработка заданий до остановки, max_jobs заданий или опустошения очереди"""
+        processed = 0
+        while not self._stop.is_set() and (max_jobs is None or processed < max_jobs):
+            job = self.store.claim(self.worker_id, self.visibility_timeout)
+            if job is None:
+                if until_empty:
+                    break
+                self._stop.wait(self.poll_interval)
+                continue
+            self.process(job)
+            processed += 1
+        return self.stats
+
+    def process(self, job: Job):
+        """Анализ документа задания с продлением аренды"""
+        self._cancel_token = CancellationToken()
+        lease_lost = threading.Event()
+        finished = threading.Event()
+        heartbeat = threading.Thread(target=self._keep_lease, args=(job, finished, lease_lost), daemon=True)
+        heartbeat.start()
+
+        start = time.perf_counter()
+        error = None
+        results_json = None
+        try:
+            options = dict(job.options)
+            options.setdefault('use_result_cache', True)
+            results = self.validator.analyze_document(job.path, cancel_token=self._cancel_token, **options)
+            results_json = results_to_json(results)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - start
+        finished.set()
+        heartbeat.join()
+        self.stats["analysis_time"] += elapsed
+
+        if lease_lost.is_set():
+            self.stats["lost"] += 1
+            print(f"Аренда задания {job.id} потеряна, результаты не записаны: {job.path}", file=sys.stderr)
+            return
+        if self._stop.is_set() and self._cancel_token.is_stopped():
+            # Анализ прерван остановкой обработчика: задание сразу возвращается в очередь
+            self.store.release(job.id, self.worker_id)
+            return
+        if error is None:
+            if self.store.complete(job.id, self.worker_id, results_json, elapsed):
+                self.stats["done"] += 1
+            else:
+                self.stats["lost"] += 1
+            return
+
+        self.stats["failed"] += 1
+        status = self.store.fail(job.id, self.worker_id, error, self.retry_delay * 2 ** (job.attempts - 1))
+        print(f"Ошибка задания {job.id} (попытка {job.attempts} из {job.max_attempts}, "
+              f"теперь {status}): {job.path}: {error}", file=sys.stderr)
+
+    def _keep_lease(self, job: Job, finished: threading.Event, lease_lost: threading.Event):
+        """Продление аренды, пока идет анализ"""
+        interval = max(0.1, self.visibility_timeout / 3)
+        while not finished.wait(interval):
+            try:
+                extended = self.store.extend(job.id, self.worker_id, self.visibility_timeout)
+            except Exception as e:
+                # Временная ошибка хранилища: следующая попытка через interval
+                print(f"Не удалось продлить аренду задания {job.id}: {e}", file=sys.stderr)
+                continue
+            if not extended:
+                lease_lost.set()
+                self._cancel_token.cancel()
+                return
+
+
+def _run_worker(location: str, worker_id: str, worker_options: Dict, until_empty: bool) -> Dict:
+    """Точка входа процесса-обработчика"""
+    store = open_store(location)
+    worker = JobWorker(store, worker_id, **worker_options)
+    # Остановка (SIGTERM контейнера, Ctrl+C): прерванное задание сразу возвращается в очередь
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda signum, frame: worker.stop(cancel_running=True))
+    try:
+        return worker.run(until_empty=until_empty)
+    finally:
+        store.close()
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Обработчик очереди заданий проверки документов")
+    parser.add_argument('store', help="Очередь: путь к файлу SQLite или sqlite:///путь")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Число процессов-обработчиков")
+    parser.add_argument('--visibility-timeout', type=float, default=120.0,
+                        help="Срок аренды задания, с: после него задание упавшего обработчика выдается снова")
+    parser.add_argument('--poll-interval', type=float, default=1.0, help="Пауза при пустой очереди, с")
+    parser.add_argument('--retry-delay', type=float, default=5.0,
+                        help="Задержка перед первым повтором неудачного задания, с (удваивается)")
+    parser.add_argument('--until-empty', action='store_true', help="Завершиться, когда заданий не останется")
+    parser.add_argument('--verbose', action='store_true', help="Не скрывать вывод анализа")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    # Схема создается до запуска обработчиков, чтобы они не создавали ее одновременно
+    open_store(args.store).close()
+    workers = args.workers or os.cpu_count() or 1
+    # Вывод хода анализа от параллельных обработчиков только перемешивался бы
+    worker_options = {"visibility_timeout": args.visibility_timeout, "poll_interval": args.poll_interval,
+                      "retry_delay": args.retry_delay,
+                      "validator_factory": partial(DocxValidator, verbose=args.verbose)}
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    processes = [multiprocessing.Process(target=_run_worker,
+                                         args=(args.store, f"{prefix}/{number}", worker_options, args.until_empty))
+                 for number in range(1, workers + 1)]
+    print(f"Обработчиков очереди {args.store}: {workers}", file=sys.stderr)
+    # Обработчики сами возвращают прерванные задания в очередь; родитель только ждет их
+    signal.signal(signal.SIGTERM, lambda signum, frame: [process.terminate() for process in processes])
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        while True:
+            try:
+                process.join()
+                break
+            except KeyboardInterrupt:
+                # Ctrl+C получают и обработчики: ждем, пока они вернут задания в очередь
+                continue
+
+    store = open_store(args.store)
+    counts = store.counts()
+    store.close()
+    print(f"Обработчики завершены за {time.perf_counter() - start:.2f} с; задания: "
+          f"{', '.join(f'{status} {count}' for status, count in counts.items())}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,26 @@
 """
 Главный модуль валидатора документов с обновленными требованиями
 """
-from typing import Dict
+import gc
+import mmap
+import os
+from difflib import SequenceMatcher
+from itertools import chain, islice
+from typing import Callable, Dict, List, Optional, Tuple
 from utils.document_loader import DocumentLoader
+from utils.document_source import DocumentSource, open_document_buffer
+from utils.cache import DEFAULT_CACHE_DIR, DiskCache, hash_bytes
+from utils.cancellation import CancellationToken
+from utils.memory import get_rss_mb, get_peak_rss_mb
+from utils.pipeline import Pipeline
+from utils.sampling import choose_sample, wilson_interval
 from ai.classifier import AIClassifier, read_api_key_from_reference
+from config.analysis_profiles import DEFAULT_PROFILE, check_profile_modes, get_analysis_profile
 from validators.formatting_validator import FormattingValidator
 from validators.content_validator import ContentValidator
+from validators.rule_plan import get_rule_plan
+from validators.rule_profiler import RuleProfiler, get_profiler
+from validators.journal_registry import AUTO_JOURNAL, get_journal_registry
 from reports.report_generator import ReportGenerator
 
 
@@ -13,50 +28,251 @@ api_key = read_api_key_from_reference("C:/Users/Nikita/PycharmProjects/diplom3/r
 class DocxValidator:
     """Основной класс валидатора документов"""
 
-    def __init__(self):
-        """Инициализация компонентов"""
+    # Класс абзацев, проверяемых выборочно в режиме выборки
+    SAMPLED_CLASS = 'основной_текст'
+    # Титульная часть заканчивается после стольких абзацев основного текста подряд
+    FRONT_MATTER_BODY_RUN = 3
+    # Наибольшая длина титульной части, проверяемой полностью
+    FRONT_MATTER_LIMIT = 60
+
+    # Версия формата сохраняемых результатов: увеличивается при изменении анализа,
+    # которое меняет результаты без изменения критериев и классификатора
+    RESULTS_VERSION = 1
+    # Результаты проверки целых документов по хэшу содержимого и настроек анализа
+    result_cache = DiskCache(os.path.join(DEFAULT_CACHE_DIR, 'results'),
+                             max_size_bytes=256 * 1024 * 1024, ttl=30 * 24 * 3600)
+
+    def __init__(self, verbose: bool = True):
+        """Инициализация компонентов
+
+        Args:
+            verbose: Выводить ход анализа в stdout; сервисы и пакетная проверка
+                создают валидатор с verbose=False, чтобы вывод параллельных
+                заданий не перемешивался
+        """
+        self.verbose = verbose
         self.document_loader = DocumentLoader()
         self.ai_classifier = AIClassifier(api_key=api_key)
         self.formatting_validator = FormattingValidator()
         self.content_validator = ContentValidator()
         self.report_generator = ReportGenerator()
+        # Счетчики повторного использования проверок форматирования текущего документа
+        self._formatting_memo_stats = None
+        # Снимок скомпилированных критериев, действующий на весь анализ текущего документа
+        self._rule_plan = None
+        # Признак отмены текущего анализа
+        self._cancel_token = CancellationToken()
+        # Профиль текущего анализа
+        self._profile = get_analysis_profile(DEFAULT_PROFILE)
+        # Профили журналов компилируются один раз на процесс
+        self.journal_registry = get_journal_registry()
 
+    def analyze_document(self, source: DocumentSource, streaming: bool = False,
+                         window_size: int = 200, memory_limit_mb: Optional[float] = None,
+                         previous_results: Optional[Dict] = None, journal: Optional[str] = None,
+                         sample_size: Optional[int] = None, sample_strategy: str = 'stratified',
+                         sample_seed: Optional[int] = None, confidence: float = 0.95,
+                         pipelined: bool = False, queue_size: int = 16,
+                         on_paragraph: Optional[Callable[[Dict], None]] = None,
+                         cancel_token: Optional[CancellationToken] = None,
+                         time_budget: Optional[float] = None, profile: str = DEFAULT_PROFILE,
+                         use_result_cache: bool = False) -> Dict:
+        """Анализ документа в режиме, выбранном параметрами
 
-    def analyze_document(self, file_path: str) -> Dict:
-        """Полный анализ документа"""
-        # Сброс состояния классификатора для нового документа
-        self.ai_classifier.reset_state()
-        print("Загрузка и анализ структуры документа...")
+        Общая точка входа для параметров из запроса (сервис, пакетная проверка,
+        наблюдение за каталогами, очередь заданий): режим выбирается одним из
+        параметров streaming, pipelined, sample_size, previous_results, а анализ
+        выполняет соответствующий метод - analyze_streaming, analyze_pipelined,
+        analyze_sampled, analyze_incremental или analyze_full (режим не задан).
+        Параметры режимов описаны у этих методов. Режимы взаимоисключающие:
+        при нескольких режимах сразу, как и при профиле, несовместимом с режимом,
+        выбрасывается ValueError.
+        """
+        check_profile_modes(get_analysis_profile(profile), streaming=streaming, pipelined=pipelined,
+                            sample_size=sample_size, previous_results=previous_results)
+        common = {"journal": journal, "profile": profile, "cancel_token": cancel_token, "time_budget": time_budget}
 
-        # Загрузка документа
-        document_info = self.document_loader.load_document_with_formatting(file_path)
-        paragraphs_info = document_info.get('paragraphs', [])
+        if streaming:
+            return self.analyze_streaming(source, window_size, memory_limit_mb,
+                                          use_result_cache=use_result_cache, **common)
+        if pipelined:
+            return self.analyze_pipelined(source, queue_size, on_paragraph,
+                                          use_result_cache=use_result_cache, **common)
+        if sample_size is not None:
+            return self.analyze_sampled(source, sample_size, sample_strategy, sample_seed, confidence, **common)
+        if previous_results is not None:
+            return self.analyze_incremental(source, previous_results, **common)
+        return self.analyze_full(source, use_result_cache=use_result_cache, **common)
 
-        # Проверка общих свойств документа
-        document_errors = self.formatting_validator.validate_document_properties(document_info)
+    def analyze_full(self, source: DocumentSource, journal: Optional[str] = None,
+                     profile: str = DEFAULT_PROFILE, cancel_token: Optional[CancellationToken] = None,
+                     time_budget: Optional[float] = None, use_result_cache: bool = False) -> Dict:
+        """Полный анализ документа: загрузка всего документа, затем проверка абзацев по порядку
 
-        # Вывод результатов проверки документа
-        self.report_generator.print_document_validation(document_errors)
+        Args:
+            source: Путь к файлу, байты, файловый объект или mmap с содержимым .docx
+            journal: Профиль критериев журнала: имя профиля, 'auto' - выбор по шаблону
+                и стилям документа, None - текущие критерии из настроек
+            profile: Профиль анализа (config.analysis_profiles): 'fast' - только правила,
+                без ИИ и отладочных сведений; 'standard'; 'thorough' - дополнительно
+                таблицы, колонтитулы, сноски и перекрестные проверки; 'thorough'
+                работает только в полном режиме - в остальных выбрасывается ValueError
+            cancel_token: Признак отмены анализа из другого потока
+            time_budget: Ограничение времени анализа документа, с
+            use_result_cache: Брать результаты из кэша, если документ с тем же
+                содержимым уже проверялся с теми же критериями, настройками
+                классификатора, профилем, режимом и его параметрами; признак
+                попадания - summary["result_cache"]. По умолчанию выключено; включают
+                пакетная проверка, сервис, наблюдение за каталогами и очередь заданий
 
-        # Инициализация результатов
-        results = {
-            "paragraphs": [],
-            "document_errors": document_errors,
-            "summary": {
-                "total_paragraphs": len(paragraphs_info),
-                "total_errors": 0,
-                "formatting_errors": 0,
-                "content_errors": 0,
-                "document_errors": len(document_errors),
-                "classes_found": set()
-            }
-        }
+        При отмене или истечении времени возвращаются частичные результаты:
+        необработанные абзацы помечаются "unprocessed", причина остановки
+        записывается в summary["cancellation"]. Так же ведут себя остальные режимы.
+        """
+        self._begin(profile, cancel_token, time_budget)
+        return self._with_result_cache(source, journal, self._analysis_mode(False, False), use_result_cache,
+                                       lambda source: self._analyze_full(source, journal))
+
+    def analyze_streaming(self, source: DocumentSource, window_size: int = 200,
+                          memory_limit_mb: Optional[float] = None, journal: Optional[str] = None,
+                          profile: str = DEFAULT_PROFILE, cancel_token: Optional[CancellationToken] = None,
+                          time_budget: Optional[float] = None, use_result_cache: bool = False) -> Dict:
+        """Анализ в режиме ограниченной памяти: абзацы загружаются, классифицируются
+        и проверяются окнами, тяжелые данные абзаца удаляются после проверки
+
+        Args:
+            window_size: Размер окна абзацев
+            memory_limit_mb: Порог резидентной памяти, при превышении которого окно уменьшается
 
-        print("\nНачинаю анализ абзацев...")
-        print("=" * 70)
+        Остальные параметры - как у analyze_full.
+        """
+        self._begin(profile, cancel_token, time_budget, streaming=True)
+        mode = self._analysis_mode(True, False, window_size, memory_limit_mb)
+        return self._with_result_cache(source, journal, mode, use_result_cache,
+                                       lambda source: self._analyze_streaming(source, window_size,
+                                                                              memory_limit_mb, journal))
+
+    def analyze_pipelined(self, source: DocumentSource, queue_size: int = 16,
+                          on_paragraph: Optional[Callable[[Dict], None]] = None, journal: Optional[str] = None,
+                          profile: str = DEFAULT_PROFILE, cancel_token: Optional[CancellationToken] = None,
+                          time_budget: Optional[float] = None, use_result_cache: bool = False) -> Dict:
+        """Конвейерный анализ: извлечение форматирования, классификация и проверка
+        абзацев выполняются одновременно в отдельных потоках
+
+        Args:
+            queue_size: Размер очередей между стадиями конвейера
+            on_paragraph: Вызывается с результатом каждого абзаца сразу после его
+                проверки (при попадании в кэш результатов - для всех абзацев из кэша)
+
+        Остальные параметры - как у analyze_full.
+        """
+        self._begin(profile, cancel_token, time_budget, pipelined=True)
+        mode = self._analysis_mode(False, True, queue_size=queue_size)
+        return self._with_result_cache(source, journal, mode, use_result_cache,
+                                       lambda source: self._analyze_pipelined(source, queue_size,
+                                                                              on_paragraph, journal),
+                                       on_paragraph)
+
+    def analyze_sampled(self, source: DocumentSource, sample_size: int, strategy: str = 'stratified',
+                        seed: Optional[int] = None, confidence: float = 0.95, journal: Optional[str] = None,
+                        profile: str = DEFAULT_PROFILE, cancel_token: Optional[CancellationToken] = None,
+                        time_budget: Optional[float] = None) -> Dict:
+        """Выборочный анализ: титульная часть проверяется полностью, из абзацев основного
+        текста проверяется выборка, доли нарушений оцениваются с доверительными интервалами
+
+        Args:
+            sample_size: Размер выборки абзацев основного текста
+            strategy: Способ выборки: 'stratified' (равномерно по документу) или 'random'
+            seed: Начальное значение генератора для воспроизводимой выборки
+            confidence: Уровень доверия интервальных оценок
+
+        Остальные параметры - как у analyze_full; кэш результатов не используется.
+        """
+        self._begin(profile, cancel_token, time_budget, sample_size=sample_size)
+        return self._analyze_sampled(source, sample_size, strategy, seed, confidence, journal)
+
+    def analyze_incremental(self, source: DocumentSource, previous_results: Dict, journal: Optional[str] = None,
+                            profile: str = DEFAULT_PROFILE, cancel_token: Optional[CancellationToken] = None,
+                            time_budget: Optional[float] = None) -> Dict:
+        """Повторный анализ исправленного документа: проверяются заново только
+        измененные абзацы и зависящий от них контекст
+
+        Args:
+            previous_results: Результаты анализа предыдущей версии документа. Хэши
+                абзацев для сопоставления есть только в результатах этого режима:
+                первую версию документа проверяют с previous_results={}
+
+        Остальные параметры - как у analyze_full; кэш результатов не используется.
+        """
+        self._begin(profile, cancel_token, time_budget, previous_results=previous_results)
+        return self._analyze_incremental(source, previous_results, journal)
+
+    def _begin(self, profile: str, cancel_token: Optional[CancellationToken],
+               time_budget: Optional[float], **mode):
+        """Профиль и признак отмены анализа очередного документа"""
+        analysis_profile = get_analysis_profile(profile)
+        check_profile_modes(analysis_profile, **mode)
+        self._profile = analysis_profile
+        # Бюджет времени документа задается дочернему признаку: признак вызывающего
+        # кода (общий для нескольких документов) не изменяется
+        if cancel_token is not None:
+            self._cancel_token = cancel_token.child(time_budget)
+        else:
+            self._cancel_token = CancellationToken(time_budget)
+
+    def _with_result_cache(self, source: DocumentSource, journal: Optional[str], mode: str,
+                           use_result_cache: bool, analyze: Callable[[DocumentSource], Dict],
+                           on_paragraph: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Анализ с кэшем результатов: тот же документ с теми же критериями и
+        настройками уже проверялся - результаты берутся из кэша"""
+        cache_key = None
+        if use_result_cache:
+            source, cache_key = self._result_cache_lookup(source, journal, mode)
+            cached = self.result_cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                self._print("Документ не изменился с прошлой проверки: результаты из кэша")
+                cached["summary"]["result_cache"] = "hit"
+                if on_paragraph is not None:
+                    # Получатель результатов видит абзацы так же, как при анализе
+                    for paragraph_result in cached["paragraphs"]:
+                        on_paragraph(paragraph_result)
+                return cached
+
+        results = analyze(source)
+
+        # Частичные результаты остановленного анализа не сохраняются
+        if cache_key is not None and "cancellation" not in results["summary"]:
+            self.result_cache.put(cache_key, results)
+            results["summary"]["result_cache"] = "miss"
+        return results
+
+    def _analyze_full(self, source: DocumentSource, journal: Optional[str]) -> Dict:
+        """Полный анализ: загрузка всего документа, затем проверка абзацев по порядку"""
+        # Сброс состояния классификатора для нового документа
+        self.ai_classifier.reset_state(cancel_token=self._cancel_token, use_ai=self._profile.use_ai)
+        self._print("Загрузка и анализ структуры документа...")
+
+        # Загрузка документа
+        document_info = self.document_loader.load_document_with_formatting(
+            source, parts=self._profile.parts, cancel_token=self._cancel_token,
+            include_debug=self._profile.include_debug
+        )
+        # Классифицируются и проверяются абзацы основного текста; остальные части
+        # документа участвуют только в перекрестных проверках
+        paragraphs_info = [para for para in document_info.get('paragraphs', []) if para.get('part', 'body') == 'body']
+        part_paragraphs = [para for para in document_info.get('paragraphs', []) if para.get('part', 'body') != 'body']
+
+        results = self._start_results(document_info, len(paragraphs_info), journal)
+
+        self._print("\nНачинаю анализ абзацев...")
+        self._print("=" * 70)
 
         # Анализ каждого абзаца
         for i, para_info in enumerate(paragraphs_info, 1):
+            if self._cancel_token.is_stopped() or para_info.get('unprocessed'):
+                self._mark_unprocessed(results, ((index, para['text'], para.get('para_hash'))
+                                                 for index, para in enumerate(paragraphs_info[i - 1:], i)))
+                break
             paragraph_result = self._analyze_paragraph(i, para_info)
 
             # Сохранение результатов
@@ -76,28 +292,462 @@ class DocxValidator:
              #       paragraph_result["content_errors"]
               #  )
 
-        results["summary"]["classes_found"] = list(results["summary"]["classes_found"])
+        if self._profile.cross_checks and not self._cancel_token.is_stopped():
+            self._cross_check(results, paragraphs_info, part_paragraphs)
+        self._finish_summary(results["summary"])
+        return results
+
+    def _start_results(self, document_info: Dict, total_paragraphs: int, journal: Optional[str] = None,
+                       check_document: bool = True) -> Dict:
+        """Проверка общих свойств документа и инициализация результатов
+
+        check_document=False - свойства документа еще не известны и проверяются
+        позже через _check_document (потоковый режим).
+        """
+        # Критерии фиксируются на весь документ: замена критериев во время анализа
+        # (окно настроек, перезагрузка файла) подействует только на следующий документ
+        self._rule_plan = self._select_rule_plan(document_info, journal)
+        self._formatting_memo_stats = {"hits": 0, "misses": 0}
+
+        # Инициализация результатов
+        results = {
+            "paragraphs": [],
+            "document_errors": [],
+            "template_fingerprint": document_info.get('template_fingerprint'),
+            "journal": self._rule_plan.name,
+            "profile": self._profile.name,
+            "criteria_version": self._rule_plan.version,
+            "criteria_fingerprint": self._rule_plan.fingerprint,
+            "summary": {
+                "total_paragraphs": total_paragraphs,
+                "total_errors": 0,
+                "formatting_errors": 0,
+                "content_errors": 0,
+                "document_errors": 0,
+                "classes_found": set(),
+                "template_cache": document_info.get('template_cache', {}),
+                "formatting_memo": self._formatting_memo_stats,
+                # Число ошибок по кодам (ErrorCode.name), включая ошибки документа
+                "error_codes": {}
+            }
+        }
+        if check_document:
+            self._check_document(results, document_info)
         return results
 
+    def _check_document(self, results: Dict, document_info: Dict):
+        """Проверка общих свойств документа по плану проверки результатов"""
+        document_errors = self.formatting_validator.validate_document_properties(document_info, self._rule_plan)
+
+        # Вывод результатов проверки документа
+        if self.verbose:
+            self.report_generator.print_document_validation(document_errors)
+
+        results["document_errors"].extend(document_errors)
+        results["summary"]["document_errors"] += len(document_errors)
+        self._count_codes(results["summary"]["error_codes"], document_errors)
+
+    def _select_rule_plan(self, document_info: Dict, journal: Optional[str]):
+        """План проверки документа: текущие критерии или профиль журнала"""
+        if journal is None:
+            return get_rule_plan()
+        if journal == AUTO_JOURNAL:
+            journal = self.journal_registry.select(document_info)
+        return self.journal_registry.get_plan(journal)
+
+    @staticmethod
+    def _analysis_mode(streaming: bool, pipelined: bool, window_size: int = 200,
+                       memory_limit_mb: Optional[float] = None, queue_size: int = 16) -> str:
+        """Режим анализа с его параметрами: от них зависят сводки в результатах"""
+        if streaming:
+            return f"streaming:{window_size}:{memory_limit_mb}"
+        return f"pipelined:{queue_size}" if pipelined else 'full'
+
+    def _criteria_key(self, journal: Optional[str]) -> Optional[str]:
+        """Хэши критериев, по которым может проверяться документ (None - у критериев нет хэша)"""
+        if journal is None:
+            plans = [get_rule_plan()]
+        elif journal == AUTO_JOURNAL:
+            # Профиль выбирается по самому документу, поэтому значимы все профили реестра
+            plans = [self.journal_registry.get_plan(name) for name in self.journal_registry.names()]
+        else:
+            plans = [self.journal_registry.get_plan(journal)]
+        if any(plan.fingerprint is None for plan in plans):
+            return None
+        return ','.join(f"{plan.name}={plan.fingerprint}" for plan in plans)
+
+    def result_cache_key(self, content_hash: str, journal: Optional[str] = None,
+                         profile: str = DEFAULT_PROFILE, mode: str = 'full') -> Optional[str]:
+        """Ключ кэша результатов: SHA-256 содержимого, хэш критериев, модель и версия
+        запроса классификатора, профиль и режим анализа (None - результат не кэшируется)"""
+        criteria_key = self._criteria_key(journal)
+        if criteria_key is None:
+            return None
+        analysis_profile = get_analysis_profile(profile)
+        parts = (str(self.RESULTS_VERSION), content_hash, criteria_key,
+                 self.ai_classifier.config_key(analysis_profile.use_ai), analysis_profile.name, mode)
+        return hash_bytes('|'.join(parts).encode('utf-8'))
+
+    def _result_cache_lookup(self, source: DocumentSource, journal: Optional[str],
+                             mode: str) -> Tuple[DocumentSource, Optional[str]]:
+        """Ключ кэша результатов для документа; прочитанный файловый объект заменяется его байтами"""
+        with open_document_buffer(source) as buffer:
+            content_hash = hash_bytes(buffer)
+            if hasattr(source, 'read') and not hasattr(source, 'getbuffer') and not isinstance(source, mmap.mmap):
+                source = bytes(buffer)
+        return source, self.result_cache_key(content_hash, journal, self._profile.name, mode)
+
+    def cached_results(self, source: DocumentSource, journal: Optional[str] = None,
+                       profile: str = DEFAULT_PROFILE, streaming: bool = False, pipelined: bool = False,
+                       window_size: int = 200, memory_limit_mb: Optional[float] = None,
+                       queue_size: int = 16) -> Optional[Dict]:
+        """Сохраненные результаты проверки документа без анализа (None - документ не проверялся)"""
+        with open_document_buffer(source) as buffer:
+            key = self.result_cache_key(hash_bytes(buffer), journal, profile,
+                                        self._analysis_mode(streaming, pipelined, window_size,
+                                                            memory_limit_mb, queue_size))
+        results = self.result_cache.get(key) if key is not None else None
+        if results is not None:
+            results["summary"]["result_cache"] = "hit"
+        return results
+
+    def _analyze_streaming(self, source: DocumentSource, window_size: int,
+                           memory_limit_mb: Optional[float], journal: Optional[str] = None) -> Dict:
+        """Анализ документа окнами абзацев с ограничением памяти"""
+        # Контекстным правилам классификатора достаточно нескольких последних абзацев
+        self.ai_classifier.reset_state(max_history=8, cancel_token=self._cancel_token,
+                                       use_ai=self._profile.use_ai)
+        self._print("Загрузка и анализ структуры документа (потоковый режим)...")
+
+        # XML основного текста читается потоком, форматирование извлекается
+        # по одному абзацу, по мере проверки. Свойства раздела и число страниц
+        # известны только после обхода всех абзацев, поэтому документ проверяется в конце
+        document_info, paragraphs = self.document_loader.stream_document_body(source)
+        results = self._start_results(document_info, 0, journal, check_document=False)
+        summary = results["summary"]
+        window_size = max(1, window_size)
+        memory_limit_exceeded = False
+
+        self._print("\nНачинаю анализ абзацев...")
+        self._print("=" * 70)
+
+        index = 0
+        while True:
+            window = list(islice(paragraphs, window_size))
+            if not window:
+                break
+
+            if self._cancel_token.is_stopped():
+                remaining = enumerate(chain(window, paragraphs), index + 1)
+                self._mark_unprocessed(results, ((position, para.text, None) for position, (_, para) in remaining))
+                index = len(results["paragraphs"])
+                break
+
+            for doc_index, para in window:
+                index += 1
+                para_info = self.document_loader.extract_paragraph(para, doc_index, document_info,
+                                                                   include_debug=False)
+                paragraph_result = self._analyze_paragraph(index, para_info)
+                results["paragraphs"].append(paragraph_result)
+                self._update_summary(summary, paragraph_result)
+
+            # Сведения о runs и форматировании больше не нужны - сохраняем только итоги
+            del window
+
+            if memory_limit_mb is not None:
+                rss = get_rss_mb()
+                if rss is not None and rss > memory_limit_mb:
+                    gc.collect()
+                    if window_size > 1:
+                        window_size = max(1, window_size // 2)
+                    else:
+                        memory_limit_exceeded = True
+
+        self._check_document(results, document_info)
+        summary["total_paragraphs"] = index
+        self._finish_summary(summary)
+        summary["streaming"] = {
+            "window_size": window_size,
+            "memory_limit_mb": memory_limit_mb,
+            "memory_limit_exceeded": memory_limit_exceeded,
+            "peak_rss_mb": get_peak_rss_mb()
+        }
+        return results
+
+    def _analyze_pipelined(self, source: DocumentSource, queue_size: int,
+                           on_paragraph: Optional[Callable[[Dict], None]],
+                           journal: Optional[str] = None) -> Dict:
+        """Конвейерный анализ: загрузка -> извлечение форматирования -> классификация ->
+        проверка -> получатель результатов
+
+        Стадии работают в отдельных потоках и связаны ограниченными очередями, поэтому
+        запрос к ИИ-модели для одного абзаца идет, пока следующие абзацы еще разбираются,
+        а результаты первых абзацев доступны до окончания разбора документа.
+        Классификация остается последовательной: класс абзаца зависит от предыдущих.
+        """
+        self.ai_classifier.reset_state(cancel_token=self._cancel_token, use_ai=self._profile.use_ai)
+        self._print("Загрузка и анализ структуры документа (конвейерный режим)...")
+
+        document_info, paragraphs = self.document_loader.iter_document_body(source)
+        results = self._start_results(document_info, 0, journal)
+        summary = results["summary"]
+
+        # После отмены стадии пропускают оставшиеся абзацы без обработки, и конвейер
+        # быстро опустошается, сохраняя порядок абзацев
+        def extract(item):
+            index, (doc_index, para) = item
+            if self._cancel_token.is_stopped():
+                return index, {'text': para.text, 'unprocessed': True}
+            return index, self.document_loader.extract_paragraph(para, doc_index, document_info,
+                                                                 self._profile.include_debug)
+
+        def classify(item):
+            index, para_info = item
+            if para_info.get('unprocessed') or self._cancel_token.is_stopped():
+                return index, para_info, None, None
+            return (index, para_info) + self._classify_paragraph(index, para_info)
+
+        def validate(item):
+            index, para_info, classified_class, state = item
+            if classified_class is None:
+                return self._unprocessed_result(index, para_info['text'], para_info.get('para_hash'))
+            return self._validate_paragraph(*item)
+
+        pipeline = Pipeline([("extract", extract), ("classify", classify), ("validate", validate)], queue_size)
+
+        self._print("\nНачинаю анализ абзацев...")
+        self._print("=" * 70)
+
+        for paragraph_result in pipeline.run(enumerate(paragraphs, 1)):
+            results["paragraphs"].append(paragraph_result)
+            if paragraph_result.get("unprocessed"):
+                summary["unprocessed_paragraphs"] = summary.get("unprocessed_paragraphs", 0) + 1
+                continue
+            self._update_summary(summary, paragraph_result)
+            if on_paragraph is not None:
+                on_paragraph(paragraph_result)
+
+        summary["total_paragraphs"] = len(results["paragraphs"])
+        self._finish_summary(summary)
+        summary["pipeline"] = pipeline.stats()
+        return results
+
+    def _analyze_incremental(self, source: DocumentSource, previous_results: Dict,
+                             journal: Optional[str] = None) -> Dict:
+        """Повторный анализ исправленного документа по разнице абзацев
+
+        Абзацы сопоставляются с предыдущим запуском по хэшу содержимого и порядку,
+        поэтому вставки и удаления не сбивают сопоставление. Результат абзаца
+        переиспользуется, если он не изменился и контекст классификатора перед
+        ним (флаги, последние абзацы, позиция) совпадает с предыдущим запуском.
+        """
+        self.ai_classifier.reset_state(cancel_token=self._cancel_token, use_ai=self._profile.use_ai)
+        self._print("Загрузка и сравнение с предыдущей версией документа...")
+
+        document_info, entries = self.document_loader.open_document_paragraphs(source)
+        results = self._start_results(document_info, len(entries), journal)
+        summary = results["summary"]
+
+        old_paragraphs = previous_results.get("paragraphs", [])
+        new_hashes = [para_hash for _, para_hash, _ in entries]
+
+        # При смене шаблона стилей или критериев могли измениться результаты всех абзацев
+        mapping = {}
+        if (previous_results.get("template_fingerprint") == results["template_fingerprint"]
+                and self._same_criteria(previous_results, results)):
+            old_hashes = [para.get("para_hash") for para in old_paragraphs]
+            matcher = SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+            for block in matcher.get_matching_blocks():
+                for offset in range(block.size):
+                    mapping[block.b + offset] = block.a + offset
+
+        history = self.ai_classifier.CONTEXT_HISTORY
+        reused = 0
+
+        for position, (doc_index, para_hash, para) in enumerate(entries):
+            index = position + 1
+            if self._cancel_token.is_stopped():
+                self._mark_unprocessed(results, ((number, para.text, para_hash) for number, (_, para_hash, para)
+                                                 in enumerate(entries[position:], index)))
+                break
+
+            old_position = mapping.get(position)
+            old_result = old_paragraphs[old_position] if old_position is not None else None
+
+            if old_result is not None and not old_result.get("unprocessed") and self._can_reuse(position, old_position, old_paragraphs, mapping, history):
+                paragraph_result = dict(
+                    old_result,
+                    index=index,
+                    formatting_errors=[error.with_index(index) for error in old_result["formatting_errors"]],
+                    content_errors=[error.with_index(index) for error in old_result["content_errors"]]
+                )
+                self.ai_classifier.restore_context(old_result["state"], index, para.text)
+                reused += 1
+            else:
+                para_info = self.document_loader.extract_paragraph(para, doc_index, document_info,
+                                                                   self._profile.include_debug)
+                para_info['para_hash'] = para_hash
+                paragraph_result = self._analyze_paragraph(index, para_info)
+
+            results["paragraphs"].append(paragraph_result)
+            self._update_summary(summary, paragraph_result)
+
+        self._finish_summary(summary)
+        summary["incremental"] = {
+            "reused_paragraphs": reused,
+            "reanalyzed_paragraphs": len(entries) - reused - summary.get("unprocessed_paragraphs", 0),
+            "skipped_ratio": round(reused / len(entries), 3) if entries else 0.0
+        }
+        return results
+
+    def _analyze_sampled(self, source: DocumentSource, sample_size: int, strategy: str,
+                         seed: Optional[int], confidence: float, journal: Optional[str] = None) -> Dict:
+        """Выборочный анализ: полная проверка титульной части и выборки основного текста
+
+        Форматирование извлекается и абзацы классифицируются только для титульной
+        части и выбранных абзацев, поэтому время проверки почти не зависит от
+        длины документа.
+        """
+        self.ai_classifier.reset_state(cancel_token=self._cancel_token, use_ai=self._profile.use_ai)
+        self._print("Загрузка и анализ структуры документа (выборочная проверка)...")
+
+        document_info, entries = self.document_loader.open_document_body(source)
+        results = self._start_results(document_info, len(entries), journal)
+        summary = results["summary"]
+
+        # Титульная часть: до нескольких абзацев основного текста подряд
+        position = 0
+        body_run = 0
+        front_matter_limit = min(len(entries), self.FRONT_MATTER_LIMIT)
+        while position < front_matter_limit and body_run < self.FRONT_MATTER_BODY_RUN:
+            if self._cancel_token.is_stopped():
+                break
+            doc_index, para = entries[position]
+            position += 1
+            para_info = self.document_loader.extract_paragraph(para, doc_index, document_info, include_debug=False)
+            paragraph_result = self._analyze_paragraph(position, para_info)
+            results["paragraphs"].append(paragraph_result)
+            self._update_summary(summary, paragraph_result)
+            body_run = body_run + 1 if paragraph_result["classified_as"] == self.SAMPLED_CLASS else 0
+        front_matter = position
+
+        # Выборка из оставшихся абзацев
+        population = len(entries) - front_matter
+        sample = choose_sample(population, sample_size, strategy, seed)
+        body_sampled = 0
+        any_violations = 0
+        code_violations = {}
+        for count, offset in enumerate(sample):
+            if self._cancel_token.is_stopped():
+                remaining = [front_matter + offset for offset in sample[count:]]
+                self._mark_unprocessed(results, ((position + 1, entries[position][1].text, None)
+                                                 for position in remaining), sampled=True)
+                break
+            position = front_matter + offset
+            doc_index, para = entries[position]
+            para_info = self.document_loader.extract_paragraph(para, doc_index, document_info, include_debug=False)
+            paragraph_result = self._analyze_paragraph(position + 1, para_info)
+            paragraph_result["sampled"] = True
+            results["paragraphs"].append(paragraph_result)
+            self._update_summary(summary, paragraph_result)
+
+            if paragraph_result["classified_as"] != self.SAMPLED_CLASS:
+                continue
+            body_sampled += 1
+            codes = {error.code.name for error in
+                     paragraph_result["formatting_errors"] + paragraph_result["content_errors"]}
+            if codes:
+                any_violations += 1
+            for code in codes:
+                code_violations[code] = code_violations.get(code, 0) + 1
+
+        # Оценка числа абзацев основного текста среди непроверенных
+        body_population = round(population * body_sampled / len(sample)) if sample else 0
+
+        def estimate(violations: int) -> Dict:
+            low, high = wilson_interval(violations, body_sampled, confidence, body_population)
+            return {
+                "violations": violations,
+                "rate": round(violations / body_sampled, 4) if body_sampled else 0.0,
+                "ci_low": round(low, 4),
+                "ci_high": round(high, 4)
+            }
+
+        self._finish_summary(summary)
+        summary["sampling"] = {
+            "strategy": strategy,
+            "seed": seed,
+            "confidence": confidence,
+            "front_matter_paragraphs": front_matter,
+            "population": population,
+            "sample_size": len(sample),
+            "sampled_body_paragraphs": body_sampled,
+            "estimated_body_paragraphs": body_population,
+            "any_error": estimate(any_violations),
+            "estimates": {code: estimate(count) for code, count in
+                          sorted(code_violations.items(), key=lambda item: -item[1])}
+        }
+        return results
+
+    @staticmethod
+    def _same_criteria(previous_results: Dict, results: Dict) -> bool:
+        """Проверялись ли оба результата одними и теми же критериями"""
+        fingerprint = results.get("criteria_fingerprint")
+        if fingerprint is not None and previous_results.get("criteria_fingerprint") is not None:
+            return previous_results["criteria_fingerprint"] == fingerprint
+        return previous_results.get("criteria_version") == results.get("criteria_version")
+
+    def _can_reuse(self, position: int, old_position: int, old_paragraphs: list,
+                   mapping: Dict, history: int) -> bool:
+        """Совпадает ли контекст классификации абзаца с предыдущим запуском"""
+        old_result = old_paragraphs[old_position]
+        if "state" not in old_result:
+            return False
+
+        if not self.ai_classifier.is_position_compatible(old_position + 1, position + 1):
+            return False
+
+        # Флаги классификатора перед абзацем
+        old_state_before = old_paragraphs[old_position - 1].get("state") if old_position > 0 else 0
+        if self.ai_classifier.get_context_signature() != old_state_before:
+            return False
+
+        # Последние абзацы истории должны быть теми же самыми
+        depth = min(history, old_position)
+        if min(history, position) != depth:
+            return False
+        return all(mapping.get(position - back) == old_position - back for back in range(1, depth + 1))
+
     def _analyze_paragraph(self, index: int, para_info: Dict) -> Dict:
         """Анализ отдельного абзаца"""
-        text = para_info['text']
+        classified_class, state = self._classify_paragraph(index, para_info)
+        return self._validate_paragraph(index, para_info, classified_class, state)
 
-        # Шаг 1: Классификация
+    def _classify_paragraph(self, index: int, para_info: Dict) -> Tuple[str, int]:
+        """Классификация абзаца: класс и сигнатура контекста классификатора после него"""
         classified_class = self.ai_classifier.classify_paragraph(
-            text,
+            para_info['text'],
             paragraph_index=index,
             formatting_info=para_info
         )
+        return classified_class, self.ai_classifier.get_context_signature()
 
-        # Шаг 2: Проверка форматирования
-        formatting_errors = self.formatting_validator.validate_formatting(para_info, classified_class)
+    def _validate_paragraph(self, index: int, para_info: Dict, classified_class: str, state: int) -> Dict:
+        """Проверка абзаца известного класса"""
+        text = para_info['text']
+
+        # Проверка форматирования
+        formatting_errors = self.formatting_validator.validate_formatting(para_info, classified_class,
+                                                                    self._formatting_memo_stats,
+                                                                    self._rule_plan, index)
 
-        # Шаг 3: Проверка содержания
-        content_errors = self.content_validator.validate_content(text, classified_class)
+        # Проверка содержания
+        content_errors = self.content_validator.validate_content(text, classified_class, self._rule_plan, index)
 
         return {
             "index": index,
+            "para_hash": para_info.get('para_hash'),
+            "state": state,
             "text_preview": text[:100] + "..." if len(text) > 100 else text,
             "classified_as": classified_class,
             "formatting_errors": formatting_errors,
@@ -111,6 +761,105 @@ class DocxValidator:
         summary["total_errors"] += paragraph_result["total_errors"]
         summary["formatting_errors"] += len(paragraph_result["formatting_errors"])
         summary["content_errors"] += len(paragraph_result["content_errors"])
+        self._count_codes(summary["error_codes"], paragraph_result["formatting_errors"])
+        self._count_codes(summary["error_codes"], paragraph_result["content_errors"])
+
+    def _cross_check(self, results: Dict, paragraphs_info: List[Dict], part_paragraphs: List[Dict]):
+        """Перекрестные проверки документа; ошибки добавляются к ошибкам документа"""
+        classified = [(paragraph_result["classified_as"], para_info['text'])
+                      for paragraph_result, para_info in zip(results["paragraphs"], paragraphs_info)]
+        errors = self._rule_plan.document.cross_check(classified, part_paragraphs)
+        summary = results["summary"]
+        results["document_errors"].extend(errors)
+        summary["document_errors"] += len(errors)
+        summary["cross_check_errors"] = len(errors)
+        self._count_codes(summary["error_codes"], errors)
+
+    @staticmethod
+    def _unprocessed_result(index: int, text: str, para_hash: Optional[str] = None) -> Dict:
+        """Результат абзаца, не проверенного из-за отмены анализа"""
+        return {
+            "index": index,
+            "para_hash": para_hash,
+            "state": None,
+            "text_preview": text[:100] + "..." if len(text) > 100 else text,
+            "classified_as": None,
+            "formatting_errors": [],
+            "content_errors": [],
+            "total_errors": 0,
+            "unprocessed": True
+        }
+
+    def _mark_unprocessed(self, results: Dict, paragraphs, **extra):
+        """Добавление непроверенных абзацев (номер, текст, хэш) в результаты"""
+        summary = results["summary"]
+        for index, text, para_hash in paragraphs:
+            paragraph_result = self._unprocessed_result(index, text, para_hash)
+            paragraph_result.update(extra)
+            results["paragraphs"].append(paragraph_result)
+            summary["unprocessed_paragraphs"] = summary.get("unprocessed_paragraphs", 0) + 1
+
+    def _finish_summary(self, summary: Dict):
+        """Завершение статистики: список классов и причина остановки анализа"""
+        summary["classes_found"] = list(summary["classes_found"])
+        if summary.get("unprocessed_paragraphs"):
+            summary["cancellation"] = {
+                "reason": self._cancel_token.reason,
+                "unprocessed_paragraphs": summary.get("unprocessed_paragraphs", 0)
+            }
+
+    @staticmethod
+    def _count_codes(counters: Dict, errors) -> Dict:
+        """Добавление ошибок к счетчикам по кодам"""
+        for error in errors:
+            name = error.code.name
+            counters[name] = counters.get(name, 0) + 1
+        return counters
+
+    def check_compliance(self, source: DocumentSource, profiler: Optional[RuleProfiler] = None,
+                         journal: Optional[str] = None) -> Dict:
+        """Быстрая проверка соответствия документа с остановкой на первом нарушении
+
+        Проверки каждого класса выполняются в порядке измеренной стоимости
+        нахождения нарушения: дешевые и часто срабатывающие правила идут первыми.
+        Статистика берется из переданного или включенного профилировщика правил.
+        """
+        profiler = profiler or get_profiler() or RuleProfiler()
+        self.ai_classifier.reset_state()
+
+        document_info, paragraphs = self.document_loader.open_document_stream(source, include_debug=False)
+        plan = self._select_rule_plan(document_info, journal)
+        result = {"compliant": True, "violation": None, "checked_paragraphs": 0,
+                  "journal": plan.name, "criteria_version": plan.version}
+
+        document_errors = self.formatting_validator.validate_document_properties(document_info, plan)
+        if document_errors:
+            result["compliant"] = False
+            result["violation"] = {"index": None, "classified_as": None, "error": document_errors[0]}
+            return result
+
+        for index, para_info in enumerate(paragraphs, 1):
+            classified_class = self.ai_classifier.classify_paragraph(
+                para_info['text'],
+                paragraph_index=index,
+                formatting_info=para_info
+            )
+            result["checked_paragraphs"] = index
+            error = profiler.first_violation(classified_class, para_info,
+                                             plan.formatting.get(classified_class),
+                                             plan.content.get(classified_class),
+                                             index)
+            if error is not None:
+                result["compliant"] = False
+                result["violation"] = {"index": index, "classified_as": classified_class, "error": error}
+                break
+
+        return result
+
+    def _print(self, *args):
+        """Вывод хода анализа, если он включен (verbose)"""
+        if self.verbose:
+            print(*args)
 
     def generate_report(self, results: Dict):
         """Генерация итогового отчета"""
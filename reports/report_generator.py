@@ -2,12 +2,14 @@
 Генератор отчетов о проверке документов с расширенной информацией
 """
 from typing import Dict, List
+from utils.cancellation import TIME_BUDGET
+from validators.errors import ValidationError
 
 class ReportGenerator:
     """Генератор отчетов"""
 
     @staticmethod
-    def print_document_validation(document_errors: List[str]):
+    def print_document_validation(document_errors: List[ValidationError]):
         """Вывод ошибок документа"""
         if document_errors:
             print("\n🏗️  ОШИБКИ СТРУКТУРЫ ДОКУМЕНТА:")
@@ -30,7 +32,7 @@ class ReportGenerator:
             print("✓ Ошибок не найдено")
 
     @staticmethod
-    def print_paragraph_errors(formatting_errors: List[str], content_errors: List[str]):
+    def print_paragraph_errors(formatting_errors: List[ValidationError], content_errors: List[ValidationError]):
         """Вывод ошибок для абзаца"""
         for error in formatting_errors:
             print(f"  📐 Форматирование: {error}")
@@ -48,6 +50,14 @@ class ReportGenerator:
 
         # Общая статистика
         ReportGenerator._print_summary_stats(summary)
+        if results.get("journal"):
+            print(f"  • Профиль журнала: {results['journal']}")
+        if results.get("profile"):
+            print(f"  • Профиль анализа: {results['profile']}")
+        if results.get("criteria_version") is not None:
+            fingerprint = results.get("criteria_fingerprint") or ""
+            print(f"  • Версия критериев: {results['criteria_version']}"
+                  f"{f' ({fingerprint[:12]})' if fingerprint else ''}")
 
         # Ошибки документа
         if results.get("document_errors"):
@@ -77,8 +87,74 @@ class ReportGenerator:
         print(f"  • Ошибки содержания: {summary['content_errors']}")
         print(f"  • Ошибки структуры документа: {summary.get('document_errors', 0)}")
 
+        template_cache = summary.get('template_cache')
+        if template_cache:
+            sources = {'memory': 'память', 'disk': 'диск', 'document': 'документ из кэша'}
+            state = (f"попадание ({sources.get(template_cache['source'], template_cache['source'])})"
+                     if template_cache['hit'] else "промах")
+            totals = template_cache['process_totals']
+            hits = totals['memory_hits'] + totals['disk_hits']
+            total = hits + totals['misses']
+            print(f"  • Кэш шаблонов: {state}; всего за процесс {hits} попаданий из {total} "
+                  f"({totals['hit_rate'] * 100:.0f}%)")
+
+        formatting_memo = summary.get('formatting_memo')
+        if formatting_memo:
+            total = formatting_memo['hits'] + formatting_memo['misses']
+            if total:
+                print(f"  • Проверки форматирования из памяти: {formatting_memo['hits']} из {total} "
+                      f"({formatting_memo['hits'] / total * 100:.0f}%)")
+
+        streaming = summary.get('streaming')
+        if streaming and streaming.get('peak_rss_mb') is not None:
+            limit = streaming.get('memory_limit_mb')
+            limit_text = f" (порог {limit:.0f} МБ)" if limit else ""
+            print(f"  • Пиковая память процесса: {streaming['peak_rss_mb']:.1f} МБ{limit_text}")
+
+        cancellation = summary.get('cancellation')
+        if cancellation:
+            reason = "истекло время анализа" if cancellation['reason'] == TIME_BUDGET else "анализ отменен"
+            print(f"  • Анализ остановлен ({reason}): не проверено абзацев "
+                  f"{cancellation['unprocessed_paragraphs']} из {summary['total_paragraphs']}")
+
+        pipeline = summary.get('pipeline')
+        if pipeline and pipeline.get('time_to_first_result') is not None:
+            busy = ', '.join(f"{name} {seconds:.2f} с" for name, seconds in pipeline['stage_busy_time'].items())
+            print(f"  • Конвейер: первый результат через {pipeline['time_to_first_result']:.2f} с, "
+                  f"всего {pipeline['total_time']:.2f} с (занятость стадий: {busy})")
+
+        sampling = summary.get('sampling')
+        if sampling:
+            confidence = sampling['confidence'] * 100
+            print(f"  • Выборочная проверка: титульная часть {sampling['front_matter_paragraphs']} абз., "
+                  f"выборка {sampling['sample_size']} из {sampling['population']} абз. ({sampling['strategy']}), "
+                  f"основной текст в выборке: {sampling['sampled_body_paragraphs']}")
+            estimates = [('Абзацы основного текста с ошибками', sampling['any_error'])]
+            estimates += list(sampling['estimates'].items())
+            for name, estimate in estimates:
+                print(f"    - {name}: {estimate['rate'] * 100:.1f}% "
+                      f"({confidence:.0f}% ДИ {estimate['ci_low'] * 100:.1f}-{estimate['ci_high'] * 100:.1f}%)")
+
+        incremental = summary.get('incremental')
+        if incremental:
+            print(f"  • Переиспользовано результатов абзацев: {incremental['reused_paragraphs']} "
+                  f"из {summary['total_paragraphs']} ({incremental['skipped_ratio'] * 100:.0f}%)")
+
+    @staticmethod
+    def print_rule_profile(hottest_rules: List[Dict]):
+        """Вывод самых затратных правил проверки (RuleProfiler.hottest)"""
+        print("\n⏱️  САМЫЕ ЗАТРАТНЫЕ ПРАВИЛА:")
+        if not hottest_rules:
+            print("  Статистика правил не собрана")
+            return
+        for rule in hottest_rules:
+            errors_text = f", исключений {rule['errors']}" if rule['errors'] else ""
+            print(f"  • [{rule['kind']}] {rule['class_name']}: {rule['rule']} - "
+                  f"{rule['total_ms']:.2f} мс всего, {rule['avg_us']:.1f} мкс в среднем, "
+                  f"вызовов {rule['calls']}, нарушений {rule['fail_rate'] * 100:.0f}%{errors_text}")
+
     @staticmethod
-    def _print_document_errors(document_errors: List[str]):
+    def _print_document_errors(document_errors: List[ValidationError]):
         """Вывод ошибок структуры документа"""
         print(f"\n🏗️  ОШИБКИ СТРУКТУРЫ ДОКУМЕНТА:")
         for error in document_errors:
@@ -169,7 +245,9 @@ class ReportGenerator:
 
         total_errors = summary['total_errors'] + summary.get('document_errors', 0)
 
-        if total_errors == 0:
+        if summary.get('cancellation'):
+            print("  ⏸ Анализ был остановлен - запустите полную проверку, чтобы проверить остальные абзацы.")
+        elif total_errors == 0:
             print("  🎉 Отличная работа! Документ полностью соответствует требованиям.")
         else:
             if summary.get('document_errors', 0) > 0:
@@ -0,0 +1,51 @@
+"""
+Сериализация результатов анализа в JSON и обратно
+"""
+import json
+from enum import Enum
+from typing import Any, Dict
+from validators.errors import ValidationError
+
+# Списки ошибок в результатах, которые восстанавливаются в записи ValidationError
+_ERROR_LISTS = ('formatting_errors', 'content_errors')
+
+
+def to_jsonable(value: Any, include_messages: bool = True) -> Any:
+    """Преобразование результатов в структуры, которые понимает json.
+
+    Ошибки становятся словарями с кодом и параметрами (и текстом сообщения,
+    если include_messages), множества и кортежи - списками, перечисления - именами.
+    """
+    if isinstance(value, ValidationError):
+        data = value.to_dict()
+        if include_messages:
+            data['message'] = str(value)
+        return data
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item, include_messages) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [to_jsonable(item, include_messages) for item in value]
+    if isinstance(value, Enum):
+        return value.name
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def results_to_json(results: Dict, include_messages: bool = True) -> str:
+    """Результаты анализа одной строкой JSON (для NDJSON)"""
+    return json.dumps(to_jsonable(results, include_messages), ensure_ascii=False, separators=(',', ':'))
+
+
+def results_from_jsonable(data: Dict) -> Dict:
+    """Восстановление записей ошибок в результатах, прочитанных из JSON"""
+    results = dict(data)
+    results['document_errors'] = [ValidationError.from_dict(error) for error in data.get('document_errors', [])]
+    paragraphs = []
+    for paragraph in data.get('paragraphs', []):
+        paragraph = dict(paragraph)
+        for key in _ERROR_LISTS:
+            paragraph[key] = [ValidationError.from_dict(error) for error in paragraph.get(key, [])]
+        paragraphs.append(paragraph)
+    results['paragraphs'] = paragraphs
+    return results
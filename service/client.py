@@ -0,0 +1,129 @@
+"""
+Клиент локального сервиса проверки документов
+
+Запуск: python -m service.client документ.docx [--address unix:/путь/к/сокету] [--json]
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import sys
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from reports.report_generator import ReportGenerator
+from reports.serialization import results_from_jsonable
+from service.protocol import DEFAULT_ADDRESS, INTERACTIVE_LANE, LANES, UNIX_PREFIX, encode_options
+from utils.document_source import DocumentSource, open_document_buffer
+
+
+class ServiceError(RuntimeError):
+    """Ошибка, возвращенная сервисом проверки"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP-соединение через Unix-сокет"""
+
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__('localhost', timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class ValidationClient:
+    """Клиент сервиса: отправляет документ и получает результаты анализа.
+
+    Адрес: http://хост:порт или unix:/путь/к/сокету.
+    """
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: Optional[float] = None):
+        self.address = address
+        self.timeout = timeout
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.address.startswith(UNIX_PREFIX):
+            return _UnixHTTPConnection(self.address[len(UNIX_PREFIX):], self.timeout)
+        url = urlsplit(self.address)
+        return http.client.HTTPConnection(url.hostname, url.port, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, body: Optional[bytes] = None) -> Tuple[str, Dict]:
+        connection = self._connect()
+        try:
+            headers = {'Content-Type': 'application/octet-stream'} if body is not None else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            text = response.read().decode('utf-8')
+            if response.status != 200:
+                try:
+                    message = json.loads(text).get('error', text)
+                except ValueError:
+                    message = text
+                raise ServiceError(response.status, message)
+            return text, dict(response.getheaders())
+        finally:
+            connection.close()
+
+    def analyze_json(self, source: DocumentSource, lane: str = INTERACTIVE_LANE, **options) -> str:
+        """Проверка документа; результаты строкой JSON, как их вернул сервис"""
+        with open_document_buffer(source) as buffer:
+            body = bytes(buffer)
+        text, _ = self._request('POST', f"/analyze?{encode_options(lane, options)}", body)
+        return text
+
+    def analyze(self, source: DocumentSource, lane: str = INTERACTIVE_LANE, **options) -> Dict:
+        """Проверка документа; результаты в том же виде, что у DocxValidator.analyze_document"""
+        return results_from_jsonable(json.loads(self.analyze_json(source, lane, **options)))
+
+    def status(self) -> Dict:
+        """Состояние очередей сервиса"""
+        text, _ = self._request('GET', '/status')
+        return json.loads(text)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Проверка документов через локальный сервис")
+    parser.add_argument('files', nargs='+', help="Документы .docx")
+    parser.add_argument('--address', default=os.environ.get('DOCX_VALIDATOR_SERVICE', DEFAULT_ADDRESS),
+                        help="Адрес сервиса: http://хост:порт или unix:/путь")
+    parser.add_argument('--lane', choices=LANES, default=INTERACTIVE_LANE)
+    parser.add_argument('--journal', default=None, help="Профиль журнала или 'auto'")
+    parser.add_argument('--profile', default=None, help="Профиль анализа: fast, standard или thorough")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="Ограничение времени анализа документа, с")
+    parser.add_argument('--json', action='store_true', help="Вывести результаты в JSON (по строке на файл)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    client = ValidationClient(args.address)
+    failed = 0
+    for path in args.files:
+        try:
+            text = client.analyze_json(path, args.lane, journal=args.journal, profile=args.profile,
+                                       time_budget=args.time_budget)
+        except (OSError, ServiceError) as e:
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        if args.json:
+            print(text)
+        else:
+            print(f"\n📄 {path}")
+            ReportGenerator.print_final_report(results_from_jsonable(json.loads(text)))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Общие параметры сервиса проверки и клиента: адрес, полосы приоритета, параметры запроса
+"""
+from typing import Callable, Dict
+from urllib.parse import urlencode
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_ADDRESS = f'http://{DEFAULT_HOST}:{DEFAULT_PORT}'
+# Префикс адреса сервиса на Unix-сокете: unix:/путь/к/сокету
+UNIX_PREFIX = 'unix:'
+
+# Полосы приоритета в порядке обслуживания: интерактивные запросы идут раньше пакетных
+INTERACTIVE_LANE = 'interactive'
+BULK_LANE = 'bulk'
+LANES = (INTERACTIVE_LANE, BULK_LANE)
+
+# Наибольший размер принимаемого документа, байт
+MAX_DOCUMENT_BYTES = 50 * 1024 * 1024
+
+
+def _to_bool(value: str) -> bool:
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+# Параметры analyze_document, которые можно передать в запросе, и их преобразование
+REQUEST_OPTIONS: Dict[str, Callable] = {
+    'journal': str,
+    'profile': str,
+    'streaming': _to_bool,
+    'pipelined': _to_bool,
+    'sample_size': int,
+    'sample_strategy': str,
+    'sample_seed': int,
+    'confidence': float,
+    'time_budget': float,
+    'use_result_cache': _to_bool
+}
+
+
+def encode_options(lane: str, options: Dict) -> str:
+    """Строка запроса с полосой и параметрами анализа (None пропускаются)"""
+    unknown = set(options) - set(REQUEST_OPTIONS)
+    if unknown:
+        raise ValueError(f"Неподдерживаемые параметры анализа: {', '.join(sorted(unknown))}")
+    query = {'lane': lane}
+    query.update((name, value) for name, value in options.items() if value is not None)
+    return urlencode(query)
+
+
+def decode_options(query: Dict) -> Dict:
+    """Параметры анализа из разобранной строки запроса (parse_qs)"""
+    options = {}
+    for name, values in query.items():
+        if name == 'lane':
+            continue
+        if name not in REQUEST_OPTIONS:
+            raise ValueError(f"Неподдерживаемый параметр анализа: {name}")
+        try:
+            options[name] = REQUEST_OPTIONS[name](values[-1])
+        except ValueError:
+            raise ValueError(f"Неверное значение параметра {name}: {values[-1]}")
+    return options
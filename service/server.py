@@ -0,0 +1,351 @@
+"""
+Локальный сервис проверки документов: пул прогретых валидаторов, очереди
+с приоритетом и ограничением параллельности, результаты в JSON по HTTP
+или через Unix-сокет.
+
+Запуск: python -m service.server [--port 8765 | --unix /путь/к/сокету] [--workers 2]
+"""
+import argparse
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from config.analysis_profiles import DEFAULT_PROFILE, check_profile_modes, get_analysis_profile
+from main import DocxValidator
+from reports.serialization import results_to_json
+from service.protocol import (BULK_LANE, DEFAULT_HOST, DEFAULT_PORT, INTERACTIVE_LANE, LANES,
+                              MAX_DOCUMENT_BYTES, decode_options)
+from utils.cancellation import CancellationToken
+from utils.document_loader import DocumentLoadError
+
+
+class ServiceBusy(Exception):
+    """Очередь заданий заполнена"""
+
+
+class _Job:
+    """Задание на проверку одного документа"""
+
+    __slots__ = ('source', 'lane', 'options', 'cancel_token', 'done', 'result', 'error',
+                 'error_status', 'queued_at', 'started_at', 'finished_at')
+
+    def __init__(self, source: bytes, lane: str, options: Dict):
+        self.source = source
+        self.lane = lane
+        self.options = options
+        self.cancel_token = CancellationToken()
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        # HTTP-статус ошибки: 422 - присланный файл не является документом .docx
+        self.error_status = 500
+        self.queued_at = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def queue_time(self) -> float:
+        return (self.started_at or self.queued_at) - self.queued_at
+
+    @property
+    def analysis_time(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class ValidationService:
+    """Пул прогретых валидаторов с очередями заданий по полосам приоритета.
+
+    Каждый рабочий поток владеет своим DocxValidator, созданным при запуске
+    сервиса, поэтому на запрос приходится только сам анализ. Свободный поток
+    берет задание из первой непустой полосы (интерактивные раньше пакетных),
+    если в ней не исчерпан лимит одновременных заданий: пакетная полоса по
+    умолчанию оставляет один поток свободным для интерактивных запросов.
+
+    Рабочие - потоки одного процесса: анализ без запросов к модели (профиль
+    fast) занят процессором и держит GIL, поэтому workers больше 1 не ускоряет
+    такие задания, а только позволяет интерактивному заданию не ждать
+    пакетное. Параллельность по ядрам дает запуск нескольких сервисов или
+    пакетная проверка в пуле процессов (batch.run_batch).
+    """
+
+    def __init__(self, workers: int = 2, queue_limit: int = 64, lane_limits: Optional[Dict[str, int]] = None,
+                 time_budget: Optional[float] = None, validator_factory: Callable = DocxValidator):
+        self.workers = max(1, workers)
+        self.queue_limit = queue_limit
+        self.lane_limits = {INTERACTIVE_LANE: self.workers, BULK_LANE: max(1, self.workers - 1)}
+        self.lane_limits.update(lane_limits or {})
+        # Ограничение времени на документ по умолчанию (запрос может задать свое)
+        self.time_budget = time_budget
+
+        self._queues = {lane: deque() for lane in LANES}
+        self._running = {lane: 0 for lane in LANES}
+        # Выполняемые задания по рабочим потокам
+        self._active: Dict[int, _Job] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self.stats = {"processed": 0, "failed": 0, "rejected": 0, "analysis_time": 0.0, "queue_time": 0.0}
+
+        validators = [validator_factory() for _ in range(self.workers)]
+        self._threads = [threading.Thread(target=self._work, args=(validator,), daemon=True)
+                         for validator in validators]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, source: bytes, lane: str = INTERACTIVE_LANE, options: Optional[Dict] = None) -> _Job:
+        """Постановка документа в очередь полосы"""
+        if lane not in self._queues:
+            raise ValueError(f"Неизвестная полоса: {lane} (доступны: {', '.join(LANES)})")
+        options = dict(options or {})
+        check_profile_modes(get_analysis_profile(options.get('profile', DEFAULT_PROFILE)),
+                            **{name: options.get(name) for name in ('streaming', 'pipelined', 'sample_size')})
+        if self.time_budget is not None:
+            options.setdefault('time_budget', self.time_budget)
+        # Повторно присланный документ не анализируется заново
+        options.setdefault('use_result_cache', True)
+
+        job = _Job(source, lane, options)
+        with self._condition:
+            if self._closed:
+                raise ServiceBusy("Сервис останавливается")
+            if sum(len(jobs) for jobs in self._queues.values()) >= self.queue_limit:
+                self.stats["rejected"] += 1
+                raise ServiceBusy(f"Очередь заполнена ({self.queue_limit} заданий)")
+            self._queues[lane].append(job)
+            self._condition.notify()
+        return job
+
+    def analyze(self, source: bytes, lane: str = INTERACTIVE_LANE, options: Optional[Dict] = None) -> str:
+        """Проверка документа с ожиданием результата; результаты в JSON"""
+        job = self.submit(source, lane, options)
+        job.done.wait()
+        if job.error is not None:
+            raise RuntimeError(job.error)
+        return job.result
+
+    def status(self) -> Dict:
+        """Состояние очередей и статистика обработанных заданий"""
+        with self._condition:
+            processed = self.stats["processed"] + self.stats["failed"]
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "lane_limits": dict(self.lane_limits),
+                "queued": {lane: len(jobs) for lane, jobs in self._queues.items()},
+                "running": dict(self._running),
+                "processed": self.stats["processed"],
+                "failed": self.stats["failed"],
+                "rejected": self.stats["rejected"],
+                "avg_analysis_time": self.stats["analysis_time"] / processed if processed else 0.0,
+                "avg_queue_time": self.stats["queue_time"] / processed if processed else 0.0
+            }
+
+    def shutdown(self, cancel_running: bool = True):
+        """Остановка: ожидающие задания отклоняются, выполняемые отменяются"""
+        with self._condition:
+            self._closed = True
+            for jobs in self._queues.values():
+                while jobs:
+                    job = jobs.popleft()
+                    job.error = "Сервис остановлен"
+                    job.done.set()
+            self._condition.notify_all()
+        if cancel_running:
+            with self._condition:
+                active = list(self._active.values())
+            for job in active:
+                job.cancel_token.cancel()
+        for thread in self._threads:
+            thread.join()
+
+    def _next_job(self) -> Optional[_Job]:
+        """Первое задание из полосы с наивысшим приоритетом и свободным лимитом"""
+        for lane in LANES:
+            if self._queues[lane] and self._running[lane] < self.lane_limits.get(lane, self.workers):
+                self._running[lane] += 1
+                return self._queues[lane].popleft()
+        return None
+
+    def _work(self, validator: DocxValidator):
+        """Рабочий поток: выполнение заданий на своем валидаторе"""
+        worker_id = threading.get_ident()
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None and not self._closed:
+                    self._condition.wait()
+                    job = self._next_job()
+                if job is None:
+                    return
+                self._active[worker_id] = job
+
+            job.started_at = time.perf_counter()
+            try:
+                results = validator.analyze_document(job.source, cancel_token=job.cancel_token, **job.options)
+                job.result = results_to_json(results)
+            except DocumentLoadError as e:
+                job.error = str(e)
+                job.error_status = 422
+            except Exception as e:
+                job.error = str(e)
+            job.finished_at = time.perf_counter()
+
+            with self._condition:
+                del self._active[worker_id]
+                self._running[job.lane] -= 1
+                self.stats["failed" if job.error is not None else "processed"] += 1
+                self.stats["analysis_time"] += job.analysis_time
+                self.stats["queue_time"] += job.queue_time
+                # Освободился лимит полосы: задание может взять любой ожидающий поток
+                self._condition.notify_all()
+            job.done.set()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """POST /analyze?lane=...&<параметры> с телом .docx; GET /status"""
+
+    server_version = "DocxValidatorService/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if urlsplit(self.path).path in ('/status', '/health'):
+            self._send_json(200, json.dumps(self.server.service.status(), ensure_ascii=False))
+        else:
+            self._send_error(404, "Неизвестный адрес")
+
+    def do_POST(self):
+        # Пока тело запроса не прочитано, ответ об ошибке закрывает соединение:
+        # иначе непрочитанные байты были бы приняты за следующий запрос
+        url = urlsplit(self.path)
+        if url.path != '/analyze':
+            self._send_error(404, "Неизвестный адрес", close=True)
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or 'Transfer-Encoding' in self.headers:
+            self._send_error(400, "Некорректный заголовок Content-Length", close=True)
+            return
+        if length == 0:
+            self._send_error(400, "Пустой документ")
+            return
+        if length > MAX_DOCUMENT_BYTES:
+            self._send_error(413, f"Документ больше {MAX_DOCUMENT_BYTES // (1024 * 1024)} МБ", close=True)
+            return
+        source = self.rfile.read(length)
+
+        try:
+            query = parse_qs(url.query)
+            lane = query.get('lane', [INTERACTIVE_LANE])[-1]
+            job = self.server.service.submit(source, lane, decode_options(query))
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+        except ServiceBusy as e:
+            self._send_error(503, str(e))
+            return
+
+        job.done.wait()
+        if job.error is not None:
+            self._send_error(job.error_status, job.error)
+            return
+        self._send_json(200, job.result, {
+            'X-Queue-Seconds': f"{job.queue_time:.4f}",
+            'X-Analysis-Seconds': f"{job.analysis_time:.4f}"
+        })
+
+    def _send_json(self, status: int, body: str, headers: Optional[Dict] = None, close: bool = False):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        if close:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str, close: bool = False):
+        self._send_json(status, json.dumps({"error": message}, ensure_ascii=False), close=close)
+
+    def address_string(self) -> str:
+        # У соединений через Unix-сокет нет адреса клиента
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP-сервер на Unix-сокете"""
+
+    daemon_threads = True
+
+
+def create_server(service: ValidationService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                  unix_path: Optional[str] = None):
+    """HTTP-сервер сервиса на TCP-порту или на Unix-сокете"""
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.remove(unix_path)
+        server = _UnixHTTPServer(unix_path, _RequestHandler)
+        os.chmod(unix_path, 0o600)
+    else:
+        server = ThreadingHTTPServer((host, port), _RequestHandler)
+        server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Локальный сервис проверки документов .docx")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', default=None, help="Путь к Unix-сокету вместо TCP-порта")
+    parser.add_argument('-j', '--workers', type=int, default=2,
+                        help="Число прогретых валидаторов (потоки одного процесса: "
+                             "задания без запросов к модели не выполняются параллельно)")
+    parser.add_argument('--queue-limit', type=int, default=64, help="Наибольшее число ожидающих заданий")
+    parser.add_argument('--bulk-limit', type=int, default=None,
+                        help="Наибольшее число одновременных пакетных заданий")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="Ограничение времени анализа документа по умолчанию, с")
+    parser.add_argument('--verbose', action='store_true', help="Не скрывать вывод анализа")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    lane_limits = {BULK_LANE: args.bulk_limit} if args.bulk_limit else None
+    # Вывод хода анализа от параллельных заданий только перемешивался бы
+    service = ValidationService(args.workers, args.queue_limit, lane_limits, args.time_budget,
+                                partial(DocxValidator, verbose=args.verbose))
+    server = create_server(service, args.host, args.port, args.unix)
+    address = f"unix:{args.unix}" if args.unix else f"http://{args.host}:{args.port}"
+    print(f"Сервис проверки документов запущен: {address} (валидаторов: {service.workers})", file=sys.stderr)
+    # shutdown() ждет выхода из serve_forever, поэтому вызывается из другого потока
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+
+
+if __name__ == "__main__":
+    main()
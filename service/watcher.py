@@ -0,0 +1,349 @@
+"""
+Наблюдение за папками поступления статей: новые и измененные .docx проверяются
+прогретым валидатором сразу после записи, отчеты кладутся рядом с файлами
+или в отдельное место.
+
+Запуск: python -m service.watcher папка [папка ...] [--sink каталог|файл.ndjson] [--debounce 1.0]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config.analysis_profiles import ANALYSIS_PROFILES, DEFAULT_PROFILE
+from main import DocxValidator
+from reports.serialization import results_to_json
+from utils.cache import hash_bytes
+from utils.document_loader import DocumentLoadError
+from utils.inotify import (IN_CLOSE_WRITE, IN_CREATE, IN_MODIFY, IN_MOVED_TO, IN_Q_OVERFLOW, Inotify,
+                           InotifyEvent)
+
+REPORT_SUFFIX = '.report.json'
+TEXT_REPORT_SUFFIX = '.report.txt'
+# Повторы проверки после сбоя: задержка удваивается начиная с RETRY_DELAY секунд
+RETRY_DELAY = 5.0
+MAX_RETRIES = 5
+
+
+def _is_document(path: str) -> bool:
+    """Документ для проверки, а не временный файл Word или LibreOffice"""
+    name = os.path.basename(path)
+    return name.lower().endswith('.docx') and not name.startswith(('~$', '.~lock', '.'))
+
+
+def _signature(path: str) -> Optional[Tuple[int, int]]:
+    """Размер и время изменения файла (None - файла нет)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class FolderWatcher:
+    """Проверка документов по событиям inotify.
+
+    Запись файла порождает серию событий; проверка откладывается, пока
+    файл не будет debounce секунд без изменений, и выполняется, только если
+    его размер и время изменения совпадают с последним событием. Файл,
+    содержимое которого (SHA-256) совпадает с уже проверенным по этому пути,
+    повторно не проверяется: хэш хранится в отчете, поэтому это работает и
+    после перезапуска. Одинаковые файлы по разным путям получают отчеты
+    из кэша результатов валидатора без повторного анализа.
+
+    Отчеты: по умолчанию <файл>.report.json и <файл>.report.txt рядом с
+    документом; sink - каталог для отчетов (с сохранением относительных путей
+    внутри подкаталога наблюдаемого каталога: <имя>-<хэш полного пути>, чтобы
+    каталоги с одинаковыми именами не перезаписывали отчеты друг друга) или
+    файл .ndjson, в который дописывается строка на каждую проверку.
+
+    Проверка, не удавшаяся из-за ошибки чтения или анализа, повторяется через
+    RETRY_DELAY секунд с удвоением задержки, не более MAX_RETRIES раз. Файл,
+    который не является документом .docx, не проверяется повторно до
+    следующего изменения.
+    """
+
+    def __init__(self, directories: List[str], sink: Optional[str] = None, debounce: float = 1.0,
+                 recursive: bool = True, validator: Optional[DocxValidator] = None, **analyze_kwargs):
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.sink = os.path.abspath(sink) if sink else None
+        self.debounce = debounce
+        self.recursive = recursive
+        self.validator = validator or DocxValidator()
+        self.analyze_kwargs = analyze_kwargs
+        self.analyze_kwargs.setdefault('use_result_cache', True)
+        # Ожидающие проверки файлы: (срок, размер и время изменения, время первого события)
+        self._pending: Dict[str, Tuple[float, Optional[Tuple[int, int]], float]] = {}
+        # Хэш содержимого последней проверенной версии каждого файла
+        self._checked: Dict[str, str] = {}
+        # Число неудачных проверок подряд для файлов, ожидающих повтора
+        self._failures: Dict[str, int] = {}
+        self.stats = {"checked": 0, "unchanged": 0, "failed": 0, "latency": 0.0}
+        if self._sink_is_ndjson():
+            self._load_ndjson_hashes()
+
+    def run(self):
+        """Наблюдение до прерывания (KeyboardInterrupt, SIGTERM в main)"""
+        with Inotify(IN_CLOSE_WRITE | IN_MOVED_TO | IN_MODIFY | IN_CREATE) as inotify:
+            for directory in self.directories:
+                inotify.add_watch(directory, recursive=self.recursive)
+            print(f"Наблюдение за каталогами: {len(inotify.watched())} "
+                  f"(отчеты: {self.sink or 'рядом с файлами'})", file=sys.stderr)
+            # Файлы, появившиеся до запуска, проверяются, если у них нет актуального отчета
+            for directory in self.directories:
+                self._scan(directory)
+
+            try:
+                while True:
+                    for event in inotify.read_events(self._next_timeout()):
+                        self._on_event(event)
+                    self._process_due()
+            except KeyboardInterrupt:
+                pass
+        checked = self.stats['checked']
+        latency = f", средняя задержка отчета {self.stats['latency'] / checked:.2f} с" if checked else ""
+        print(f"Наблюдение остановлено: проверено {checked}, без изменений {self.stats['unchanged']}, "
+              f"с ошибками {self.stats['failed']}{latency}", file=sys.stderr)
+        return self.stats
+
+    def _next_timeout(self) -> Optional[float]:
+        """Время до ближайшей проверки; без ожидающих файлов - ждать событий без ограничения"""
+        if not self._pending:
+            return None
+        return max(0.0, min(deadline for deadline, _, _ in self._pending.values()) - time.monotonic())
+
+    def _on_event(self, event: InotifyEvent):
+        if event.mask & IN_Q_OVERFLOW:
+            # Часть событий потеряна: сверяем каталоги с отчетами
+            print("Переполнение очереди событий, повторный просмотр каталогов", file=sys.stderr)
+            for directory in self.directories:
+                self._scan(directory)
+        elif event.is_dir:
+            # Файлы могли появиться в новом каталоге до начала наблюдения за ним
+            if self.recursive and event.mask & (IN_CREATE | IN_MOVED_TO):
+                self._scan(event.path)
+        elif _is_document(event.path):
+            # Новая версия файла: счет неудачных проверок начинается заново
+            self._failures.pop(event.path, None)
+            self._schedule(event.path)
+
+    def _schedule(self, path: str, delay: Optional[float] = None):
+        """Отложенная проверка: каждое новое событие переносит срок"""
+        now = time.monotonic()
+        first_seen = self._pending[path][2] if path in self._pending else now
+        self._pending[path] = (now + (self.debounce if delay is None else delay), _signature(path), first_seen)
+
+    def _retry_later(self, path: str, first_seen: float):
+        """Повтор неудавшейся проверки с растущей задержкой"""
+        failures = self._failures.get(path, 0) + 1
+        if failures > MAX_RETRIES:
+            self._failures.pop(path, None)
+            print(f"Проверка {path} не удалась {MAX_RETRIES + 1} раз подряд, "
+                  f"следующая - после изменения файла", file=sys.stderr)
+            return
+        self._failures[path] = failures
+        self._schedule(path, RETRY_DELAY * 2 ** (failures - 1))
+        # Задержка отчета считается от изменения файла, а не от повтора
+        deadline, signature, _ = self._pending[path]
+        self._pending[path] = (deadline, signature, first_seen)
+
+    def _scan(self, directory: str):
+        """Постановка в проверку документов каталога без актуального отчета"""
+        walker = os.walk(directory) if self.recursive else [(directory, [], os.listdir(directory))]
+        for root, _, names in walker:
+            for name in names:
+                path = os.path.join(root, name)
+                if _is_document(path) and not self._report_is_current(path):
+                    self._schedule(path)
+
+    def _process_due(self):
+        now = time.monotonic()
+        for path, (deadline, signature, first_seen) in list(self._pending.items()):
+            if deadline > now:
+                continue
+            current = _signature(path)
+            if current is None:
+                # Файл удален или переименован до проверки
+                del self._pending[path]
+                self._failures.pop(path, None)
+            elif current != signature:
+                # Запись продолжается без событий (например, через mmap): ждем еще
+                self._pending[path] = (now + self.debounce, current, first_seen)
+            else:
+                del self._pending[path]
+                self._check(path, first_seen)
+
+    def _check(self, path: str, first_seen: float):
+        """Проверка документа и запись отчета"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            print(f"❌ {path}: не удалось прочитать файл: {e}", file=sys.stderr)
+            self.stats["failed"] += 1
+            self._retry_later(path, first_seen)
+            return
+
+        content_hash = hash_bytes(data)
+        if self._checked.get(path) == content_hash:
+            self._failures.pop(path, None)
+            self.stats["unchanged"] += 1
+            return
+
+        start = time.perf_counter()
+        try:
+            results = self.validator.analyze_document(data, **self.analyze_kwargs)
+            self._write_reports(path, content_hash, results, time.perf_counter() - start)
+        except DocumentLoadError as e:
+            # Повтор с тем же содержимым дал бы ту же ошибку
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            self.stats["failed"] += 1
+            self._failures.pop(path, None)
+            return
+        except Exception as e:
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            self.stats["failed"] += 1
+            self._retry_later(path, first_seen)
+            return
+
+        self._failures.pop(path, None)
+        self._checked[path] = content_hash
+        latency = time.monotonic() - first_seen
+        self.stats["checked"] += 1
+        self.stats["latency"] += latency
+        summary = results["summary"]
+        print(f"✅ {path}: ошибок {summary['total_errors'] + summary.get('document_errors', 0)}, "
+              f"отчет через {latency:.2f} с после изменения", file=sys.stderr)
+
+    def _write_reports(self, path: str, content_hash: str, results: Dict, elapsed: float):
+        record = (f'{{"file":{json.dumps(path, ensure_ascii=False)},"sha256":"{content_hash}",'
+                  f'"checked_at":{time.time():.3f},"elapsed":{elapsed:.4f},"result":{results_to_json(results)}}}')
+        if self._sink_is_ndjson():
+            os.makedirs(os.path.dirname(self.sink), exist_ok=True)
+            with open(self.sink, 'a', encoding='utf-8') as f:
+                f.write(record + '\n')
+            return
+
+        text = io.StringIO()
+        with contextlib.redirect_stdout(text):
+            self.validator.generate_report(results)
+        base = self._report_base(path)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        self._write_atomic(base + TEXT_REPORT_SUFFIX, text.getvalue())
+        # JSON пишется последним: по нему определяется, что отчет актуален
+        self._write_atomic(base + REPORT_SUFFIX, record + '\n')
+
+    @staticmethod
+    def _write_atomic(path: str, text: str):
+        """Запись через временный файл: читатели не увидят недописанный отчет"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def _report_base(self, path: str) -> str:
+        """Путь отчета без расширения"""
+        if self.sink is None:
+            return path
+        root = next((directory for directory in self.directories
+                     if os.path.commonpath([directory, path]) == directory), os.path.dirname(path))
+        return os.path.join(self.sink, self._root_key(root), os.path.relpath(path, root))
+
+    @staticmethod
+    def _root_key(root: str) -> str:
+        """Подкаталог отчетов наблюдаемого каталога: имя и хэш полного пути
+        (/a/in и /b/in получают разные подкаталоги)"""
+        return f"{os.path.basename(root) or 'root'}-{hash_bytes(root.encode('utf-8'))[:8]}"
+
+    def _report_is_current(self, path: str) -> bool:
+        """Есть ли отчет о текущем содержимом файла (хэш запоминается для проверки по событиям)"""
+        if self._sink_is_ndjson():
+            known = self._checked.get(path)
+        else:
+            known = self._read_report_hash(self._report_base(path) + REPORT_SUFFIX)
+        if known is None:
+            return False
+        try:
+            with open(path, 'rb') as f:
+                current = hash_bytes(f.read())
+        except OSError:
+            return False
+        if current != known:
+            return False
+        self._checked[path] = current
+        return True
+
+    @staticmethod
+    def _read_report_hash(report_path: str) -> Optional[str]:
+        try:
+            with open(report_path, 'r', encoding='utf-8') as f:
+                return json.loads(f.readline()).get('sha256')
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _sink_is_ndjson(self) -> bool:
+        return self.sink is not None and self.sink.lower().endswith('.ndjson')
+
+    def _load_ndjson_hashes(self):
+        """Хэши уже проверенных файлов из накопленного файла NDJSON"""
+        if not os.path.exists(self.sink):
+            return
+        with open(self.sink, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get('file') and record.get('sha256'):
+                    self._checked[record['file']] = record['sha256']
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Проверка новых документов .docx в наблюдаемых папках")
+    parser.add_argument('directories', nargs='+', help="Наблюдаемые каталоги")
+    parser.add_argument('--sink', default=None,
+                        help="Каталог для отчетов или файл .ndjson (по умолчанию отчеты рядом с файлами)")
+    parser.add_argument('--debounce', type=float, default=1.0,
+                        help="Сколько секунд файл должен оставаться без изменений перед проверкой")
+    parser.add_argument('--no-recursive', action='store_true', help="Не наблюдать за подкаталогами")
+    parser.add_argument('--journal', default=None, help="Профиль журнала или 'auto'")
+    parser.add_argument('--profile', choices=list(ANALYSIS_PROFILES), default=DEFAULT_PROFILE,
+                        help="Профиль анализа: fast, standard или thorough")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="Ограничение времени анализа одного документа, с")
+    parser.add_argument('--verbose', action='store_true', help="Не скрывать вывод анализа")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    for directory in args.directories:
+        if not os.path.isdir(directory):
+            print(f"Каталог не найден: {directory}", file=sys.stderr)
+            return 2
+    analyze_kwargs = {"journal": args.journal, "profile": args.profile}
+    if args.time_budget is not None:
+        analyze_kwargs["time_budget"] = args.time_budget
+    # Ход анализа не нужен в журнале демона: итог по файлу выводится в stderr
+    watcher = FolderWatcher(args.directories, args.sink, args.debounce, not args.no_recursive,
+                            DocxValidator(verbose=args.verbose), **analyze_kwargs)
+
+    def interrupt(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, interrupt)
+    try:
+        watcher.run()
+    except OSError as e:
+        print(f"Наблюдение невозможно: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
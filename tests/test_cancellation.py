@@ -0,0 +1,143 @@
+"""
+Проверки отмены анализа: дочерний признак с бюджетом времени и частичные
+результаты с непроверенными абзацами в каждом режиме
+"""
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from main import DocxValidator
+from utils.cache import DiskCache
+from utils.cancellation import CANCELLED, TIME_BUDGET, CancellationToken
+from utils.document_loader import DocumentLoader
+
+# После скольких классифицированных абзацев анализ отменяется
+CANCEL_AFTER = 5
+
+
+class CancellationTokenTest(unittest.TestCase):
+
+    def test_child_stops_with_parent(self):
+        parent = CancellationToken()
+        child = parent.child(time_budget=60)
+        self.assertFalse(child.is_stopped())
+        parent.cancel()
+        self.assertTrue(child.is_stopped())
+        self.assertEqual(child.reason, CANCELLED)
+
+    def test_child_budget_does_not_touch_parent(self):
+        parent = CancellationToken()
+        child = parent.child(time_budget=0)
+        self.assertTrue(child.is_stopped())
+        self.assertEqual(child.reason, TIME_BUDGET)
+        self.assertFalse(parent.is_stopped())
+        self.assertIsNone(parent.deadline)
+
+    def test_child_of_cancelled_parent_is_stopped(self):
+        parent = CancellationToken()
+        parent.cancel()
+        self.assertTrue(parent.child().is_stopped())
+
+    def test_child_remaining_respects_parent_budget(self):
+        parent = CancellationToken(time_budget=0)
+        child = parent.child(time_budget=60)
+        self.assertEqual(child.remaining(), 0.0)
+        self.assertTrue(child.is_stopped())
+        self.assertEqual(child.reason, TIME_BUDGET)
+
+    def test_parent_cancel_interrupts_child_wait(self):
+        parent = CancellationToken()
+        child = parent.child()
+        threading.Timer(0.05, parent.cancel).start()
+        start = time.monotonic()
+        self.assertTrue(child.wait(10))
+        self.assertLess(time.monotonic() - start, 5)
+
+
+class PartialResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = DocxValidator()
+        self.total = len(self.validator.analyze_full('test.docx', profile='fast')["paragraphs"])
+        self.token = CancellationToken()
+        classify = self.validator.ai_classifier.classify_paragraph
+        calls = []
+
+        def classify_then_cancel(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == CANCEL_AFTER:
+                self.token.cancel()
+            return classify(*args, **kwargs)
+
+        self.validator.ai_classifier.classify_paragraph = classify_then_cancel
+
+    def _assert_partial(self, results, expected_total):
+        paragraphs = results["paragraphs"]
+        unprocessed = [result for result in paragraphs if result.get("unprocessed")]
+        self.assertEqual(len(paragraphs), expected_total)
+        self.assertTrue(unprocessed)
+        self.assertLess(len(unprocessed), expected_total)
+        for result in unprocessed:
+            self.assertIsNone(result["classified_as"])
+            self.assertEqual(result["total_errors"], 0)
+        summary = results["summary"]
+        self.assertEqual(summary["unprocessed_paragraphs"], len(unprocessed))
+        self.assertEqual(summary["cancellation"],
+                         {"reason": CANCELLED, "unprocessed_paragraphs": len(unprocessed)})
+        # Непроверенные абзацы идут после проверенных, номера сохраняют порядок документа
+        first = paragraphs.index(unprocessed[0])
+        self.assertTrue(all(result.get("unprocessed") for result in paragraphs[first:]))
+        self.assertEqual([result["index"] for result in paragraphs], sorted(result["index"] for result in paragraphs))
+
+    def test_full(self):
+        self._assert_partial(self.validator.analyze_full('test.docx', profile='fast', cancel_token=self.token),
+                             self.total)
+
+    def test_streaming(self):
+        results = self.validator.analyze_streaming('test.docx', window_size=2, profile='fast',
+                                                   cancel_token=self.token)
+        self._assert_partial(results, self.total)
+
+    def test_pipelined(self):
+        results = self.validator.analyze_pipelined('test.docx', queue_size=1, profile='fast',
+                                                   cancel_token=self.token)
+        self._assert_partial(results, self.total)
+
+    def test_incremental(self):
+        results = self.validator.analyze_incremental('test.docx', {}, profile='fast', cancel_token=self.token)
+        self._assert_partial(results, self.total)
+
+    def test_time_budget_leaves_caller_token_unchanged(self):
+        token = CancellationToken()
+        results = self.validator.analyze_document('test.docx', profile='fast', cancel_token=token, time_budget=0)
+        self.assertEqual(results["summary"]["cancellation"]["reason"], TIME_BUDGET)
+        self.assertEqual(results["summary"]["unprocessed_paragraphs"], self.total)
+        self.assertIsNone(token.deadline)
+        self.assertFalse(token.is_stopped())
+
+    def test_partial_document_is_not_cached(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = DiskCache(directory.name)
+        self.token.cancel()
+        with mock.patch.object(DocumentLoader, 'document_cache', cache):
+            document_info = DocumentLoader.load_document_with_formatting('test.docx', cancel_token=self.token)
+        self.assertTrue(document_info['cancelled'])
+        self.assertNotIn('document_cache', document_info)
+        self.assertEqual(cache._scan(), [])
+
+    def test_partial_results_are_not_cached(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.validator.result_cache = DiskCache(directory.name)
+        results = self.validator.analyze_full('test.docx', profile='fast', cancel_token=self.token,
+                                              use_result_cache=True)
+        self.assertIn("cancellation", results["summary"])
+        self.assertNotIn("result_cache", results["summary"])
+        self.assertEqual(self.validator.result_cache._scan(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Проверки дискового кэша: права на каталог и записи, отказ от чтения кэша
+в чужом или общедоступном на запись каталоге
+"""
+import os
+import stat
+import tempfile
+import unittest
+
+from utils.cache import DiskCache
+
+# Для смены владельца файла нужны права root
+IS_ROOT = hasattr(os, 'geteuid') and os.geteuid() == 0
+
+
+@unittest.skipUnless(hasattr(os, 'getuid'), "права доступа POSIX")
+class DiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+
+    def test_round_trip_with_private_permissions(self):
+        cache = DiskCache(os.path.join(self.root, 'results'))
+        cache.put('key', {'value': 1})
+        self.assertEqual(cache.get('key'), {'value': 1})
+        self.assertEqual(stat.S_IMODE(os.stat(cache.directory).st_mode), 0o700)
+        self.assertEqual(stat.S_IMODE(os.stat(cache._path('key')).st_mode), 0o600)
+
+    def test_world_writable_directory_is_not_used(self):
+        directory = os.path.join(self.root, 'shared')
+        DiskCache(directory).put('key', {'value': 1})
+        os.chmod(directory, 0o777)
+        cache = DiskCache(directory)
+        self.assertIsNone(cache.get('key'))
+        cache.put('other', {'value': 2})
+        self.assertFalse(os.path.exists(cache._path('other')))
+
+    @unittest.skipUnless(IS_ROOT, "смена владельца файла требует прав root")
+    def test_entry_of_other_user_is_not_read(self):
+        cache = DiskCache(os.path.join(self.root, 'results'))
+        cache.put('key', {'value': 1})
+        os.chown(cache._path('key'), 65534, 65534)
+        self.assertIsNone(DiskCache(cache.directory).get('key'))
+
+    @unittest.skipUnless(IS_ROOT, "смена владельца каталога требует прав root")
+    def test_directory_of_other_user_is_not_used(self):
+        directory = os.path.join(self.root, 'foreign')
+        DiskCache(directory).put('key', {'value': 1})
+        os.chown(directory, 65534, 65534)
+        self.assertIsNone(DiskCache(directory).get('key'))
+
+
+if __name__ == '__main__':
+    unittest.main()
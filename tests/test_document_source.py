@@ -0,0 +1,80 @@
+"""
+Проверки источников документа: путь, байты, файловые объекты и mmap дают
+одинаковый результат загрузки, буферы вызывающего кода освобождаются
+"""
+import io
+import json
+import mmap
+import unittest
+
+from utils.document_loader import DocumentLoader
+from utils.document_source import BufferReader, describe_source, open_document_buffer
+
+PATH = 'test.docx'
+
+
+def _load(source) -> str:
+    document_info = DocumentLoader.load_document_with_formatting(source, use_cache=False)
+    # Статистика кэша шаблонов зависит от предыдущих загрузок
+    document_info.pop('template_cache', None)
+    return json.dumps(document_info, default=str, sort_keys=True)
+
+
+class DocumentSourceTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(PATH, 'rb') as f:
+            cls.data = f.read()
+        cls.expected = _load(PATH)
+
+    def test_bytes_and_buffers(self):
+        for source in (self.data, bytearray(self.data), memoryview(self.data)):
+            with self.subTest(type(source).__name__):
+                self.assertEqual(_load(source), self.expected)
+
+    def test_file_objects(self):
+        stream = io.BytesIO(self.data)
+        self.assertEqual(_load(stream), self.expected)
+        # Внутренний буфер BytesIO освобожден: размер снова можно менять
+        stream.write(b'x')
+        with open(PATH, 'rb') as f:
+            self.assertEqual(_load(f), self.expected)
+
+    def test_mmap(self):
+        with open(PATH, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            self.assertEqual(_load(mapped), self.expected)
+            # Представления mmap освобождены, иначе close() вызвал бы BufferError
+            mapped.close()
+            self.assertTrue(mapped.closed)
+
+    def test_unsupported_source(self):
+        with self.assertRaises(TypeError):
+            with open_document_buffer(12345):
+                pass
+
+    def test_buffer_reader(self):
+        buffer = bytearray(b'0123456789')
+        with BufferReader(buffer) as reader:
+            self.assertEqual(reader.read(3), b'012')
+            self.assertEqual(reader.seek(-2, io.SEEK_END), 8)
+            self.assertEqual(reader.read(), b'89')
+            self.assertEqual(reader.read(), b'')
+            reader.seek(1)
+            chunk = bytearray(4)
+            self.assertEqual(reader.readinto(chunk), 4)
+            self.assertEqual(bytes(chunk), b'1234')
+            with self.assertRaises(ValueError):
+                reader.seek(-1)
+        # После закрытия буфер снова можно изменять
+        buffer.extend(b'!')
+
+    def test_describe_source(self):
+        self.assertEqual(describe_source(PATH), PATH)
+        self.assertEqual(describe_source(self.data), '<bytes>')
+        with open(PATH, 'rb') as f:
+            self.assertEqual(describe_source(f), PATH)
+
+
+if __name__ == '__main__':
+    unittest.main()
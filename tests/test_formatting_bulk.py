@@ -0,0 +1,74 @@
+"""
+Проверки пакетной проверки форматирования: результат совпадает с поабзацной
+проверкой, в том числе для пропущенных свойств, NaN и неизвестных классов
+"""
+import itertools
+import unittest
+
+from config.criteria import FormattingCriteria
+from utils.document_loader import DocumentLoader
+from validators.formatting_validator import FormattingValidator
+from validators.rule_plan import RulePlan, get_rule_plan
+from validators.vectorized import validate_formatting_bulk
+
+NAN = float('nan')
+
+
+class FormattingBulkTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        document_info = DocumentLoader.load_document_with_formatting('test.docx', use_cache=False)
+        cls.document_paragraphs = document_info['paragraphs']
+
+    def _unusual_paragraphs(self):
+        """Абзацы с пропущенными, пустыми и нечисловыми свойствами"""
+        return [
+            {},
+            {'font_name': None, 'font_size': None, 'alignment': None, 'is_bold': None,
+             'is_italic': None, 'first_line_indent': None},
+            {'font_name': NAN, 'font_size': NAN, 'alignment': NAN, 'is_bold': NAN,
+             'is_italic': NAN, 'first_line_indent': NAN},
+            {'font_name': 'Arial', 'font_size': 0, 'alignment': 'JUSTIFY', 'is_bold': 1,
+             'is_italic': 0, 'first_line_indent': 0.0},
+            {'font_name': 'Times New Roman', 'font_size': 14.0, 'alignment': 'UNKNOWN', 'is_bold': True,
+             'is_italic': False, 'first_line_indent': 1.25},
+        ]
+
+    def _assert_same_as_per_paragraph(self, paragraphs, classes, plan):
+        indices = list(range(1, len(paragraphs) + 1))
+        expected = [FormattingValidator.validate_formatting(para, cls, plan=plan, index=index)
+                    for para, cls, index in zip(paragraphs, classes, indices)]
+        self.assertEqual(validate_formatting_bulk(paragraphs, classes, indices, plan), expected)
+
+    def test_document_paragraphs_match_per_paragraph(self):
+        class_names = FormattingCriteria.get_all_classes() + ['неизвестный_класс']
+        paragraphs = self.document_paragraphs
+        classes = [class_names[i % len(class_names)] for i in range(len(paragraphs))]
+        self._assert_same_as_per_paragraph(paragraphs, classes, get_rule_plan())
+
+    def test_unusual_values_match_per_paragraph(self):
+        class_names = FormattingCriteria.get_all_classes() + ['неизвестный_класс', None]
+        pairs = list(itertools.product(self._unusual_paragraphs(), class_names))
+        self._assert_same_as_per_paragraph([para for para, _ in pairs], [cls for _, cls in pairs],
+                                           get_rule_plan())
+
+    def test_uses_given_plan(self):
+        # Снимок критериев анализа с другим шрифтом основного текста
+        criteria, document_requirements, version, _ = FormattingCriteria.get_state()
+        criteria = dict(criteria)
+        criteria['основной_текст'] = dict(criteria['основной_текст'], font_name='Arial')
+        plan = RulePlan(criteria, document_requirements, version + 1)
+        paragraphs = self.document_paragraphs
+        classes = ['основной_текст'] * len(paragraphs)
+        self._assert_same_as_per_paragraph(paragraphs, classes, plan)
+        self.assertNotEqual(validate_formatting_bulk(paragraphs, classes, plan=plan),
+                            validate_formatting_bulk(paragraphs, classes))
+
+    def test_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            validate_formatting_bulk([{}], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Проверки памяти результатов проверки форматирования: результат из памяти
+совпадает с проверкой заново, сигнатура учитывает все проверяемые свойства
+"""
+import pickle
+import unittest
+
+from config.criteria import FormattingCriteria
+from utils.document_loader import DocumentLoader
+from validators.formatting_validator import FormattingValidator
+from validators.rule_plan import FormattingChecker, get_rule_plan
+
+
+class FormattingMemoTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.paragraphs = DocumentLoader.load_document_with_formatting('test.docx', use_cache=False)['paragraphs']
+
+    def setUp(self):
+        # Новые проверяльщики: память не заполнена другими проверками
+        self.checkers = {name: FormattingChecker(FormattingCriteria.get_criteria(name))
+                         for name in FormattingCriteria.get_all_classes()
+                         if FormattingCriteria.get_criteria(name)}
+
+    def test_hits_match_fresh_checks(self):
+        for name, checker in self.checkers.items():
+            seen = set()
+            for para_info in self.paragraphs:
+                signature = tuple(para_info.get(key) for key in FormattingChecker.SIGNATURE_KEYS)
+                errors, hit = checker.check_memoized(para_info)
+                self.assertEqual(hit, signature in seen, name)
+                self.assertEqual(errors, checker.check(para_info), name)
+                seen.add(signature)
+            # В документе много абзацев с одинаковым оформлением
+            self.assertLess(len(seen), len(self.paragraphs))
+
+    def test_signature_covers_checked_properties(self):
+        # Проверки читают только свойства из сигнатуры: иначе память вернула бы чужой результат
+        for name, checker in self.checkers.items():
+            for para_info in self.paragraphs:
+                signature_only = {key: para_info.get(key) for key in FormattingChecker.SIGNATURE_KEYS}
+                self.assertEqual(checker.check(signature_only), checker.check(para_info), name)
+
+    def test_returned_errors_do_not_change_memo(self):
+        checker = self.checkers['основной_текст']
+        para_info = dict(self.paragraphs[0], font_name='Arial', is_bold=True)
+        errors, _ = checker.check_memoized(para_info)
+        self.assertTrue(errors)
+        expected = list(errors)
+        errors.clear()
+        again, hit = checker.check_memoized(para_info)
+        self.assertTrue(hit)
+        self.assertEqual(again, expected)
+
+    def test_memo_is_not_pickled(self):
+        checker = self.checkers['основной_текст']
+        checker.check_memoized(self.paragraphs[0])
+        self.assertEqual(pickle.loads(pickle.dumps(checker))._memo, {})
+
+    def test_memo_stats(self):
+        stats = {"hits": 0, "misses": 0}
+        plan = get_rule_plan()
+        for para_info in self.paragraphs * 2:
+            FormattingValidator.validate_formatting(para_info, 'основной_текст', stats)
+        self.assertEqual(stats["hits"] + stats["misses"], 2 * len(self.paragraphs))
+        self.assertGreaterEqual(stats["hits"], len(self.paragraphs))
+        self.assertIs(get_rule_plan(), plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Проверки повторного анализа исправленного документа: переиспользованные
+результаты абзацев совпадают с анализом новой версии с нуля
+"""
+import contextlib
+import io
+import unittest
+
+from docx import Document
+
+from main import DocxValidator
+
+PATH = 'test.docx'
+
+
+def _revised(change) -> bytes:
+    """test.docx с изменением, внесенным change(doc, непустые абзацы)"""
+    doc = Document(PATH)
+    change(doc, [para for para in doc.paragraphs if para.text.strip()])
+    stream = io.BytesIO()
+    doc.save(stream)
+    return stream.getvalue()
+
+
+def _edit_text(doc, paragraphs):
+    paragraphs[10].runs[-1].text += ' (исправлено)'
+
+
+def _insert_paragraph(doc, paragraphs):
+    paragraphs[20].insert_paragraph_before('Вставленный абзац основного текста статьи.',
+                                           style=paragraphs[20].style)
+
+
+def _delete_paragraph(doc, paragraphs):
+    element = paragraphs[15]._element
+    element.getparent().remove(element)
+
+
+class IncrementalAnalysisTest(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = DocxValidator()
+        # Первая версия проверяется без предыдущих результатов, но с хэшами абзацев
+        self.previous = self._analyze(PATH, previous_results={})
+
+    def _analyze(self, source, previous_results=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.validator.analyze_document(source, previous_results=previous_results)
+
+    def _assert_same_as_fresh(self, source):
+        results = self._analyze(source, previous_results=self.previous)
+        expected = self._analyze(source, previous_results={})
+        self.assertEqual(results["paragraphs"], expected["paragraphs"])
+        self.assertEqual(results["summary"]["total_errors"], expected["summary"]["total_errors"])
+        return results["summary"]["incremental"]
+
+    def test_unchanged_document_reuses_everything(self):
+        incremental = self._assert_same_as_fresh(PATH)
+        self.assertEqual(incremental["reanalyzed_paragraphs"], 0)
+        self.assertEqual(incremental["reused_paragraphs"], len(self.previous["paragraphs"]))
+
+    def test_edited_paragraph(self):
+        incremental = self._assert_same_as_fresh(_revised(_edit_text))
+        self.assertGreaterEqual(incremental["reanalyzed_paragraphs"], 1)
+        self.assertGreater(incremental["reused_paragraphs"], 0)
+
+    def test_inserted_paragraph(self):
+        incremental = self._assert_same_as_fresh(_revised(_insert_paragraph))
+        self.assertGreaterEqual(incremental["reanalyzed_paragraphs"], 1)
+        self.assertGreater(incremental["reused_paragraphs"], 0)
+
+    def test_deleted_paragraph(self):
+        incremental = self._assert_same_as_fresh(_revised(_delete_paragraph))
+        self.assertGreater(incremental["reused_paragraphs"], 0)
+
+    def test_results_of_other_template_are_not_reused(self):
+        previous = dict(self.previous, template_fingerprint='другой шаблон')
+        results = self._analyze(PATH, previous_results=previous)
+        self.assertEqual(results["summary"]["incremental"]["reused_paragraphs"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Проверки очереди заданий в SQLite: выдача, продление и истечение аренды,
+неудачные попытки и возврат заданий в очередь
+"""
+import os
+import tempfile
+import time
+import unittest
+
+from jobs.sqlite_store import SQLiteJobStore
+from jobs.store import DEAD, DONE, PENDING, RUNNING
+from jobs.worker import JobWorker
+from main import DocxValidator
+
+# Срок аренды, который истекает во время проверки, с
+SHORT_LEASE = 0.05
+
+
+class SQLiteJobStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SQLiteJobStore(os.path.join(self.directory.name, 'queue.db'))
+        self.paths = []
+        for number in range(3):
+            path = os.path.join(self.directory.name, f'doc{number}.docx')
+            with open(path, 'wb') as f:
+                f.write(b'document %d' % number)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def _job(self, job_id: int):
+        return next(job for job in self.store.jobs() if job.id == job_id)
+
+    def test_enqueue_skips_duplicates(self):
+        self.assertEqual(self.store.enqueue(self.paths), 3)
+        self.assertEqual(self.store.enqueue(self.paths), 0)
+        self.assertEqual(self.store.enqueue(self.paths[:1], {"profile": "fast"}), 1)
+        self.assertEqual(self.store.counts()[PENDING], 4)
+
+    def test_claim_in_order(self):
+        self.store.enqueue(self.paths[:2])
+        first = self.store.claim('w1', 60)
+        second = self.store.claim('w2', 60)
+        self.assertEqual((first.path, first.status, first.attempts, first.worker), (self.paths[0], RUNNING, 1, 'w1'))
+        self.assertEqual(second.path, self.paths[1])
+        self.assertIsNone(self.store.claim('w3', 60))
+        self.assertEqual(self.store.counts()[RUNNING], 2)
+
+    def test_extend_only_by_owner(self):
+        self.store.enqueue(self.paths[:1])
+        job = self.store.claim('w1', 60)
+        self.assertTrue(self.store.extend(job.id, 'w1', 120))
+        self.assertGreater(self._job(job.id).lease_expires, job.lease_expires)
+        self.assertFalse(self.store.extend(job.id, 'w2', 120))
+
+    def test_expired_lease_is_claimed_again(self):
+        self.store.enqueue(self.paths[:1], max_attempts=3)
+        job = self.store.claim('w1', SHORT_LEASE)
+        self.assertIsNone(self.store.claim('w2', 60))
+        time.sleep(SHORT_LEASE * 2)
+        self.assertEqual(self.store.counts()['expired'], 1)
+
+        reclaimed = self.store.claim('w2', 60)
+        self.assertEqual((reclaimed.id, reclaimed.worker, reclaimed.attempts), (job.id, 'w2', 2))
+        # Прежний обработчик потерял аренду: его результаты не принимаются
+        self.assertFalse(self.store.extend(job.id, 'w1', 60))
+        self.assertFalse(self.store.complete(job.id, 'w1', '{}', 1.0))
+        self.assertTrue(self.store.complete(job.id, 'w2', '{"paragraphs": []}', 1.0))
+        done = self._job(job.id)
+        self.assertEqual((done.status, done.result), (DONE, '{"paragraphs": []}'))
+
+    def test_expired_lease_after_last_attempt_is_dead(self):
+        self.store.enqueue(self.paths[:1], max_attempts=1)
+        job = self.store.claim('w1', SHORT_LEASE)
+        time.sleep(SHORT_LEASE * 2)
+        self.assertIsNone(self.store.claim('w2', 60))
+        self.assertEqual(self._job(job.id).status, DEAD)
+
+    def test_fail_postpones_retry(self):
+        self.store.enqueue(self.paths[:1], max_attempts=2)
+        job = self.store.claim('w1', 60)
+        self.assertIsNone(self.store.fail(job.id, 'w2', 'чужая аренда'))
+        self.assertEqual(self.store.fail(job.id, 'w1', 'ошибка 1', retry_delay=60), PENDING)
+        # Повтор откладывается на retry_delay
+        self.assertIsNone(self.store.claim('w1', 60))
+        failed = self._job(job.id)
+        self.assertEqual((failed.status, failed.attempts, failed.error), (PENDING, 1, 'ошибка 1'))
+
+    def test_fail_without_delay_and_dead_after_max_attempts(self):
+        self.store.enqueue(self.paths[:1], max_attempts=2)
+        job = self.store.claim('w1', 60)
+        self.assertEqual(self.store.fail(job.id, 'w1', 'ошибка 1'), PENDING)
+        retry = self.store.claim('w1', 60)
+        self.assertEqual(retry.attempts, 2)
+        self.assertEqual(self.store.fail(retry.id, 'w1', 'ошибка 2'), DEAD)
+        self.assertIsNone(self.store.claim('w1', 60))
+        dead = self._job(job.id)
+        self.assertEqual((dead.status, dead.error), (DEAD, 'ошибка 2'))
+
+        self.assertEqual(self.store.requeue_dead(), 1)
+        requeued = self.store.claim('w1', 60)
+        self.assertEqual((requeued.id, requeued.attempts), (job.id, 1))
+
+    def test_release_does_not_consume_attempt(self):
+        self.store.enqueue(self.paths[:1], max_attempts=1)
+        job = self.store.claim('w1', 60)
+        self.assertFalse(self.store.release(job.id, 'w2'))
+        self.assertTrue(self.store.release(job.id, 'w1'))
+        released = self._job(job.id)
+        self.assertEqual((released.status, released.attempts, released.worker), (PENDING, 0, None))
+        self.assertEqual(self.store.claim('w2', 60).attempts, 1)
+
+
+class JobWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = SQLiteJobStore(os.path.join(self.directory.name, 'queue.db'))
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_unreadable_document_is_failed_attempt(self):
+        path = os.path.join(self.directory.name, 'broken.docx')
+        with open(path, 'wb') as f:
+            f.write(b'not a zip archive')
+        self.store.enqueue([path], {"profile": "fast"}, max_attempts=1)
+
+        worker = JobWorker(self.store, 'w1', validator_factory=DocxValidator)
+        stats = worker.run(until_empty=True)
+
+        job = next(self.store.jobs())
+        self.assertEqual((stats["done"], stats["failed"]), (0, 1))
+        self.assertEqual(job.status, DEAD)
+        self.assertIn('DocumentLoadError', job.error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+Проверки автовыбора профиля журнала по стилям документа
+"""
+import io
+import unittest
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+
+from utils.document_loader import DocumentLoader
+from validators.journal_registry import DEFAULT_JOURNAL, JournalRegistry
+
+
+def _document_with_styles(style_names) -> bytes:
+    """Документ .docx с абзацами в стилях с заданными именами"""
+    doc = Document()
+    for name in style_names:
+        doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+        doc.add_paragraph(f"Абзац в стиле {name}", style=name)
+    stream = io.BytesIO()
+    doc.save(stream)
+    return stream.getvalue()
+
+
+class JournalRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = JournalRegistry()
+
+    def _select(self, source) -> str:
+        document_info = DocumentLoader.load_document_with_formatting(source, use_cache=False)
+        return self.registry.select(document_info)
+
+    def test_a4_14pt_can_be_selected_automatically(self):
+        self.assertTrue(self.registry.can_auto_select())
+        self.assertTrue(self.registry.profiles['a4_14pt'].style_names)
+
+    def test_selects_a4_14pt_by_template_styles(self):
+        source = _document_with_styles(["Название статьи", "Аннотация статьи", "Текст статьи 14"])
+        self.assertEqual(self._select(source), 'a4_14pt')
+
+    def test_other_template_selects_default(self):
+        self.assertEqual(self._select('test.docx'), DEFAULT_JOURNAL)
+        self.assertEqual(self._select(_document_with_styles(["Мой стиль"])), DEFAULT_JOURNAL)
+
+
+if __name__ == '__main__':
+    unittest.main()
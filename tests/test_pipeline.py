@@ -0,0 +1,94 @@
+"""
+Проверки конвейера стадий: порядок результатов, передача исключения стадии
+потребителю и остановка потоков при досрочном завершении чтения
+"""
+import contextlib
+import io
+import threading
+import unittest
+
+from main import DocxValidator
+from utils.pipeline import Pipeline
+
+
+class StageError(Exception):
+    pass
+
+
+def _fail_on(value):
+    def stage(item):
+        if item == value:
+            raise StageError(f"сбой на элементе {item}")
+        return item
+    return stage
+
+
+class PipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.threads_before = threading.active_count()
+
+    def tearDown(self):
+        # Все потоки стадий завершены к моменту выхода из run()
+        self.assertEqual(threading.active_count(), self.threads_before)
+
+    def test_results_in_order(self):
+        pipeline = Pipeline([('double', lambda item: item * 2), ('increment', lambda item: item + 1)], queue_size=2)
+        self.assertEqual(list(pipeline.run(range(100))), [item * 2 + 1 for item in range(100)])
+        stats = pipeline.stats()
+        self.assertEqual(stats["items"], 100)
+        self.assertEqual(set(stats["stage_busy_time"]), {'source', 'double', 'increment'})
+
+    def test_stage_failure_reaches_consumer(self):
+        processed = []
+        pipeline = Pipeline([('first', _fail_on(5)), ('second', lambda item: processed.append(item) or item)],
+                            queue_size=1)
+        results = []
+        with self.assertRaises(StageError) as raised:
+            for item in pipeline.run(range(100)):
+                results.append(item)
+        self.assertIn("5", str(raised.exception))
+        # Элементы до сбоя получены по порядку, после сбоя следующая стадия их не видит
+        self.assertEqual(results, [0, 1, 2, 3, 4])
+        self.assertEqual(processed, [0, 1, 2, 3, 4])
+
+    def test_failure_in_last_stage(self):
+        pipeline = Pipeline([('first', lambda item: item), ('last', _fail_on(0))])
+        with self.assertRaises(StageError):
+            list(pipeline.run(range(10)))
+
+    def test_source_failure_reaches_consumer(self):
+        def source():
+            yield 1
+            raise StageError("сбой источника")
+
+        pipeline = Pipeline([('stage', lambda item: item)])
+        results = []
+        with self.assertRaises(StageError):
+            for item in pipeline.run(source()):
+                results.append(item)
+        self.assertEqual(results, [1])
+
+    def test_consumer_stops_early(self):
+        pipeline = Pipeline([('stage', lambda item: item)], queue_size=1)
+        results = pipeline.run(range(10_000))
+        self.assertEqual(next(results), 0)
+        results.close()
+        self.assertLess(pipeline.items, 10_000)
+
+
+class PipelinedAnalysisFailureTest(unittest.TestCase):
+
+    def test_classifier_failure_propagates(self):
+        validator = DocxValidator()
+
+        def classify(*args, **kwargs):
+            raise StageError("сбой классификатора")
+
+        validator.ai_classifier.classify_paragraph = classify
+        with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(StageError):
+            validator.analyze_document('test.docx', pipelined=True, queue_size=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
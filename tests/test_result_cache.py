@@ -0,0 +1,88 @@
+"""
+Проверки кэша результатов: ключ зависит от содержимого, критериев, профиля
+и режима анализа; повторная проверка того же документа берется из кэша
+"""
+import contextlib
+import io
+import tempfile
+import unittest
+
+from config.criteria import FormattingCriteria
+from main import DocxValidator
+from utils.cache import DiskCache, hash_bytes
+from validators.rule_plan import RulePlan, install_rule_plan
+
+CONTENT_HASH = hash_bytes(b'document')
+
+
+class ResultCacheKeyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = DocxValidator()
+        self.key = self.validator.result_cache_key(CONTENT_HASH)
+
+    def test_key_is_stable(self):
+        self.assertIsNotNone(self.key)
+        self.assertEqual(DocxValidator().result_cache_key(CONTENT_HASH), self.key)
+
+    def test_key_changes_with_content(self):
+        self.assertNotEqual(self.validator.result_cache_key(hash_bytes(b'other document')), self.key)
+
+    def test_key_changes_with_mode(self):
+        keys = {self.validator.result_cache_key(CONTENT_HASH, mode=mode)
+                for mode in ('full', 'streaming', 'pipelined')}
+        self.assertEqual(len(keys), 3)
+        self.assertIn(self.key, keys)
+
+    def test_key_changes_with_profile(self):
+        self.assertNotEqual(self.validator.result_cache_key(CONTENT_HASH, profile='fast'), self.key)
+
+    def test_key_changes_with_criteria(self):
+        criteria, document_requirements, version, _ = FormattingCriteria.get_state()
+        criteria = dict(criteria)
+        criteria['основной_текст'] = dict(criteria['основной_текст'], font_name='Arial')
+        install_rule_plan(RulePlan(criteria, document_requirements, version + 1, 'другие критерии'))
+        try:
+            self.assertNotEqual(self.validator.result_cache_key(CONTENT_HASH), self.key)
+        finally:
+            install_rule_plan(None)
+        self.assertEqual(self.validator.result_cache_key(CONTENT_HASH), self.key)
+
+    def test_criteria_without_fingerprint_are_not_cached(self):
+        criteria, document_requirements, version, _ = FormattingCriteria.get_state()
+        install_rule_plan(RulePlan(criteria, document_requirements, version + 1))
+        try:
+            self.assertIsNone(self.validator.result_cache_key(CONTENT_HASH))
+        finally:
+            install_rule_plan(None)
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.validator = DocxValidator()
+        self.validator.result_cache = DiskCache(directory.name)
+
+    def _analyze(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.validator.analyze_document('test.docx', profile='fast', use_result_cache=True, **kwargs)
+
+    def test_second_check_is_a_hit(self):
+        first = self._analyze()
+        second = self._analyze()
+        self.assertEqual(first["summary"]["result_cache"], "miss")
+        self.assertEqual(second["summary"]["result_cache"], "hit")
+        self.assertEqual(second["paragraphs"], first["paragraphs"])
+        self.assertEqual(second["document_errors"], first["document_errors"])
+
+    def test_other_mode_is_a_miss(self):
+        self._analyze()
+        self.assertEqual(self._analyze(streaming=True)["summary"]["result_cache"], "miss")
+        self.assertEqual(self._analyze(pipelined=True)["summary"]["result_cache"], "miss")
+        self.assertEqual(self._analyze(streaming=True)["summary"]["result_cache"], "hit")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Проверки профилировщика правил: порядок проверок по стоимости нахождения
+нарушения и остановка на первом нарушении
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from config.criteria import FormattingCriteria
+from main import DocxValidator
+from utils.document_loader import DocumentLoader
+from validators.rule_plan import FormattingChecker
+from validators.rule_profiler import RuleProfiler
+
+CLASS = 'основной_текст'
+
+
+def _names(checks):
+    return [(kind, name) for kind, name, _ in checks]
+
+
+class RuleProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = RuleProfiler()
+        self.calls = []
+
+    def _tracked(self, name, result):
+        def check(value):
+            self.calls.append(name)
+            return result
+        return check
+
+    def test_declaration_order_without_stats(self):
+        formatting = SimpleNamespace(checks=[('font_name', None), ('font_size', None)])
+        content = SimpleNamespace(rules=[('rule', None)])
+        self.assertEqual(_names(self.profiler.ordered_checks(CLASS, formatting, content)),
+                         [('formatting', 'font_name'), ('formatting', 'font_size'), ('content', 'rule')])
+
+    def test_rules_without_stats_first_then_by_cost(self):
+        formatting = SimpleNamespace(checks=[('slow', None), ('fast', None), ('new', None)])
+        for _ in range(10):
+            self.profiler.record('formatting', CLASS, 'slow', 0.01, failed=False)
+            self.profiler.record('formatting', CLASS, 'fast', 0.0001, failed=True)
+        # Статистика другого класса на порядок не влияет
+        self.profiler.record('formatting', 'заголовок', 'new', 1.0, failed=False)
+        self.assertEqual(_names(self.profiler.ordered_checks(CLASS, formatting)),
+                         [('formatting', 'new'), ('formatting', 'fast'), ('formatting', 'slow')])
+
+    def test_first_violation_stops_at_cheapest_failure(self):
+        formatting = SimpleNamespace(checks=[('passes', self._tracked('passes', None))])
+        content = SimpleNamespace(rules=[('expensive', self._tracked('expensive', False)),
+                                         ('cheap', self._tracked('cheap', False))])
+        self.profiler.record('content', CLASS, 'expensive', 0.1, failed=True)
+        self.profiler.record('content', CLASS, 'cheap', 0.0001, failed=True)
+        self.profiler.record('formatting', CLASS, 'passes', 0.00001, failed=False)
+
+        error = self.profiler.first_violation(CLASS, {'text': 'Текст'}, formatting, content)
+        self.assertIsNotNone(error)
+        # Дешевое и часто срабатывающее правило проверяется первым, остальные не выполняются
+        self.assertEqual(self.calls, ['cheap'])
+
+    def test_no_violation(self):
+        content = SimpleNamespace(rules=[('ok', self._tracked('ok', True))])
+        self.assertIsNone(self.profiler.first_violation(CLASS, {'text': 'Текст'}, None, content))
+        self.assertEqual(self.calls, ['ok'])
+
+    def test_raising_rule_is_violation_and_error(self):
+        def broken(text):
+            raise RuntimeError("сбой правила")
+
+        content = SimpleNamespace(rules=[('broken', broken)])
+        self.assertIsNotNone(self.profiler.first_violation(CLASS, {'text': 'Текст'}, None, content))
+        [stats] = self.profiler.hottest()
+        self.assertEqual((stats['rule'], stats['calls'], stats['fail_rate'], stats['errors']), ('broken', 1, 1.0, 1))
+
+    def test_first_violation_is_one_of_all_errors(self):
+        paragraphs = DocumentLoader.load_document_with_formatting('test.docx', use_cache=False)['paragraphs']
+        for name in FormattingCriteria.get_all_classes():
+            criteria = FormattingCriteria.get_criteria(name)
+            if not criteria:
+                continue
+            checker = FormattingChecker(criteria)
+            for para_info in paragraphs:
+                errors = checker.check(para_info)
+                error = self.profiler.first_violation(name, para_info, checker)
+                if errors:
+                    self.assertIn(error, errors)
+                else:
+                    self.assertIsNone(error)
+
+    def test_save_and_load_accumulate(self):
+        self.profiler.record('formatting', CLASS, 'font_name', 0.5, failed=True)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.json')
+            self.profiler.save(path)
+            loaded = RuleProfiler()
+            loaded.load(path)
+            loaded.load(path)
+        [stats] = loaded.hottest()
+        self.assertEqual((stats['calls'], stats['fail_rate']), (2, 1.0))
+        self.assertAlmostEqual(stats['total_ms'], 1000.0)
+
+    def test_check_compliance_reports_first_violation(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = DocxValidator().check_compliance('test.docx', profiler=self.profiler)
+        self.assertFalse(result["compliant"])
+        self.assertIsNotNone(result["violation"]["error"])
+        self.assertGreater(result["checked_paragraphs"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
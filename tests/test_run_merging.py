@@ -0,0 +1,70 @@
+"""
+Проверки объединения соседних runs: разрешенные свойства абзацев и каждого
+символа текста те же, что и при разборе runs по одному
+"""
+import io
+import unittest
+from unittest import mock
+
+from docx import Document
+from docx.oxml.ns import qn
+
+from utils.document_loader import DocumentLoader
+
+# Поля записи абзаца, которые зависят от числа runs, а не от оформления
+RUN_FIELDS = ('runs_info', 'run_counts', 'debug_info')
+
+
+def _without_merging(runs):
+    return [(run, run.text) for run in runs]
+
+
+def _characters(para_info):
+    """Разрешенные свойства каждого символа абзаца"""
+    return [(char, run['font'], run['size'], run['bold'], run['italic'])
+            for run in para_info['runs_info'] for char in run['text']]
+
+
+def _load(source):
+    return DocumentLoader.load_document_with_formatting(source, use_cache=False)['paragraphs']
+
+
+class RunMergingTest(unittest.TestCase):
+
+    def _assert_same_as_unmerged(self, source):
+        merged = _load(source)
+        with mock.patch.object(DocumentLoader, '_merge_runs', staticmethod(_without_merging)):
+            separate = _load(source)
+        self.assertEqual(len(merged), len(separate))
+        for merged_info, separate_info in zip(merged, separate):
+            self.assertEqual({key: value for key, value in merged_info.items() if key not in RUN_FIELDS},
+                             {key: value for key, value in separate_info.items() if key not in RUN_FIELDS})
+            self.assertEqual(_characters(merged_info), _characters(separate_info))
+        return merged
+
+    def test_document_resolution_unchanged(self):
+        paragraphs = self._assert_same_as_unmerged('test.docx')
+        before = sum(para['run_counts'][0] for para in paragraphs)
+        after = sum(para['run_counts'][1] for para in paragraphs)
+        self.assertLess(after, before)
+
+    def test_only_identical_formatting_is_merged(self):
+        doc = Document()
+        para = doc.add_paragraph()
+        for text in ('Первый ', 'фрагмент ', 'текста'):
+            run = para.add_run(text)
+            # Разметка редакций не влияет на оформление
+            run._element.get_or_add_rPr().set(qn('w:rsidR'), '00A1B2C3')
+        para.add_run(' жирный').bold = True
+        para.add_run(' обычный')
+        stream = io.BytesIO()
+        doc.save(stream)
+
+        [para_info] = self._assert_same_as_unmerged(stream.getvalue())
+        self.assertEqual(para_info['run_counts'], (5, 3))
+        self.assertEqual([run['text'] for run in para_info['runs_info']],
+                         ['Первый фрагмент текста', ' жирный', ' обычный'])
+
+
+if __name__ == '__main__':
+    unittest.main()
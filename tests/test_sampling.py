@@ -0,0 +1,79 @@
+"""
+Проверки выборки абзацев и интервала Уилсона
+"""
+import unittest
+
+from utils.sampling import SAMPLE_STRATEGIES, choose_sample, wilson_interval
+
+
+class WilsonIntervalTest(unittest.TestCase):
+
+    def assertInterval(self, actual, expected):
+        self.assertAlmostEqual(actual[0], expected[0], places=4)
+        self.assertAlmostEqual(actual[1], expected[1], places=4)
+
+    def test_known_values(self):
+        self.assertInterval(wilson_interval(5, 10), (0.2366, 0.7634))
+        self.assertInterval(wilson_interval(0, 10), (0.0, 0.2775))
+        self.assertInterval(wilson_interval(10, 10), (0.7225, 1.0))
+        self.assertInterval(wilson_interval(1, 100), (0.0018, 0.0545))
+
+    def test_no_trials(self):
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
+
+    def test_contains_observed_rate(self):
+        for successes in range(0, 21):
+            low, high = wilson_interval(successes, 20)
+            self.assertLessEqual(low, successes / 20 + 1e-12)
+            self.assertGreaterEqual(high, successes / 20 - 1e-12)
+            self.assertTrue(0.0 <= low <= high <= 1.0)
+
+    def test_higher_confidence_is_wider(self):
+        low_90, high_90 = wilson_interval(7, 40, confidence=0.90)
+        low_99, high_99 = wilson_interval(7, 40, confidence=0.99)
+        self.assertLess(low_99, low_90)
+        self.assertGreater(high_99, high_90)
+
+    def test_finite_population_correction(self):
+        low, high = wilson_interval(7, 40)
+        low_fpc, high_fpc = wilson_interval(7, 40, population=50)
+        self.assertGreater(low_fpc, low)
+        self.assertLess(high_fpc, high)
+        # Большая совокупность почти не меняет интервал
+        self.assertInterval(wilson_interval(7, 40, population=10 ** 9), (low, high))
+
+    def test_whole_population_is_exact(self):
+        self.assertEqual(wilson_interval(3, 12, population=12), (0.25, 0.25))
+
+
+class ChooseSampleTest(unittest.TestCase):
+
+    def test_sample_properties(self):
+        for strategy in SAMPLE_STRATEGIES:
+            for population, size in ((100, 10), (37, 36), (1000, 1)):
+                with self.subTest(strategy=strategy, population=population, size=size):
+                    sample = choose_sample(population, size, strategy, seed=1)
+                    self.assertEqual(len(sample), size)
+                    self.assertEqual(sample, sorted(set(sample)))
+                    self.assertTrue(all(0 <= position < population for position in sample))
+
+    def test_seed_is_reproducible(self):
+        for strategy in SAMPLE_STRATEGIES:
+            self.assertEqual(choose_sample(500, 20, strategy, seed=7), choose_sample(500, 20, strategy, seed=7))
+
+    def test_stratified_covers_document(self):
+        sample = choose_sample(100, 10, 'stratified', seed=3)
+        self.assertEqual([position // 10 for position in sample], list(range(10)))
+
+    def test_small_population_and_empty_sample(self):
+        self.assertEqual(choose_sample(5, 10), [0, 1, 2, 3, 4])
+        self.assertEqual(choose_sample(5, 5, 'random'), [0, 1, 2, 3, 4])
+        self.assertEqual(choose_sample(5, 0), [])
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            choose_sample(10, 5, 'systematic')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Проверки HTTP-обработчика сервиса: ошибки до чтения тела запроса закрывают
+соединение, ошибки присланного документа отличаются от сбоев анализа
+"""
+import http.client
+import json
+import threading
+import unittest
+from functools import partial
+
+from main import DocxValidator
+from service.server import ValidationService, create_server
+
+
+class ServiceHandlerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = ValidationService(workers=1, validator_factory=partial(DocxValidator, verbose=False))
+        cls.server = create_server(cls.service, port=0)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.service.shutdown()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=30)
+
+    def _post(self, connection, path: str, body: bytes, headers=None):
+        connection.request('POST', path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response, json.loads(response.read().decode('utf-8'))
+
+    def test_unknown_path_closes_connection(self):
+        connection = self._connection()
+        response, payload = self._post(connection, '/unknown', b'GET /status HTTP/1.1\r\n\r\n')
+        self.assertEqual(response.status, 404)
+        self.assertIn('error', payload)
+        self.assertEqual(response.getheader('Connection'), 'close')
+        connection.close()
+
+    def test_negative_content_length_is_bad_request(self):
+        connection = self._connection()
+        connection.putrequest('POST', '/analyze')
+        connection.putheader('Content-Length', '-5')
+        connection.endheaders()
+        response = connection.getresponse()
+        payload = json.loads(response.read().decode('utf-8'))
+        self.assertEqual(response.status, 400)
+        self.assertNotEqual(payload['error'], "Пустой документ")
+        self.assertEqual(response.getheader('Connection'), 'close')
+        connection.close()
+
+    def test_undecodable_document_is_client_error(self):
+        connection = self._connection()
+        response, payload = self._post(connection, '/analyze?profile=fast&use_result_cache=0',
+                                       b'not a docx document')
+        self.assertEqual(response.status, 422)
+        self.assertIn('error', payload)
+        # Тело прочитано целиком, поэтому соединение можно использовать дальше
+        connection.request('GET', '/status')
+        status = connection.getresponse()
+        self.assertEqual(status.status, 200)
+        status.read()
+        connection.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Проверки потокового анализа: результат совпадает с полным анализом, пиковая
+память процесса не выходит за memory_limit_mb на большом документе
+"""
+import contextlib
+import copy
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from docx import Document
+from docx.oxml.ns import qn
+
+from main import DocxValidator
+from utils.document_loader import DocumentLoader, DocumentLoadError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Сколько раз повторяется основной текст test.docx в большом документе
+REPEAT = 50
+# Допустимый прирост памяти при анализе большого документа сверх памяти после импорта, МБ.
+# Полная загрузка того же документа занимает заметно больше
+MEMORY_HEADROOM_MB = 32
+
+# Анализ в отдельном процессе: пиковая память учитывается для всего процесса
+_CHILD = '''
+import contextlib, json, sys
+from utils.memory import get_rss_mb
+from main import DocxValidator
+limit = get_rss_mb() + float(sys.argv[2])
+with contextlib.redirect_stdout(sys.stderr):
+    results = DocxValidator().analyze_document(sys.argv[1], streaming=True, window_size=50, memory_limit_mb=limit)
+print(json.dumps(dict(results["summary"]["streaming"], total_paragraphs=results["summary"]["total_paragraphs"])))
+'''
+
+
+def _comparable(results):
+    """Результаты без сводок, зависящих от режима и кэшей"""
+    summary = dict(results["summary"])
+    for key in ('streaming', 'template_cache', 'formatting_memo', 'result_cache'):
+        summary.pop(key, None)
+    return json.dumps(dict(results, summary=summary), default=str, sort_keys=True)
+
+
+class StreamingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        doc = Document(os.path.join(ROOT, 'test.docx'))
+        body = doc.element.body
+        paragraphs = list(body.iterchildren(qn('w:p')))
+        section = body.find(qn('w:sectPr'))
+        for _ in range(REPEAT - 1):
+            for paragraph in paragraphs:
+                section.addprevious(copy.deepcopy(paragraph))
+        cls.large = os.path.join(cls.directory.name, 'large.docx')
+        doc.save(cls.large)
+        cls.large_paragraphs = len(DocumentLoader.load_document_with_formatting(
+            'test.docx', use_cache=False)['paragraphs']) * REPEAT
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_same_as_full_analysis(self):
+        validator = DocxValidator()
+        with open('test.docx', 'rb') as f:
+            data = f.read()
+        with contextlib.redirect_stdout(io.StringIO()):
+            full = validator.analyze_document('test.docx')
+            streamed = [validator.analyze_document(source, streaming=True, window_size=3)
+                        for source in ('test.docx', data)]
+        for results in streamed:
+            self.assertEqual(_comparable(results), _comparable(full))
+
+    def test_document_properties_known_after_iteration(self):
+        expected = DocumentLoader.load_document_with_formatting('test.docx', use_cache=False)
+        document_info, paragraphs = DocumentLoader.stream_document_body('test.docx')
+        self.assertEqual(sum(1 for _ in paragraphs), len(expected['paragraphs']))
+        self.assertEqual(document_info['document_properties'], expected['document_properties'])
+        self.assertEqual(document_info['page_count'], expected['page_count'])
+
+    def test_not_a_document(self):
+        with self.assertRaises(DocumentLoadError):
+            DocumentLoader.stream_document_body(b'not a docx document')
+
+    def test_peak_memory_within_limit(self):
+        env = dict(os.environ, DOCX_VALIDATOR_CACHE_DIR=self.directory.name)
+        completed = subprocess.run([sys.executable, '-c', _CHILD, self.large, str(MEMORY_HEADROOM_MB)],
+                                   cwd=ROOT, env=env, capture_output=True, text=True, timeout=300)
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        streaming = json.loads(completed.stdout.strip().splitlines()[-1])
+        self.assertEqual(streaming["total_paragraphs"], self.large_paragraphs)
+        self.assertFalse(streaming["memory_limit_exceeded"])
+        self.assertLessEqual(streaming["peak_rss_mb"], streaming["memory_limit_mb"])
+
+
+if __name__ == '__main__':
+    unittest.main()
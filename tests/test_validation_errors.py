@@ -0,0 +1,56 @@
+"""
+Проверки ошибок проверки: сохранение через pickle и JSON без потери кода,
+номера абзаца и текста сообщения
+"""
+import contextlib
+import io
+import json
+import pickle
+import unittest
+
+from main import DocxValidator
+from validators.errors import ErrorCode, ValidationError
+
+
+class ValidationErrorTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = DocxValidator().analyze_document('test.docx')
+        cls.errors = [error for paragraph in results["paragraphs"]
+                      for error in paragraph["formatting_errors"] + paragraph["content_errors"]]
+        cls.errors += results["document_errors"]
+
+    def test_document_has_errors(self):
+        self.assertTrue(self.errors)
+
+    def test_pickle_round_trip(self):
+        restored = pickle.loads(pickle.dumps(self.errors, protocol=pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(restored, self.errors)
+        self.assertEqual([str(error) for error in restored], [str(error) for error in self.errors])
+        self.assertTrue(all(type(error.code) is ErrorCode for error in restored))
+
+    def test_json_round_trip(self):
+        payload = json.dumps([error.to_dict() for error in self.errors])
+        restored = [ValidationError.from_dict(data) for data in json.loads(payload)]
+        self.assertEqual(restored, self.errors)
+        self.assertEqual([str(error) for error in restored], [str(error) for error in self.errors])
+
+    def test_document_error_without_index(self):
+        error = ValidationError(ErrorCode.PAGE_COUNT, None, (3, 5))
+        data = error.to_dict()
+        self.assertEqual(data, {'code': 'PAGE_COUNT', 'index': None, 'params': [3, 5]})
+        self.assertEqual(ValidationError.from_dict(data), error)
+        self.assertEqual(pickle.loads(pickle.dumps(error)), error)
+
+    def test_with_index(self):
+        error = ValidationError(ErrorCode.PAGE_COUNT, None, (3, 5))
+        moved = error.with_index(7)
+        self.assertEqual(moved.index, 7)
+        self.assertEqual(str(moved), str(error))
+        self.assertNotEqual(moved, error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,296 @@
+"""
+Кэши для повторного использования результатов разбора документов
+"""
+import hashlib
+import os
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from stat import S_IWGRP, S_IWOTH
+from typing import Any, Callable, Dict, Optional
+
+# Каталог кэша по умолчанию, можно переопределить переменной окружения
+DEFAULT_CACHE_DIR = os.environ.get(
+    'DOCX_VALIDATOR_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.docx_validator_cache')
+)
+
+# Владелец каталогов и записей дискового кэша (None - система без uid, Windows)
+_OWNER_UID = os.getuid() if hasattr(os, 'getuid') else None
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+
+def hash_bytes(*chunks) -> str:
+    """SHA-256 от последовательности байтовых фрагментов"""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        if chunk:
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Потокобезопасный LRU-кэш в памяти процесса"""
+
+    def __init__(self, max_items: int = 64):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default=None):
+        """Получение значения с обновлением порядка использования"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: str, value: Any):
+        """Сохранение значения с вытеснением самых старых записей"""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        """Очистка кэша"""
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class DiskCache:
+    """Кэш на диске: одна запись - один файл со сжатым pickle.
+
+    Время изменения файла - момент записи (для срока жизни ttl), время
+    доступа обновляется при чтении (для вытеснения давно не использованных).
+
+    Чтение pickle может выполнить код, поэтому каталог создается с правами 0700,
+    записи - с правами 0600, а кэш в каталоге другого пользователя или
+    доступном на запись группе и остальным отключается. Записи, владелец
+    которых не текущий пользователь, не читаются.
+    """
+
+    FILE_SUFFIX = '.bin'
+
+    def __init__(self, directory: str, max_size_bytes: int = 256 * 1024 * 1024, ttl: Optional[float] = None):
+        self.directory = directory
+        self.max_size_bytes = max_size_bytes
+        # Срок жизни записи, с (None - без ограничения)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._total_size = None
+        # Результат проверки каталога (None - еще не проверялся)
+        self._trusted = None
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.FILE_SUFFIX}")
+
+    def _directory_trusted(self) -> bool:
+        """Создание каталога и проверка, что кэшу в нем можно доверять"""
+        if self._trusted is None:
+            try:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                info = os.stat(self.directory)
+            except OSError as e:
+                print(f"Каталог кэша {self.directory} недоступен: {e}")
+                self._trusted = False
+                return False
+            self._trusted = self._owned(info) and not info.st_mode & (S_IWGRP | S_IWOTH)
+            if not self._trusted:
+                print(f"Кэш {self.directory} отключен: каталог принадлежит другому пользователю "
+                      f"или доступен на запись другим")
+        return self._trusted
+
+    @staticmethod
+    def _owned(info: os.stat_result) -> bool:
+        return _OWNER_UID is None or info.st_uid == _OWNER_UID
+
+    def get(self, key: str):
+        """Чтение записи: одно чтение файла и десериализация"""
+        if not self._directory_trusted():
+            self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                info = os.fstat(f.fileno())
+                if not self._owned(info):
+                    raise ValueError("владелец записи - другой пользователь")
+                written_at = info.st_mtime
+                expired = self._expired(written_at, time.time())
+                data = None if expired else f.read()
+            if expired:
+                self._remove(path)
+                self.misses += 1
+                return None
+            value = pickle.loads(zlib.decompress(data))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"Поврежденная запись кэша {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        # Обновляем время доступа для вытеснения по давности использования,
+        # время записи сохраняется
+        try:
+            os.utime(path, (time.time(), written_at))
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any):
+        """Атомарная запись значения с контролем общего размера"""
+        try:
+            data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 6)
+        except Exception as e:
+            print(f"Не удалось сериализовать запись кэша: {e}")
+            return
+
+        if len(data) > self.max_size_bytes or not self._directory_trusted():
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with os.fdopen(os.open(tmp_path, _WRITE_FLAGS, 0o600), 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Не удалось записать кэш {path}: {e}")
+            self._remove(tmp_path)
+            return
+
+        with self._lock:
+            if self._total_size is not None:
+                self._total_size += len(data)
+            self._evict_if_needed()
+
+    def _expired(self, written_at: float, now: float) -> bool:
+        return self.ttl is not None and now - written_at > self.ttl
+
+    def _evict_if_needed(self):
+        """Удаление давно не использованных записей при превышении лимита"""
+        if self._total_size is None:
+            self._total_size = sum(size for _, size, _, _ in self._scan())
+        if self._total_size <= self.max_size_bytes:
+            return
+
+        # Сначала удаляются записи с истекшим сроком, затем давно не использованные
+        now = time.time()
+        entries = sorted(self._scan(), key=lambda entry: (not self._expired(entry[3], now), entry[2]))
+        for path, size, _, _ in entries:
+            if self._total_size <= self.max_size_bytes:
+                break
+            if self._remove(path):
+                self._total_size -= size
+
+    def purge_expired(self) -> int:
+        """Удаление записей с истекшим сроком; число удаленных записей"""
+        if self.ttl is None:
+            return 0
+        removed = 0
+        now = time.time()
+        with self._lock:
+            for path, size, _, written_at in self._scan():
+                if self._expired(written_at, now) and self._remove(path):
+                    removed += 1
+                    if self._total_size is not None:
+                        self._total_size -= size
+        return removed
+
+    def _scan(self):
+        """Список записей кэша: (путь, размер, время последнего доступа, время записи)"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(self.FILE_SUFFIX):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((entry.path, stat.st_size, stat.st_atime, stat.st_mtime))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def clear(self):
+        """Удаление всех записей"""
+        with self._lock:
+            for path, _, _, _ in self._scan():
+                self._remove(path)
+            self._total_size = 0
+
+
+class TieredCache:
+    """Двухуровневый кэш: LRU в памяти поверх кэша на диске"""
+
+    def __init__(self, memory: LRUCache, disk: Optional[DiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+        # Счетчики общие для всех потоков процесса
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]):
+        """Получение значения из кэша или его вычисление и сохранение"""
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value, 'memory'
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self._count('disk_hits')
+                self.memory.put(key, value)
+                return value, 'disk'
+
+        self._count('misses')
+        value = compute()
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+        return value, None
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get_stats(self) -> Dict:
+        """Статистика попаданий за все время работы процесса"""
+        with self._lock:
+            memory_hits, disk_hits, misses = self.memory_hits, self.disk_hits, self.misses
+        total = memory_hits + disk_hits + misses
+        return {
+            'memory_hits': memory_hits,
+            'disk_hits': disk_hits,
+            'misses': misses,
+            'hit_rate': round((memory_hits + disk_hits) / total, 3) if total else 0.0
+        }
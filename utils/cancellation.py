@@ -0,0 +1,104 @@
+"""
+Кооперативная отмена анализа и ограничение времени на документ
+"""
+import threading
+import time
+import weakref
+from typing import Optional
+
+# Причины остановки анализа
+CANCELLED = 'cancelled'
+TIME_BUDGET = 'time_budget'
+
+
+class OperationCancelled(Exception):
+    """Операция остановлена отменой или по истечении времени"""
+
+
+class CancellationToken:
+    """Признак остановки, который проверяют циклы загрузки, анализа и классификации.
+
+    Анализ останавливается вызовом cancel() из другого потока (кнопка "Стоп")
+    или по истечении бюджета времени. Ожидания между повторами запросов
+    выполняются через wait(), поэтому прерываются сразу при отмене.
+
+    Дочерний признак (child) останавливается вместе с родительским, а его
+    собственные отмена и бюджет времени на родительский не влияют: так анализ
+    документа ограничивает свое время, не изменяя признак вызывающего кода.
+    """
+
+    def __init__(self, time_budget: Optional[float] = None, parent: Optional['CancellationToken'] = None):
+        self._event = threading.Event()
+        self._reason: Optional[str] = None
+        self.deadline: Optional[float] = None
+        self._parent = parent
+        self._children = weakref.WeakSet()
+        self._lock = threading.Lock()
+        if time_budget is not None:
+            self.set_time_budget(time_budget)
+        if parent is not None:
+            parent._add_child(self)
+
+    def child(self, time_budget: Optional[float] = None) -> 'CancellationToken':
+        """Дочерний признак со своим бюджетом времени"""
+        return CancellationToken(time_budget, parent=self)
+
+    def _add_child(self, child: 'CancellationToken'):
+        with self._lock:
+            self._children.add(child)
+        # Отмена могла произойти до регистрации дочернего признака
+        if self._event.is_set():
+            child.cancel(self._reason or CANCELLED)
+
+    def set_time_budget(self, seconds: float):
+        """Ограничение времени, отсчитываемое с текущего момента"""
+        self.deadline = time.monotonic() + max(0.0, seconds)
+
+    def cancel(self, reason: str = CANCELLED):
+        """Запрос остановки; останавливает и дочерние признаки"""
+        if self._reason is None:
+            self._reason = reason
+        self._event.set()
+        with self._lock:
+            children = list(self._children)
+        for child in children:
+            child.cancel(self._reason)
+
+    def remaining(self) -> Optional[float]:
+        """Оставшееся время бюджета с учетом родительского, с (None - без ограничения)"""
+        remaining = None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+        parent_remaining = self._parent.remaining() if self._parent is not None else None
+        if parent_remaining is None:
+            return remaining
+        return parent_remaining if remaining is None else min(remaining, parent_remaining)
+
+    def is_stopped(self) -> bool:
+        """Нужно ли прекратить работу"""
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(TIME_BUDGET)
+            return True
+        if self._parent is not None and self._parent.is_stopped():
+            self.cancel(self._parent.reason)
+            return True
+        return False
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Причина остановки: CANCELLED, TIME_BUDGET или None"""
+        self.is_stopped()
+        return self._reason
+
+    def check(self):
+        """Исключение OperationCancelled, если работа должна быть прекращена"""
+        if self.is_stopped():
+            raise OperationCancelled(self._reason)
+
+    def wait(self, seconds: float) -> bool:
+        """Пауза, прерываемая отменой и истечением бюджета; True - пауза прервана"""
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            self._event.wait(remaining)
+            return self.is_stopped()
+        return self._event.wait(seconds) or self.is_stopped()
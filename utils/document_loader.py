@@ -1,17 +1,59 @@
 """
 Утилиты для загрузки и обработки документов Word с расширенной информацией
 """
+import copy
+import hashlib
+import io
+import os
+import zipfile
+from contextlib import ExitStack
 from docx import Document
 from docx.shared import Pt, Cm
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from collections import Counter
 from docx.oxml import parse_xml
 from docx.oxml.ns import qn
+from docx.oxml.parser import element_class_lookup
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.text.paragraph import Paragraph
+from lxml import etree
+from utils.cache import LRUCache, DiskCache, TieredCache, DEFAULT_CACHE_DIR, hash_bytes
+from utils.document_source import DocumentSource, BufferReader, open_document_buffer
+from utils.cancellation import CancellationToken
+
+
+class DocumentLoadError(Exception):
+    """Файл не удалось прочитать как документ .docx"""
+
+
+class _PartParent:
+    """Родитель для абзацев вне основного текста: нужен python-docx для доступа к части"""
+
+    def __init__(self, part):
+        self.part = part
+
 
 class DocumentLoader:
     """Класс для загрузки документов Word с сохранением форматирования"""
 
+    # Разобранные шрифты темы и таблицы стилей по отпечатку styles.xml и темы.
+    # Большинство статей оформлено по нескольким шаблонам журналов.
+    template_cache = TieredCache(
+        LRUCache(max_items=32),
+        DiskCache(os.path.join(DEFAULT_CACHE_DIR, 'templates'), max_size_bytes=16 * 1024 * 1024)
+    )
+
+    # Версия формата извлекаемых данных: увеличивать при любом изменении
+    # результата _extract_paragraph_info, чтобы не читать устаревший кэш
+    LOADER_VERSION = 3
+
+    # Части документа в порядке их следования в общем потоке абзацев
+    DOCUMENT_PARTS = ('body', 'tables', 'headers', 'footers', 'footnotes')
+
+    # Разобранные документы по хэшу содержимого файла
+    document_cache = DiskCache(os.path.join(DEFAULT_CACHE_DIR, 'documents'), max_size_bytes=512 * 1024 * 1024)
+
     @staticmethod
     def _get_alignment_name(alignment) -> str:
         """Получение названия выравнивания"""
@@ -59,56 +101,436 @@ class DocumentLoader:
         return None
 
     @staticmethod
-    def load_document_with_formatting(file_path: str) -> Dict:
-        """Загрузка документа с полной информацией о форматировании"""
+    def load_document_with_formatting(source: DocumentSource, use_cache: bool = True,
+                                      parts: Tuple[str, ...] = ('body',),
+                                      cancel_token: Optional[CancellationToken] = None,
+                                      include_debug: bool = True) -> Dict:
+        """Загрузка документа с полной информацией о форматировании
+
+        Args:
+            source: Путь к файлу, байты, файловый объект или mmap с содержимым .docx
+            use_cache: Использовать кэш разобранных документов на диске
+            parts: Части документа для разбора ('body', 'tables', 'headers',
+                'footers', 'footnotes'); части разбираются по очереди в этом порядке
+            cancel_token: Признак отмены; после отмены форматирование оставшихся
+                абзацев не извлекается, они помечаются 'unprocessed', а документ
+                не сохраняется в кэш
+            include_debug: Сохранять отладочные сведения о шрифтах и XML абзацев
+
+        Если файл не является документом .docx, выбрасывается DocumentLoadError
+        (пустой документ вместо ошибки выглядел бы успешной проверкой); ошибки
+        чтения файла (OSError) передаются как есть.
+        """
+        parts = tuple(part for part in DocumentLoader.DOCUMENT_PARTS if part in parts) or ('body',)
         try:
-            doc = Document(file_path)
+            with open_document_buffer(source) as buffer:
+                if not use_cache:
+                    return DocumentLoader._parse_document(buffer, parts, cancel_token, include_debug)
+
+                # Повторная загрузка того же файла - одно чтение и десериализация
+                cache_key = f"{hash_bytes(buffer)}-v{DocumentLoader.LOADER_VERSION}-{'+'.join(parts)}"
+                if not include_debug:
+                    cache_key += '-nodebug'
+                document_info = DocumentLoader.document_cache.get(cache_key)
+                if document_info is not None:
+                    # Шаблон не разбирался: документ целиком взят из кэша
+                    document_info['template_cache'] = DocumentLoader._template_cache_info('document')
+                    document_info['document_cache'] = 'hit'
+                    return document_info
+
+                document_info = DocumentLoader._parse_document(buffer, parts, cancel_token, include_debug)
+                if document_info.get('cancelled'):
+                    return document_info
+                DocumentLoader.document_cache.put(
+                    cache_key, {k: v for k, v in document_info.items() if k != 'template_cache'}
+                )
+                document_info['document_cache'] = 'miss'
+                return document_info
+        except (OSError, DocumentLoadError):
+            # Недоступный файл - обычная ошибка ввода-вывода (FileNotFoundError и т.п.)
+            raise
+        except Exception as e:
+            raise DocumentLoadError(f"Ошибка чтения файла: {e}") from e
+
+    @staticmethod
+    def _parse_document(buffer, parts: Tuple[str, ...] = ('body',),
+                        cancel_token: Optional[CancellationToken] = None, include_debug: bool = True) -> Dict:
+        """Разбор содержимого .docx с извлечением форматирования абзацев"""
+        doc = DocumentLoader._open_document(buffer)
+        document_info = DocumentLoader._get_document_header(doc)
+
+        for part in parts:
+            document_info['paragraphs'].extend(
+                DocumentLoader._extract_part(doc, part, document_info, cancel_token, include_debug)
+            )
+
+        document_info['run_stats'] = DocumentLoader._get_run_stats(document_info['paragraphs'])
+        if cancel_token is not None and cancel_token.is_stopped():
+            document_info['cancelled'] = True
+        return document_info
 
-            # Получаем тему документа для определения шрифтов по умолчанию
-            theme_fonts = DocumentLoader._get_theme_fonts(doc)
+    @staticmethod
+    def _get_run_stats(paragraphs: List[Dict]) -> Dict:
+        """Число runs до и после объединения одинаково оформленных соседей"""
+        before = sum(para['run_counts'][0] for para in paragraphs if 'run_counts' in para)
+        after = sum(para['run_counts'][1] for para in paragraphs if 'run_counts' in para)
+        return {
+            'runs_before': before,
+            'runs_after': after,
+            'merge_ratio': round(before / after, 2) if after else 1.0
+        }
+
+    @staticmethod
+    def _extract_part(doc, part: str, document_info: Dict, cancel_token: Optional[CancellationToken] = None,
+                      include_debug: bool = True) -> List[Dict]:
+        """Извлечение информации об абзацах одной части документа"""
+        paragraphs = []
+        for i, para in DocumentLoader._iter_part_paragraphs(doc, part):
+            if cancel_token is not None and cancel_token.is_stopped():
+                # Только текст: абзац попадет в результаты как непроверенный
+                paragraphs.append({'text': para.text, 'index': i, 'part': part, 'unprocessed': True})
+                continue
+            para_info = DocumentLoader._extract_paragraph_info(para, i, document_info, include_debug)
+            para_info['part'] = part
+            paragraphs.append(para_info)
+        return paragraphs
+
+    @staticmethod
+    def _iter_part_paragraphs(doc, part: str) -> Iterator[Tuple[int, Paragraph]]:
+        """Непустые абзацы части документа с их номерами внутри части"""
+        if part == 'body':
+            yield from DocumentLoader._iter_body_paragraphs(doc)
+            return
+
+        if part == 'tables':
+            # Ячейки таблиц, включая вложенные таблицы
+            sources = [(doc._body, tbl) for tbl in doc.element.body.iterchildren(qn('w:tbl'))]
+        else:
+            reltype = {'headers': RT.HEADER, 'footers': RT.FOOTER, 'footnotes': RT.FOOTNOTES}[part]
+            sources = []
+            for rel in sorted(doc.part.rels.values(), key=lambda rel: int(rel.rId[3:]) if rel.rId[3:].isdigit() else 0):
+                if rel.is_external or rel.reltype != reltype:
+                    continue
+                related = rel.target_part
+                element = getattr(related, 'element', None)
+                if element is None:
+                    # Сноски python-docx не разбирает - разбираем XML части сами
+                    element = parse_xml(related.blob)
+                    related = doc.part
+                sources.append((_PartParent(related), element))
+
+        index = 0
+        for parent, element in sources:
+            for p in element.iter(qn('w:p')):
+                para = Paragraph(p, parent)
+                if para.text.strip():
+                    yield index, para
+                index += 1
+
+    @staticmethod
+    def open_document_stream(source: DocumentSource, include_debug: bool = True) -> Tuple[Dict, Iterator[Dict]]:
+        """Открытие документа для потоковой обработки абзацев
 
-            # Убираем принудительную замену Calibri
-            default_font = theme_fonts.get('minor', {}).get('latin', 'Times New Roman')
+        Возвращает общую информацию о документе (без абзацев) и генератор,
+        извлекающий информацию об абзацах по одному, по мере запроса.
+        """
+        with open_document_buffer(source) as buffer:
+            doc = DocumentLoader._open_document(buffer)
+        document_info = DocumentLoader._get_document_header(doc)
+        return document_info, DocumentLoader._iter_paragraph_infos(doc, document_info, include_debug)
 
-            document_info = {
-                'paragraphs': [],
-                'document_properties': DocumentLoader._get_document_properties(doc),
-                'page_count': DocumentLoader._estimate_page_count(doc),
-                'default_font': default_font,
-                'theme_fonts': theme_fonts,
+    @staticmethod
+    def _get_document_header(doc) -> Dict:
+        """Общая информация о документе: свойства, шрифты темы, стили"""
+        # Шрифты темы и стили берем из кэша шаблонов, если шаблон уже встречался
+        template_info = DocumentLoader._get_template_info(doc)
+        theme_fonts = template_info['theme_fonts']
+
+        # Убираем принудительную замену Calibri
+        default_font = theme_fonts.get('minor', {}).get('latin', 'Times New Roman')
+
+        return {
+            'paragraphs': [],
+            'document_properties': DocumentLoader._get_document_properties(doc),
+            'page_count': DocumentLoader._estimate_page_count(doc),
+            'default_font': default_font,
+            'theme_fonts': theme_fonts,
+            'styles_info': template_info['styles_info'],
+            'template_fingerprint': template_info['fingerprint'],
+            'template_cache': template_info['cache_stats']
+        }
+
+    @staticmethod
+    def _iter_paragraph_infos(doc, document_info: Dict, include_debug: bool = True) -> Iterator[Dict]:
+        """Ленивый обход непустых абзацев основного текста"""
+        for i, para in DocumentLoader._iter_body_paragraphs(doc):
+            para_info = DocumentLoader._extract_paragraph_info(para, i, document_info, include_debug)
+            para_info['part'] = 'body'
+            yield para_info
+
+    @staticmethod
+    def _iter_body_paragraphs(doc) -> Iterator[Tuple[int, Paragraph]]:
+        """Непустые абзацы основного текста с их номерами в документе"""
+        body = doc._body
+        for i, p in enumerate(doc.element.body.iterchildren(qn('w:p'))):
+            para = Paragraph(p, body)
+            if para.text.strip():
+                yield i, para
+
+    @staticmethod
+    def open_document_paragraphs(source: DocumentSource) -> Tuple[Dict, List[Tuple[int, str, Paragraph]]]:
+        """Открытие документа с дешевым хэшированием абзацев без извлечения форматирования
+
+        Возвращает общую информацию о документе и список (номер, хэш, абзац).
+        Форматирование нужных абзацев извлекается потом через extract_paragraph.
+        """
+        with open_document_buffer(source) as buffer:
+            doc = DocumentLoader._open_document(buffer)
+        document_info = DocumentLoader._get_document_header(doc)
+        entries = [(i, DocumentLoader._paragraph_hash(para), para)
+                   for i, para in DocumentLoader._iter_body_paragraphs(doc)]
+        return document_info, entries
+
+    @staticmethod
+    def open_document_body(source: DocumentSource) -> Tuple[Dict, List[Tuple[int, Paragraph]]]:
+        """Открытие документа со списком абзацев основного текста без извлечения форматирования
+
+        Возвращает общую информацию о документе и список (номер, абзац); форматирование
+        нужных абзацев извлекается потом через extract_paragraph.
+        """
+        document_info, paragraphs = DocumentLoader.iter_document_body(source)
+        return document_info, list(paragraphs)
+
+    @staticmethod
+    def iter_document_body(source: DocumentSource) -> Tuple[Dict, Iterator[Tuple[int, Paragraph]]]:
+        """Открытие документа с ленивым обходом абзацев основного текста
+
+        Возвращает общую информацию о документе и генератор (номер, абзац);
+        форматирование извлекается потом через extract_paragraph.
+        """
+        with open_document_buffer(source) as buffer:
+            doc = DocumentLoader._open_document(buffer)
+        document_info = DocumentLoader._get_document_header(doc)
+        return document_info, DocumentLoader._iter_body_paragraphs(doc)
+
+    @staticmethod
+    def stream_document_body(source: DocumentSource) -> Tuple[Dict, Iterator[Tuple[int, Paragraph]]]:
+        """Потоковый обход абзацев основного текста без построения дерева документа
+
+        word/document.xml разбирается одним проходом через iterparse прямо из
+        архива: абзацы выдаются по мере распаковки и удаляются из дерева, как
+        только обработаны, поэтому в памяти одновременно находятся только абзацы,
+        которые еще держит вызывающий код. Стили и тема берутся из пакета без
+        основного текста. Свойства первого раздела (document_properties) и число
+        страниц (page_count) становятся известны только в конце основного текста:
+        они заполняются в document_info, когда обход абзацев завершен.
+        """
+        stream = DocumentLoader._stream_body(source)
+        document_info = next(stream)
+        return document_info, stream
+
+    @staticmethod
+    def _stream_body(source: DocumentSource) -> Iterator:
+        """Генератор для stream_document_body: первым отдает общую информацию
+        о документе, затем (номер, абзац) для непустых абзацев"""
+        with ExitStack() as stack:
+            try:
+                if isinstance(source, (str, os.PathLike)):
+                    # zipfile читает файл частями, документ не загружается целиком
+                    archive = stack.enter_context(zipfile.ZipFile(source))
+                else:
+                    buffer = stack.enter_context(open_document_buffer(source))
+                    archive = stack.enter_context(zipfile.ZipFile(stack.enter_context(BufferReader(buffer))))
+                main_part = DocumentLoader._main_part_name(archive)
+                events = DocumentLoader._iterparse_body(stack.enter_context(archive.open(main_part)))
+                kind, root = next(events, (None, None))
+                if kind != 'root':
+                    raise ValueError("Пустая основная часть документа")
+                doc = DocumentLoader._open_skeleton(archive, main_part, root)
+            except OSError:
+                raise
+            except Exception as e:
+                raise DocumentLoadError(f"Ошибка чтения файла: {e}") from e
+
+            document_info = DocumentLoader._get_document_header(doc)
+            yield document_info
+
+            body = doc._body
+            section = None
+            total_chars = 0
+            i = 0
+            try:
+                for _, elem in events:
+                    if elem.tag == qn('w:sectPr'):
+                        # Свойства последнего раздела; в документе из одного раздела он же первый
+                        if section is None:
+                            section = elem
+                        continue
+                    if elem.tag != qn('w:p'):
+                        continue
+                    para = Paragraph(elem, body)
+                    text = para.text
+                    total_chars += len(text)
+                    if section is None:
+                        ppr = elem.find(qn('w:pPr'))
+                        found = ppr.find(qn('w:sectPr')) if ppr is not None else None
+                        if found is not None:
+                            # Конец первого раздела; сам абзац еще может быть у вызывающего кода
+                            section = copy.deepcopy(found)
+                    if text.strip():
+                        yield i, para
+                    i += 1
+            except (etree.XMLSyntaxError, zipfile.BadZipFile) as e:
+                raise DocumentLoadError(f"Ошибка чтения файла: {e}") from e
+
+            if section is not None:
+                doc.element.body.append(section)
+            document_info['document_properties'] = DocumentLoader._get_document_properties(doc)
+            document_info['page_count'] = DocumentLoader._page_count(total_chars)
+
+    @staticmethod
+    def _open_skeleton(archive: zipfile.ZipFile, main_part: str, root: etree._Element):
+        """Документ python-docx по пакету без основного текста: стили, тема, свойства"""
+        skeleton = etree.Element(root.tag, attrib=dict(root.attrib), nsmap=root.nsmap)
+        etree.SubElement(skeleton, qn('w:body'))
+        package = io.BytesIO()
+        with zipfile.ZipFile(package, 'w', zipfile.ZIP_STORED) as stub:
+            for item in archive.infolist():
+                if item.filename == main_part:
+                    stub.writestr(item.filename, etree.tostring(skeleton, xml_declaration=True,
+                                                                encoding='UTF-8', standalone=True))
+                else:
+                    stub.writestr(item.filename, archive.read(item))
+        return Document(package)
+
+    @staticmethod
+    def _main_part_name(archive: zipfile.ZipFile) -> str:
+        """Имя основной части пакета (обычно word/document.xml) по _rels/.rels"""
+        rels = etree.fromstring(archive.read('_rels/.rels'))
+        for rel in rels:
+            if rel.get('Type') == RT.OFFICE_DOCUMENT:
+                return rel.get('Target').lstrip('/')
+        raise ValueError("В пакете нет основной части документа")
+
+    @staticmethod
+    def _iterparse_body(stream) -> Iterator[Tuple[str, etree._Element]]:
+        """События iterparse с классами элементов python-docx; дочерние элементы
+        w:body отдаются по окончании и сразу после этого удаляются из дерева"""
+        events = etree.iterparse(stream, events=('start', 'end'), remove_blank_text=True,
+                                 resolve_entities=False)
+        events.set_element_class_lookup(element_class_lookup)
+        depth = 0
+        for event, elem in events:
+            if event == 'start':
+                depth += 1
+                if depth == 1:
+                    yield 'root', elem
+                continue
+            depth -= 1
+            parent = elem.getparent()
+            if depth == 2 and parent.tag == qn('w:body'):
+                # Элемент верхнего уровня основного текста: абзац, таблица, sectPr
+                yield 'child', elem
+                parent.remove(elem)
+
+    @staticmethod
+    def extract_paragraph(para, index: int, document_info: Dict, include_debug: bool = True) -> Dict:
+        """Извлечение информации об отдельном абзаце основного текста открытого документа"""
+        para_info = DocumentLoader._extract_paragraph_info(para, index, document_info, include_debug)
+        para_info['part'] = 'body'
+        return para_info
+
+    @staticmethod
+    def _paragraph_hash(para) -> str:
+        """Хэш содержимого абзаца: текст и свойства абзаца и runs (без rsid разметки)"""
+        element = para._element
+        digest = hashlib.sha1(para.text.encode('utf-8'))
+        ppr = element.find(qn('w:pPr'))
+        if ppr is not None:
+            digest.update(etree.tostring(ppr))
+        for rpr in element.iterfind('.//w:r/w:rPr', element.nsmap):
+            digest.update(etree.tostring(rpr))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _open_document(buffer):
+        """Открытие .docx прямо из буфера; части пакета читаются сразу при открытии"""
+        try:
+            with BufferReader(buffer) as stream:
+                return Document(stream)
+        except Exception as e:
+            raise DocumentLoadError(f"Ошибка чтения файла: {e}") from e
+
+    @staticmethod
+    def _get_template_info(doc) -> Dict:
+        """Шрифты темы и таблица стилей с кэшированием по отпечатку шаблона"""
+        theme_part = DocumentLoader._get_theme_part(doc)
+        theme_blob = theme_part.blob if theme_part is not None else b''
+        try:
+            styles_blob = doc.part.part_related_by(RT.STYLES).blob
+        except KeyError:
+            styles_blob = b''
+
+        fingerprint = hash_bytes(styles_blob, b'\0', theme_blob)
+
+        def compute():
+            return {
+                'theme_fonts': DocumentLoader._parse_theme_fonts(theme_blob),
                 'styles_info': DocumentLoader._get_styles_info(doc)
             }
 
-            for i, para in enumerate(doc.paragraphs):
-                if para.text.strip():
-                    para_info = DocumentLoader._extract_paragraph_info(para, i, document_info)
+        cache = DocumentLoader.template_cache
+        template_info, source = cache.get_or_compute(fingerprint, compute)
 
-                    document_info['paragraphs'].append(para_info)
+        return {
+            'fingerprint': fingerprint,
+            'theme_fonts': template_info['theme_fonts'],
+            'styles_info': template_info['styles_info'],
+            'cache_stats': DocumentLoader._template_cache_info(source)
+        }
+
+    @staticmethod
+    def _template_cache_info(source: Optional[str]) -> Dict:
+        """Сведения о кэше шаблонов для одного документа.
+
+        source - откуда взят шаблон этого документа: 'memory', 'disk',
+        'document' (документ целиком из кэша) или None (шаблон разобран).
+        process_totals - накопленные счетчики кэша за все время процесса.
+        """
+        return {
+            'hit': source is not None,
+            'source': source,
+            'process_totals': DocumentLoader.template_cache.get_stats()
+        }
 
-            return document_info
+    @staticmethod
+    def _get_theme_part(doc):
+        """Поиск части документа с темой"""
+        try:
+            for rel in doc.part.rels.values():
+                if rel.reltype.endswith('theme'):
+                    return rel.target_part
         except Exception as e:
-            print(f"Ошибка чтения файла: {e}")
-            return {'paragraphs': [], 'document_properties': {}, 'page_count': 0, 'default_font': 'Times New Roman'}
+            print(f"Ошибка при поиске темы документа: {e}")
+        return None
 
     @staticmethod
     def _get_theme_fonts(doc) -> Dict:
         """Получение шрифтов из темы документа, но по умолчанию Times New Roman"""
+        theme_part = DocumentLoader._get_theme_part(doc)
+        return DocumentLoader._parse_theme_fonts(theme_part.blob if theme_part is not None else b'')
+
+    @staticmethod
+    def _parse_theme_fonts(theme_blob: bytes) -> Dict:
+        """Разбор XML темы: шрифты major/minor, по умолчанию Times New Roman"""
         theme_fonts = {
             'major': {'latin': 'Times New Roman'},
             'minor': {'latin': 'Times New Roman'},
         }
 
         try:
-            # Получаем XML темы документа
-            theme_part = None
-            for rel in doc.part.rels.values():
-                if rel.reltype.endswith('theme'):
-                    theme_part = rel.target_part
-                    break
-
-            if theme_part:
-                from docx.oxml import parse_xml
-                theme_xml = parse_xml(theme_part.blob)
+            if theme_blob:
+                theme_xml = parse_xml(theme_blob)
 
                 # Шрифты для заголовков (major)
                 major_font = theme_xml.find('.//a:majorFont/a:latin', theme_xml.nsmap)
@@ -194,20 +616,22 @@ class DocumentLoader:
         return None
 
     @staticmethod
-    def _extract_paragraph_info(para, index: int, document_info: Dict) -> Dict:
+    def _extract_paragraph_info(para, index: int, document_info: Dict, include_debug: bool = True) -> Dict:
         """Извлечение информации о параграфе с точным определением шрифта"""
         default_font = document_info['default_font']
         theme_fonts = document_info['theme_fonts']
         styles_info = document_info['styles_info']
 
+        # Word дробит текст на множество runs из-за rsid и проверки орфографии.
+        # Соседние runs с одинаковыми свойствами объединяем до разрешения шрифтов.
+        runs = [run for run in para.runs if run.text.strip()]
+        merged_runs = DocumentLoader._merge_runs(runs)
+
         # Собираем информацию о всех runs в параграфе
         runs_data = []
-        for run in para.runs:
-            if not run.text.strip():
-                continue
-
+        for run, run_text in merged_runs:
             run_data = {
-                'text': run.text,
+                'text': run_text,
                 'font': None,
                 'size': None,
                 'bold': None,
@@ -397,7 +821,7 @@ class DocumentLoader:
         #временно дл проверки:
         # print(f"📌 PARA {index} STYLE = {para.style.name}")
         # print(f"📌 STYLE INFO = {styles_info.get(para.style.name)}")
-        return {
+        para_info = {
             'index': index,
             'text': para.text.strip(),
             'alignment': alignment,
@@ -410,7 +834,12 @@ class DocumentLoader:
             'first_line_indent': first_line_indent,
             'runs_info': runs_data,
             'style_name': para.style.name if para.style else None,
-            'debug': {
+            'run_counts': (len(runs), len(merged_runs))
+        }
+
+        # Отладочные сведения нужны только для диагностики и занимают много памяти
+        if include_debug:
+            para_info['debug'] = {
                 'total_chars': total_chars,
                 'unique_fonts': list(font_counter.keys()),
                 'font_distribution': dict(font_counter.most_common()),
@@ -423,7 +852,38 @@ class DocumentLoader:
                     'style_alignment': DocumentLoader._get_alignment_from_style(para.style) if para.style else None
                 }
             }
-        }
+
+        return para_info
+
+    # Свойства run, от которых зависит разрешение шрифта, размера, жирности и курсива
+    _RUN_FORMAT_TAGS = (qn('w:rStyle'), qn('w:rFonts'), qn('w:sz'), qn('w:b'), qn('w:i'))
+
+    @staticmethod
+    def _run_format_key(run) -> tuple:
+        """Ключ действующих свойств run; rsid, язык и прочая разметка не учитываются"""
+        rpr = run._element.rPr
+        if rpr is None:
+            return ()
+        key = []
+        for tag in DocumentLoader._RUN_FORMAT_TAGS:
+            child = rpr.find(tag)
+            key.append(tuple(sorted(child.attrib.items())) if child is not None else None)
+        return tuple(key)
+
+    @staticmethod
+    def _merge_runs(runs: list) -> List[tuple]:
+        """Объединение соседних runs с одинаковыми свойствами: список (первый run, общий текст)"""
+        merged = []
+        last_key = None
+        for run in runs:
+            key = DocumentLoader._run_format_key(run)
+            if merged and key == last_key:
+                first_run, text = merged[-1]
+                merged[-1] = (first_run, text + run.text)
+            else:
+                merged.append((run, run.text))
+                last_key = key
+        return merged
 
     @staticmethod
     def _analyze_paragraph_xml(para) -> Dict:
@@ -490,12 +950,14 @@ class DocumentLoader:
     def _estimate_page_count(doc) -> int:
         """Приблизительный подсчет страниц"""
         try:
-            total_chars = sum(len(para.text) for para in doc.paragraphs)
-            estimated_pages = max(1, total_chars // 1250)
-            return estimated_pages
+            return DocumentLoader._page_count(sum(len(para.text) for para in doc.paragraphs))
         except:
             return 1
 
+    @staticmethod
+    def _page_count(total_chars: int) -> int:
+        return max(1, total_chars // 1250)
+
     @staticmethod
     def debug_document_fonts(file_path: str) -> Dict:
         """Расширенная отладочная функция для анализа всех шрифтов в документе"""
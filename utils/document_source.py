@@ -0,0 +1,107 @@
+"""
+Источники документов: путь к файлу, байты, файловые объекты и файлы, отображенные в память
+"""
+import io
+import mmap
+import os
+from contextlib import contextmanager
+from typing import BinaryIO, Union
+
+DocumentSource = Union[str, os.PathLike, bytes, bytearray, memoryview, mmap.mmap, BinaryIO]
+
+
+class BufferReader(io.RawIOBase):
+    """Файловый объект только для чтения поверх буфера, без копирования всего буфера.
+
+    Разбор zip-архива .docx идет прямо по переданному буферу: копируются
+    только байты, которые zipfile запрашивает через read().
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._view = memoryview(buffer).cast('B')
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        size = min(len(b), len(self._view) - self._pos)
+        if size <= 0:
+            return 0
+        b[:size] = self._view[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        data = self._view[self._pos:end].tobytes()
+        self._pos = max(self._pos, end)
+        return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._pos + offset
+        elif whence == io.SEEK_END:
+            position = len(self._view) + offset
+        else:
+            raise ValueError(f"Недопустимое значение whence: {whence}")
+        if position < 0:
+            raise ValueError("Отрицательная позиция в буфере")
+        self._pos = position
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def describe_source(source: DocumentSource) -> str:
+    """Человекочитаемое имя источника для сообщений"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    name = getattr(source, 'name', None)
+    if isinstance(name, str):
+        return name
+    return f"<{type(source).__name__}>"
+
+
+@contextmanager
+def open_document_buffer(source: DocumentSource):
+    """Получение содержимого документа в виде буфера.
+
+    Путь читается одним вызовом read(); байты, bytearray, memoryview и mmap
+    используются напрямую; у BytesIO берется внутренний буфер без копирования;
+    прочие файловые объекты читаются целиком один раз.
+    """
+    views = []
+    try:
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                buffer = f.read()
+        elif isinstance(source, bytes):
+            buffer = source
+        elif isinstance(source, (bytearray, memoryview, mmap.mmap)):
+            buffer = memoryview(source)
+            views.append(buffer)
+        elif hasattr(source, 'getbuffer'):
+            buffer = source.getbuffer()
+            views.append(buffer)
+        elif hasattr(source, 'read'):
+            buffer = source.read()
+        else:
+            raise TypeError(f"Неподдерживаемый источник документа: {type(source).__name__}")
+        yield buffer
+    finally:
+        # Освобождаем представления, иначе mmap и BytesIO нельзя будет закрыть
+        for view in views:
+            view.release()
@@ -0,0 +1,179 @@
+"""
+Уведомления файловой системы Linux (inotify) через ctypes, без сторонних пакетов
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+from typing import Dict, Iterator, List, Optional
+
+# Маски событий (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+# Заголовок события: wd, mask, cookie, длина имени
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_SIZE = 64 * 1024
+
+
+class InotifyEvent:
+    """Событие файловой системы"""
+
+    __slots__ = ('path', 'mask', 'cookie')
+
+    def __init__(self, path: str, mask: int, cookie: int):
+        self.path = path
+        self.mask = mask
+        self.cookie = cookie
+
+    @property
+    def is_dir(self) -> bool:
+        return bool(self.mask & IN_ISDIR)
+
+    def __repr__(self) -> str:
+        return f"InotifyEvent({self.path!r}, 0x{self.mask:08x})"
+
+
+class Inotify:
+    """Наблюдение за каталогами через inotify.
+
+    Процесс спит в poll() до прихода события или истечения тайм-аута, поэтому
+    в отсутствие изменений наблюдение не расходует процессорное время. При
+    recursive новые подкаталоги ставятся под наблюдение по событию создания.
+    """
+
+    def __init__(self, mask: int = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MODIFY | IN_CREATE):
+        library = ctypes.util.find_library('c')
+        try:
+            libc = ctypes.CDLL(library, use_errno=True)
+            self._add_watch = libc.inotify_add_watch
+            init = libc.inotify_init1
+        except (OSError, AttributeError):
+            raise OSError(errno.ENOSYS, "inotify недоступен: наблюдение за каталогами работает только в Linux")
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+        self.fd = init(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise("inotify_init1")
+        self.mask = mask
+        # Каталоги под наблюдением по дескрипторам наблюдения
+        self._paths: Dict[int, str] = {}
+        self._recursive: Dict[int, bool] = {}
+        self._poll = select.poll()
+        self._poll.register(self.fd, select.POLLIN)
+
+    @staticmethod
+    def _raise(function: str, path: Optional[str] = None):
+        code = ctypes.get_errno()
+        raise OSError(code, f"{function}: {os.strerror(code)}", path)
+
+    def add_watch(self, directory: str, recursive: bool = False) -> List[str]:
+        """Наблюдение за каталогом (и подкаталогами при recursive); список каталогов"""
+        directory = os.path.abspath(directory)
+        mask = self.mask | IN_ONLYDIR | IN_DELETE_SELF | IN_MOVE_SELF
+        if recursive:
+            mask |= IN_CREATE | IN_MOVED_TO
+        wd = self._add_watch(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            self._raise("inotify_add_watch", directory)
+        self._paths[wd] = directory
+        self._recursive[wd] = recursive
+        added = [directory]
+        if recursive:
+            try:
+                with os.scandir(directory) as it:
+                    subdirectories = [entry.path for entry in it if entry.is_dir(follow_symlinks=False)]
+            except OSError:
+                subdirectories = []
+            for subdirectory in subdirectories:
+                try:
+                    added.extend(self.add_watch(subdirectory, recursive=True))
+                except OSError:
+                    # Каталог успели удалить или к нему нет доступа
+                    continue
+        return added
+
+    def watched(self) -> List[str]:
+        """Каталоги под наблюдением"""
+        return sorted(self._paths.values())
+
+    def read_events(self, timeout: Optional[float] = None) -> List[InotifyEvent]:
+        """Ожидание событий не дольше timeout секунд (None - без ограничения)"""
+        milliseconds = None if timeout is None else max(0, int(timeout * 1000))
+        try:
+            ready = self._poll.poll(milliseconds)
+        except InterruptedError:
+            return []
+        if not ready:
+            return []
+
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            events.extend(self._parse(data))
+        return events
+
+    def _parse(self, data: bytes) -> Iterator[InotifyEvent]:
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Очередь ядра переполнилась: часть событий потеряна
+                yield InotifyEvent('', mask, cookie)
+                continue
+            directory = self._paths.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                # Каталог удален или наблюдение снято
+                self._paths.pop(wd, None)
+                self._recursive.pop(wd, None)
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            event = InotifyEvent(path, mask, cookie)
+            if event.is_dir and mask & (IN_CREATE | IN_MOVED_TO) and self._recursive.get(wd):
+                try:
+                    self.add_watch(path, recursive=True)
+                except OSError:
+                    pass
+            yield event
+
+    def close(self):
+        """Снятие всех наблюдений"""
+        if self.fd >= 0:
+            self._poll.unregister(self.fd)
+            os.close(self.fd)
+            self.fd = -1
+            self._paths.clear()
+            self._recursive.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,50 @@
+"""
+Измерение потребления памяти процессом
+"""
+import os
+import sys
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _read_proc_status(field: str) -> Optional[float]:
+    """Чтение значения из /proc/self/status в мегабайтах (Linux)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def get_rss_mb() -> Optional[float]:
+    """Текущий размер резидентной памяти процесса, МБ"""
+    if psutil is not None:
+        return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+    return _read_proc_status('VmRSS')
+
+
+def get_peak_rss_mb() -> Optional[float]:
+    """Пиковый размер резидентной памяти процесса, МБ"""
+    peak = _read_proc_status('VmHWM')
+    if peak is not None:
+        return peak
+
+    try:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # На macOS значение в байтах, на остальных системах - в килобайтах
+        return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+    except ImportError:
+        pass
+
+    if psutil is not None:
+        info = psutil.Process(os.getpid()).memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    return None
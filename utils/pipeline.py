@@ -0,0 +1,134 @@
+"""
+Конвейер стадий обработки, связанных ограниченными очередями
+"""
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Признак конца потока элементов между стадиями
+_END = object()
+# Как часто стадия, ожидающая места в очереди, проверяет остановку конвейера
+_POLL_INTERVAL = 0.1
+
+
+class _StageFailure:
+    """Исключение стадии, переданное по конвейеру до потребителя"""
+
+    def __init__(self, stage: str, error: BaseException):
+        self.stage = stage
+        self.error = error
+
+
+class Pipeline:
+    """Последовательные стадии, каждая в своем потоке.
+
+    Стадии соединены очередями ограниченного размера: быстрая стадия ждет,
+    пока следующая освободит место, поэтому в памяти находится не больше
+    queue_size элементов на стадию. Каждая стадия обрабатывает элементы по одному
+    в порядке поступления, так что порядок результатов сохраняется, а стадии
+    с состоянием (контекст классификатора) видят элементы последовательно.
+    """
+
+    def __init__(self, stages: List[Tuple[str, Callable]], queue_size: int = 16):
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        # Время работы каждой стадии без учета ожидания очередей, с
+        self.busy_time: Dict[str, float] = {'source': 0.0}
+        self.busy_time.update((name, 0.0) for name, _ in stages)
+        self.items = 0
+        self.time_to_first_result: Optional[float] = None
+        self.total_time: Optional[float] = None
+        self._stop = threading.Event()
+
+    def run(self, source: Iterable) -> Iterator:
+        """Пропуск элементов source через стадии; результаты выдаются по мере готовности"""
+        start = time.perf_counter()
+        self._stop.clear()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+
+        threads = [threading.Thread(target=self._feed, args=(source, queues[0]), daemon=True)]
+        for position, (name, function) in enumerate(self.stages):
+            threads.append(threading.Thread(target=self._work,
+                                            args=(name, function, queues[position], queues[position + 1]),
+                                            daemon=True))
+        for thread in threads:
+            thread.start()
+
+        output = queues[-1]
+        try:
+            while True:
+                item = output.get()
+                if item is _END:
+                    break
+                if isinstance(item, _StageFailure):
+                    raise item.error
+                if self.time_to_first_result is None:
+                    self.time_to_first_result = time.perf_counter() - start
+                self.items += 1
+                yield item
+        finally:
+            # Потребитель мог прекратить чтение досрочно: освобождаем ожидающие стадии
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.total_time = time.perf_counter() - start
+
+    def stats(self) -> Dict:
+        """Сводка по последнему запуску"""
+        return {
+            "items": self.items,
+            "queue_size": self.queue_size,
+            "time_to_first_result": self.time_to_first_result,
+            "total_time": self.total_time,
+            "stage_busy_time": dict(self.busy_time)
+        }
+
+    def _put(self, target: queue.Queue, item) -> bool:
+        """Помещение элемента в очередь; False, если конвейер остановлен"""
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed(self, source: Iterable, target: queue.Queue):
+        """Первая стадия: чтение элементов из источника"""
+        name = 'source'
+        try:
+            started = time.perf_counter()
+            for item in source:
+                self.busy_time[name] += time.perf_counter() - started
+                if not self._put(target, item):
+                    return
+                started = time.perf_counter()
+        except BaseException as e:
+            self._put(target, _StageFailure(name, e))
+            return
+        self._put(target, _END)
+
+    def _work(self, name: str, function: Callable, source: queue.Queue, target: queue.Queue):
+        """Стадия: обработка элементов входной очереди и передача в следующую"""
+        while True:
+            try:
+                item = source.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+
+            if item is _END or isinstance(item, _StageFailure):
+                self._put(target, item)
+                return
+
+            started = time.perf_counter()
+            try:
+                result = function(item)
+            except BaseException as e:
+                self._put(target, _StageFailure(name, e))
+                return
+            self.busy_time[name] += time.perf_counter() - started
+            if not self._put(target, result):
+                return
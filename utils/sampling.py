@@ -0,0 +1,61 @@
+"""
+Выборка абзацев и интервальные оценки долей нарушений
+"""
+import math
+import random
+from statistics import NormalDist
+from typing import List, Optional, Tuple
+
+SAMPLE_STRATEGIES = ('random', 'stratified')
+
+
+def choose_sample(population: int, sample_size: int, strategy: str = 'stratified',
+                  seed: Optional[int] = None) -> List[int]:
+    """Номера выбранных элементов (по возрастанию) из population элементов.
+
+    random - простая случайная выборка без возвращения;
+    stratified - по одному случайному элементу из каждого из sample_size
+    равных последовательных участков, чтобы выборка покрывала весь документ.
+    """
+    if strategy not in SAMPLE_STRATEGIES:
+        raise ValueError(f"Неизвестная стратегия выборки: {strategy} (доступны: {', '.join(SAMPLE_STRATEGIES)})")
+    if sample_size >= population:
+        return list(range(population))
+    if sample_size <= 0:
+        return []
+
+    rng = random.Random(seed)
+    if strategy == 'random':
+        return sorted(rng.sample(range(population), sample_size))
+
+    positions = []
+    for stratum in range(sample_size):
+        start = stratum * population // sample_size
+        end = (stratum + 1) * population // sample_size
+        positions.append(rng.randrange(start, end))
+    return positions
+
+
+def wilson_interval(successes: int, trials: int, confidence: float = 0.95,
+                    population: Optional[int] = None) -> Tuple[float, float]:
+    """Доверительный интервал Уилсона для доли.
+
+    При известном размере генеральной совокупности ширина интервала
+    уменьшается поправкой на конечность совокупности (выборка без возвращения).
+    """
+    if trials <= 0:
+        return 0.0, 1.0
+
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    if population is not None and population > 1 and trials < population:
+        z *= math.sqrt((population - trials) / (population - 1))
+    elif population is not None and trials >= population:
+        # Проверена вся совокупность: доля известна точно
+        rate = successes / trials
+        return rate, rate
+
+    rate = successes / trials
+    denominator = 1 + z * z / trials
+    center = (rate + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
@@ -1,28 +1,22 @@
 """
 Валидатор содержания текста с обновленными правилами
 """
-from typing import List
-from config.criteria import FormattingCriteria
+from typing import List, Optional
+from validators.errors import ValidationError
+from validators.rule_plan import RulePlan, get_rule_plan
+from validators.rule_profiler import get_profiler
 
 class ContentValidator:
     """Валидатор содержания документов"""
 
     @staticmethod
-    def validate_content(text: str, expected_class: str) -> List[str]:
-        """Проверка содержания согласно критериям"""
-        errors = []
-        criteria = FormattingCriteria.get_criteria(expected_class)
-
-        if not criteria:
-            return errors
-
-        content_rules = criteria.get('content_rules', [])
-
-        for rule_name, rule_func in content_rules:
-            try:
-                if not rule_func(text):
-                    errors.append(f"{rule_name}")
-            except Exception as e:
-                errors.append(f"Ошибка проверки правила '{rule_name}': {str(e)}")
-
-        return errors
\ No newline at end of file
+    def validate_content(text: str, expected_class: str, plan: Optional[RulePlan] = None,
+                         index: Optional[int] = None) -> List[ValidationError]:
+        """Проверка содержания согласно критериям (plan - снимок критериев на время анализа)"""
+        checker = (plan or get_rule_plan()).content.get(expected_class)
+        if checker is None:
+            return []
+        profiler = get_profiler()
+        if profiler is not None:
+            return profiler.check_content(expected_class, checker, text, index)
+        return checker.check(text, index)
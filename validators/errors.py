@@ -0,0 +1,140 @@
+"""
+Компактные записи ошибок проверки: код, номер абзаца и параметры.
+Текст сообщения формируется только при выводе.
+"""
+from enum import IntEnum
+from typing import Dict, Optional, Tuple
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+ALIGNMENT_NAMES = {
+    WD_ALIGN_PARAGRAPH.LEFT: "по левому краю",
+    WD_ALIGN_PARAGRAPH.CENTER: "по центру",
+    WD_ALIGN_PARAGRAPH.RIGHT: "по правому краю",
+    WD_ALIGN_PARAGRAPH.JUSTIFY: "по ширине",
+    None: "не задано"
+}
+
+# Части документа вне основного текста в сообщениях об ошибках
+PART_NAMES = {
+    'tables': "в таблице",
+    'headers': "в верхнем колонтитуле",
+    'footers': "в нижнем колонтитуле",
+    'footnotes': "в сноске"
+}
+
+# Значение выравнивания, которое не удалось распознать
+UNKNOWN_ALIGNMENT = -1
+
+
+class ErrorCode(IntEnum):
+    """Коды ошибок проверки"""
+    # Форматирование абзаца
+    FONT_NAME = 1
+    FONT_SIZE = 2
+    ALIGNMENT = 3
+    BOLD_REQUIRED = 4
+    BOLD_FORBIDDEN = 5
+    ITALIC_REQUIRED = 6
+    ITALIC_FORBIDDEN = 7
+    PARAGRAPH_INDENT = 8
+    # Содержание абзаца
+    CONTENT_RULE = 20
+    CONTENT_RULE_FAILED = 21
+    # Свойства документа
+    MARGIN_TOP = 40
+    MARGIN_BOTTOM = 41
+    MARGIN_LEFT = 42
+    MARGIN_RIGHT = 43
+    PAGE_COUNT = 44
+    # Перекрестные проверки документа
+    PART_FONT_NAME = 45
+    MISSING_COUNTERPART = 46
+    KEYWORD_COUNT_MISMATCH = 47
+
+
+FORMATTING_CODES = frozenset(code for code in ErrorCode if code < ErrorCode.CONTENT_RULE)
+CONTENT_CODES = frozenset({ErrorCode.CONTENT_RULE, ErrorCode.CONTENT_RULE_FAILED})
+
+
+def _alignment_name(value) -> str:
+    return ALIGNMENT_NAMES.get(value, "неизвестно")
+
+
+# Шаблоны сообщений: функция от параметров записи
+MESSAGES = {
+    ErrorCode.FONT_NAME: lambda actual, expected: f"Неверный шрифт: {actual} (требуется {expected})",
+    ErrorCode.FONT_SIZE: lambda actual, expected: f"Неверный размер шрифта: {actual:.1f} (требуется {expected})",
+    ErrorCode.ALIGNMENT: lambda actual, expected: (
+        f"Неверное выравнивание: {_alignment_name(actual)} (требуется {_alignment_name(expected)})"
+    ),
+    ErrorCode.BOLD_REQUIRED: lambda: "Текст должен быть полужирным",
+    ErrorCode.BOLD_FORBIDDEN: lambda: "Текст не должен быть полужирным",
+    ErrorCode.ITALIC_REQUIRED: lambda: "Текст должен быть курсивом",
+    ErrorCode.ITALIC_FORBIDDEN: lambda: "Текст не должен быть курсивом",
+    ErrorCode.PARAGRAPH_INDENT: lambda actual, expected: (
+        f"Неверный отступ абзаца: {actual:.1f} см (требуется {expected:.1f} см)"
+    ),
+    ErrorCode.CONTENT_RULE: lambda rule_name: rule_name,
+    ErrorCode.CONTENT_RULE_FAILED: lambda rule_name, error: f"Ошибка проверки правила '{rule_name}': {error}",
+    ErrorCode.MARGIN_TOP: lambda actual, expected: f"Неверное верхнее поле: {actual:.1f} см (требуется {expected:.1f} см)",
+    ErrorCode.MARGIN_BOTTOM: lambda actual, expected: f"Неверное нижнее поле: {actual:.1f} см (требуется {expected:.1f} см)",
+    ErrorCode.MARGIN_LEFT: lambda actual, expected: f"Неверное левое поле: {actual:.1f} см (требуется {expected:.1f} см)",
+    ErrorCode.MARGIN_RIGHT: lambda actual, expected: f"Неверное правое поле: {actual:.1f} см (требуется {expected:.1f} см)",
+    ErrorCode.PAGE_COUNT: lambda actual, expected: (
+        f"Недостаточный объем документа: {actual} стр. (минимум {expected} стр.)"
+    ),
+    ErrorCode.PART_FONT_NAME: lambda part, number, actual, expected: (
+        f"Неверный шрифт {PART_NAMES.get(part, part)} (абзац {number}): {actual} (требуется {expected})"
+    ),
+    ErrorCode.MISSING_COUNTERPART: lambda present, missing: (
+        f"Есть элемент '{present}', но нет парного элемента '{missing}'"
+    ),
+    ErrorCode.KEYWORD_COUNT_MISMATCH: lambda ru_count, en_count: (
+        f"Число ключевых слов не совпадает: {ru_count} на русском, {en_count} на английском"
+    )
+}
+
+
+class ValidationError:
+    """Ошибка проверки: код, номер абзаца (None для ошибок документа) и параметры сообщения"""
+
+    __slots__ = ('code', 'index', 'params')
+
+    def __init__(self, code: ErrorCode, index: Optional[int] = None, params: Tuple = ()):
+        self.code = code
+        self.index = index
+        self.params = params
+
+    def __str__(self) -> str:
+        return MESSAGES[self.code](*self.params)
+
+    def __repr__(self) -> str:
+        return f"ValidationError({self.code.name}, {self.index}, {self.params!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ValidationError):
+            return NotImplemented
+        return (self.code, self.index, self.params) == (other.code, other.index, other.params)
+
+    def __hash__(self) -> int:
+        return hash((self.code, self.index, self.params))
+
+    def __reduce__(self):
+        # Код передаем числом: меньше данных при сохранении и передаче между процессами
+        return _restore_error, (int(self.code), self.index, self.params)
+
+    def with_index(self, index: Optional[int]) -> 'ValidationError':
+        """Та же ошибка для абзаца с другим номером"""
+        return ValidationError(self.code, index, self.params)
+
+    def to_dict(self) -> Dict:
+        """Представление для JSON"""
+        return {'code': self.code.name, 'index': self.index, 'params': list(self.params)}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ValidationError':
+        return cls(ErrorCode[data['code']], data.get('index'), tuple(data.get('params', ())))
+
+
+def _restore_error(code: int, index: Optional[int], params: Tuple) -> ValidationError:
+    return ValidationError(ErrorCode(code), index, params)
@@ -0,0 +1,131 @@
+"""
+Реестр профилей критериев для разных журналов с автоматическим выбором профиля
+"""
+import os
+import threading
+from typing import Dict, List, Optional
+from config.criteria_file import CRITERIA_FILE, CriteriaFileError, compile_criteria_data, read_criteria_file
+from validators.rule_plan import RulePlan
+
+# Каталог профилей журналов: один файл критериев (*.json) на журнал
+JOURNALS_DIR = os.path.join(os.path.dirname(CRITERIA_FILE), 'journals')
+DEFAULT_JOURNAL = 'default'
+AUTO_JOURNAL = 'auto'
+
+
+class JournalProfile:
+    """Профиль журнала: скомпилированный план проверки и признаки для автовыбора.
+
+    Признаки задаются в разделе "journal" файла критериев:
+        "journal": {
+            "name": "...", "title": "...",
+            "match": {"template_fingerprints": [...], "style_names": [...]}
+        }
+    Отпечаток шаблона - results["template_fingerprint"] документа, сделанного
+    по шаблону журнала. Профиль без признаков выбирается только по имени.
+    """
+
+    def __init__(self, name: str, title: str, plan: RulePlan, template_fingerprints=(), style_names=()):
+        self.name = name
+        self.title = title
+        self.plan = plan
+        self.template_fingerprints = frozenset(template_fingerprints)
+        self.style_names = frozenset(style_names)
+
+
+class JournalRegistry:
+    """Профили критериев, скомпилированные один раз при создании реестра.
+
+    'auto' выбирает только среди профилей с признаками в разделе "match";
+    пока их нет ни у одного профиля, всегда выбирается профиль по умолчанию.
+    """
+
+    def __init__(self, directory: str = JOURNALS_DIR, default_file: str = CRITERIA_FILE):
+        self.profiles: Dict[str, JournalProfile] = {}
+        self._by_template: Dict[str, str] = {}
+        # Выбранный профиль по отпечатку шаблона: стили документа определяются шаблоном
+        self._selection_cache: Dict[str, str] = {}
+        self._warned_no_match = False
+
+        self._load_profile(default_file, DEFAULT_JOURNAL)
+        if os.path.isdir(directory):
+            for file_name in sorted(os.listdir(directory)):
+                if file_name.endswith('.json'):
+                    self._load_profile(os.path.join(directory, file_name), os.path.splitext(file_name)[0])
+
+    def _load_profile(self, path: str, default_name: str):
+        """Загрузка и компиляция одного профиля; ошибочный файл пропускается"""
+        try:
+            data = read_criteria_file(path)
+            compiled = compile_criteria_data(data)
+        except (OSError, ValueError, KeyError, CriteriaFileError) as e:
+            print(f"Ошибка загрузки профиля журнала {path}: {e}")
+            return
+
+        journal = data.get('journal', {})
+        match = journal.get('match', {})
+        name = journal.get('name', default_name)
+        if name in self.profiles:
+            print(f"Профиль журнала '{name}' из {path} уже загружен, файл пропущен")
+            return
+
+        plan = RulePlan(compiled['criteria'], compiled['document_requirements'], 0,
+                        compiled['fingerprint'], name)
+        profile = JournalProfile(name, journal.get('title', name), plan,
+                                 match.get('template_fingerprints', ()), match.get('style_names', ()))
+        self.profiles[name] = profile
+        for fingerprint in profile.template_fingerprints:
+            self._by_template.setdefault(fingerprint, name)
+
+    def names(self) -> List[str]:
+        """Имена всех профилей"""
+        return list(self.profiles.keys())
+
+    def get_plan(self, name: str) -> RulePlan:
+        """План проверки профиля по имени"""
+        profile = self.profiles.get(name)
+        if profile is None:
+            raise ValueError(f"Неизвестный профиль журнала: {name} (доступны: {', '.join(self.profiles)})")
+        return profile.plan
+
+    def can_auto_select(self) -> bool:
+        """Есть ли профили с признаками для автовыбора"""
+        return any(profile.template_fingerprints or profile.style_names for profile in self.profiles.values())
+
+    def select(self, document_info: Dict) -> str:
+        """Выбор профиля по документу: точное совпадение шаблона, затем наибольшее
+        число совпавших имен стилей; без совпадений - профиль по умолчанию"""
+        if not self._warned_no_match and not self.can_auto_select():
+            self._warned_no_match = True
+            print(f"Ни у одного профиля журнала нет признаков автовыбора (раздел \"match\"): "
+                  f"'{AUTO_JOURNAL}' выбирает профиль '{DEFAULT_JOURNAL}'")
+        fingerprint = document_info.get('template_fingerprint')
+        if fingerprint in self._by_template:
+            return self._by_template[fingerprint]
+        if fingerprint is not None and fingerprint in self._selection_cache:
+            return self._selection_cache[fingerprint]
+
+        style_names = set(document_info.get('styles_info') or ())
+        selected, best_score = DEFAULT_JOURNAL, 0
+        for profile in self.profiles.values():
+            score = len(profile.style_names & style_names)
+            if score > best_score:
+                selected, best_score = profile.name, score
+
+        if fingerprint is not None:
+            self._selection_cache[fingerprint] = selected
+        return selected
+
+
+_registry: Optional[JournalRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_journal_registry() -> JournalRegistry:
+    """Общий реестр профилей процесса; создается при первом обращении"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = JournalRegistry()
+    return _registry
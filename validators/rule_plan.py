@@ -0,0 +1,288 @@
+"""
+План проверки: критерии, скомпилированные в объекты-проверяльщики для каждого класса
+"""
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from config.criteria import FormattingCriteria
+from validators.errors import UNKNOWN_ALIGNMENT, ErrorCode, ValidationError
+
+def _to_alignment(value):
+    """Приведение выравнивания к enum WD_ALIGN_PARAGRAPH"""
+    if isinstance(value, int):
+        try:
+            return WD_ALIGN_PARAGRAPH(value)
+        except ValueError:
+            return None
+    return value
+
+
+# Результат отдельной проверки: (код ошибки, параметры) или None
+CheckResult = Optional[Tuple[ErrorCode, Tuple]]
+
+
+class FormattingChecker:
+    """Проверка форматирования абзацев одного класса с заранее вычисленными ожиданиями"""
+
+    # Свойства абзаца, от которых зависит результат проверки
+    SIGNATURE_KEYS = ('font_name', 'font_size', 'alignment', 'is_bold', 'is_italic', 'first_line_indent')
+    MEMO_LIMIT = 4096
+
+    def __init__(self, criteria: Dict):
+        self.checks: List[Tuple[str, Callable[[Dict], CheckResult]]] = []
+        # Результаты по сигнатуре форматирования; живут столько же, сколько план
+        self._memo: Dict[Tuple, Tuple[Tuple[ErrorCode, Tuple], ...]] = {}
+
+        expected_font = criteria.get('font_name')
+        if expected_font:
+            self.expected_font = expected_font
+            self.checks.append(('font_name', self._check_font))
+
+        expected_size = criteria.get('font_size')
+        if expected_size:
+            self.expected_size = expected_size
+            self.checks.append(('font_size', self._check_size))
+
+        expected_alignment = _to_alignment(criteria.get('alignment'))
+        if expected_alignment is not None:
+            self.expected_alignment = int(expected_alignment)
+            self.checks.append(('alignment', self._check_alignment))
+
+        expected_bold = criteria.get('bold')
+        if expected_bold is not None:
+            self.expected_bold = expected_bold
+            self.bold_error = (ErrorCode.BOLD_REQUIRED if expected_bold else ErrorCode.BOLD_FORBIDDEN, ())
+            self.checks.append(('bold', self._check_bold))
+
+        expected_italic = criteria.get('italic')
+        if expected_italic is not None:
+            self.expected_italic = expected_italic
+            self.italic_error = (ErrorCode.ITALIC_REQUIRED if expected_italic else ErrorCode.ITALIC_FORBIDDEN, ())
+            self.checks.append(('italic', self._check_italic))
+
+        expected_indent = criteria.get('paragraph_indent')
+        if expected_indent:
+            self.expected_indent_cm = expected_indent.cm
+            self.checks.append(('paragraph_indent', self._check_indent))
+
+    def check(self, para_info: Dict, index: Optional[int] = None) -> List[ValidationError]:
+        """Все ошибки форматирования абзаца"""
+        errors = []
+        for _, check in self.checks:
+            error = check(para_info)
+            if error is not None:
+                errors.append(ValidationError(error[0], index, error[1]))
+        return errors
+
+    def check_memoized(self, para_info: Dict, index: Optional[int] = None) -> Tuple[List[ValidationError], bool]:
+        """Ошибки форматирования с повторным использованием результата для той же сигнатуры.
+
+        Возвращает (ошибки, найден ли результат в памяти).
+        """
+        signature = tuple(para_info.get(key) for key in self.SIGNATURE_KEYS)
+        found = self._memo.get(signature)
+        hit = found is not None
+        if not hit:
+            found = tuple(error for error in (check(para_info) for _, check in self.checks) if error is not None)
+            if len(self._memo) >= self.MEMO_LIMIT:
+                self._memo.clear()
+            self._memo[signature] = found
+        return [ValidationError(code, index, params) for code, params in found], hit
+
+    def __getstate__(self):
+        # Накопленные результаты в рабочий процесс не передаем
+        state = self.__dict__.copy()
+        state['_memo'] = {}
+        return state
+
+    def _check_font(self, para_info: Dict) -> CheckResult:
+        actual_font = para_info.get('font_name')
+        if actual_font != self.expected_font:
+            return ErrorCode.FONT_NAME, (actual_font, self.expected_font)
+        return None
+
+    def _check_size(self, para_info: Dict) -> CheckResult:
+        actual_size = para_info.get('font_size')
+        if actual_size and abs(actual_size - self.expected_size) > 0.2:
+            return ErrorCode.FONT_SIZE, (actual_size, self.expected_size)
+        return None
+
+    def _check_alignment(self, para_info: Dict) -> CheckResult:
+        actual_alignment = _to_alignment(para_info.get('alignment'))
+        if actual_alignment is not None and actual_alignment != self.expected_alignment:
+            actual = int(actual_alignment) if isinstance(actual_alignment, int) else UNKNOWN_ALIGNMENT
+            return ErrorCode.ALIGNMENT, (actual, self.expected_alignment)
+        return None
+
+    def _check_bold(self, para_info: Dict) -> CheckResult:
+        if para_info.get('is_bold') != self.expected_bold:
+            return self.bold_error
+        return None
+
+    def _check_italic(self, para_info: Dict) -> CheckResult:
+        if para_info.get('is_italic') != self.expected_italic:
+            return self.italic_error
+        return None
+
+    def _check_indent(self, para_info: Dict) -> CheckResult:
+        actual_indent = para_info.get('first_line_indent')
+        if actual_indent is not None and abs(actual_indent - self.expected_indent_cm) > 0.1:
+            return ErrorCode.PARAGRAPH_INDENT, (actual_indent, self.expected_indent_cm)
+        return None
+
+
+class ContentChecker:
+    """Проверка содержания абзацев одного класса"""
+
+    def __init__(self, criteria: Dict):
+        self.rules: List[Tuple[str, Callable[[str], bool]]] = list(criteria.get('content_rules', []))
+
+    def check(self, text: str, index: Optional[int] = None) -> List[ValidationError]:
+        """Нарушенные правила содержания"""
+        errors = []
+        for rule_name, rule_func in self.rules:
+            try:
+                if not rule_func(text):
+                    errors.append(ValidationError(ErrorCode.CONTENT_RULE, index, (rule_name,)))
+            except Exception as e:
+                errors.append(ValidationError(ErrorCode.CONTENT_RULE_FAILED, index, (rule_name, str(e))))
+        return errors
+
+
+class DocumentChecker:
+    """Проверка общих свойств документа"""
+
+    # (ключ поля в требованиях, свойство документа, код ошибки); допуск 0.2 см
+    MARGIN_CHECKS = (
+        ('top', 'top_margin', ErrorCode.MARGIN_TOP),
+        ('bottom', 'bottom_margin', ErrorCode.MARGIN_BOTTOM),
+        ('left', 'left_margin', ErrorCode.MARGIN_LEFT),
+        ('right', 'right_margin', ErrorCode.MARGIN_RIGHT),
+    )
+
+    # Пары русских и английских элементов статьи для перекрестной проверки
+    COUNTERPART_CLASSES = (
+        ('заголовок', 'заголовок_английский'),
+        ('автор', 'автор_английский'),
+        ('аннотация', 'аннотация_английская'),
+        ('ключевые_слова', 'ключевые_слова_английские'),
+    )
+    KEYWORD_CLASSES = ('ключевые_слова', 'ключевые_слова_английские')
+
+    def __init__(self, requirements: Dict):
+        margins = requirements['margins']
+        self.margins = [(prop, margins[key].cm, code) for key, prop, code in self.MARGIN_CHECKS]
+        self.min_pages = requirements['min_pages']
+        self.font_name = requirements.get('font_name')
+
+    def check(self, document_info: Dict) -> List[ValidationError]:
+        """Ошибки полей и объема документа"""
+        errors = []
+        doc_props = document_info.get('document_properties', {})
+
+        for prop, expected_cm, code in self.margins:
+            actual = doc_props.get(prop)
+            if actual and abs(actual - expected_cm) > 0.2:
+                errors.append(ValidationError(code, None, (actual, expected_cm)))
+
+        page_count = document_info.get('page_count', 0)
+        if page_count < self.min_pages:
+            errors.append(ValidationError(ErrorCode.PAGE_COUNT, None, (page_count, self.min_pages)))
+
+        return errors
+
+    def cross_check(self, classified: List[Tuple[str, str]], part_paragraphs: List[Dict] = ()) -> List[ValidationError]:
+        """Перекрестные проверки документа в целом
+
+        Args:
+            classified: Пары (класс, текст) абзацев основного текста
+            part_paragraphs: Абзацы таблиц, колонтитулов и сносок
+        """
+        errors = []
+        if self.font_name:
+            for para in part_paragraphs:
+                font_name = para.get('font_name')
+                if font_name and font_name != self.font_name:
+                    errors.append(ValidationError(ErrorCode.PART_FONT_NAME, None,
+                                                  (para.get('part'), para.get('index', 0) + 1,
+                                                   font_name, self.font_name)))
+
+        found = {class_name for class_name, _ in classified}
+        for russian, english in self.COUNTERPART_CLASSES:
+            if russian in found and english not in found:
+                errors.append(ValidationError(ErrorCode.MISSING_COUNTERPART, None, (russian, english)))
+            elif english in found and russian not in found:
+                errors.append(ValidationError(ErrorCode.MISSING_COUNTERPART, None, (english, russian)))
+
+        ru_count, en_count = (sum(self._count_keywords(text) for class_name, text in classified
+                                  if class_name == keyword_class)
+                              for keyword_class in self.KEYWORD_CLASSES)
+        if ru_count and en_count and ru_count != en_count:
+            errors.append(ValidationError(ErrorCode.KEYWORD_COUNT_MISMATCH, None, (ru_count, en_count)))
+
+        return errors
+
+    @staticmethod
+    def _count_keywords(text: str) -> int:
+        """Число ключевых слов в абзаце "Ключевые слова: a, b, c" """
+        _, _, keywords = text.rpartition(':')
+        return len([word for word in re.split(r'[,;]', keywords) if word.strip()])
+
+
+class RulePlan:
+    """Скомпилированные критерии: проверяльщики по классам и для документа.
+
+    План не содержит lambda и размеров docx, поэтому передается в рабочие
+    процессы через pickle и используется там без повторной компиляции.
+    """
+
+    def __init__(self, criteria: Dict, document_requirements: Dict, version: int, fingerprint: str = None,
+                 name: str = None):
+        self.version = version
+        self.fingerprint = fingerprint
+        # Имя профиля журнала; None - текущие критерии FormattingCriteria
+        self.name = name
+        self.formatting = {name: FormattingChecker(class_criteria)
+                           for name, class_criteria in criteria.items() if class_criteria}
+        self.content = {name: ContentChecker(class_criteria)
+                        for name, class_criteria in criteria.items() if class_criteria}
+        self.document = DocumentChecker(document_requirements)
+
+
+_plan_lock = threading.Lock()
+# Пара (ключ версии критериев, план) - читается и заменяется целиком
+_cached_plan: Tuple = (None, None)
+# План, переданный из родительского процесса; имеет приоритет над локальными критериями
+_installed_plan: Optional[RulePlan] = None
+
+
+def install_rule_plan(plan: Optional[RulePlan]):
+    """Установка готового плана в рабочем процессе (None - вернуться к локальным критериям)"""
+    global _installed_plan
+    _installed_plan = plan
+
+
+def get_rule_plan() -> RulePlan:
+    """План проверки для текущих критериев; компилируется один раз на версию критериев.
+
+    Перед выдачей плана проверяется изменение файла критериев; новый план
+    строится под блокировкой и заменяет старый одним присваиванием.
+    """
+    global _cached_plan
+    if _installed_plan is not None:
+        return _installed_plan
+
+    FormattingCriteria.reload_if_changed()
+    criteria, document_requirements, version, fingerprint = FormattingCriteria.get_state()
+    key = (version, id(criteria), id(document_requirements))
+    cached_key, plan = _cached_plan
+    if cached_key == key:
+        return plan
+
+    with _plan_lock:
+        cached_key, plan = _cached_plan
+        if cached_key != key:
+            plan = RulePlan(criteria, document_requirements, version, fingerprint)
+            _cached_plan = (key, plan)
+        return plan
@@ -0,0 +1,210 @@
+"""
+Профилирование правил проверки: время и частота срабатывания каждого правила
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from utils.cache import DEFAULT_CACHE_DIR
+from validators.errors import ErrorCode, ValidationError
+
+# Файл накопленной статистики по умолчанию
+DEFAULT_PROFILE_FILE = os.path.join(DEFAULT_CACHE_DIR, 'rule_profile.json')
+
+
+class RuleStats:
+    """Накопленная статистика одного правила"""
+
+    __slots__ = ('calls', 'failures', 'errors', 'total_time')
+
+    def __init__(self, calls: int = 0, failures: int = 0, errors: int = 0, total_time: float = 0.0):
+        self.calls = calls
+        self.failures = failures
+        self.errors = errors
+        self.total_time = total_time
+
+    @property
+    def avg_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+    @property
+    def fail_rate(self) -> float:
+        return self.failures / self.calls if self.calls else 0.0
+
+    def cost_score(self) -> float:
+        """Ожидаемая стоимость нахождения нарушения: среднее время / доля нарушений"""
+        return self.avg_time / max(self.fail_rate, 0.01)
+
+
+class RuleProfiler:
+    """Сбор статистики по правилам форматирования и содержания.
+
+    Ключ статистики - (вид правила, класс абзаца, название правила), где вид
+    правила 'formatting' или 'content'. Статистику можно сохранять в файл и
+    накапливать между запусками.
+    """
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str, str], RuleStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, class_name: str, rule_name: str, elapsed: float,
+               failed: bool, error: bool = False):
+        """Учет одного выполнения правила"""
+        key = (kind, class_name, rule_name)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = RuleStats()
+            stats.calls += 1
+            stats.total_time += elapsed
+            if failed:
+                stats.failures += 1
+            if error:
+                stats.errors += 1
+
+    def check_formatting(self, class_name: str, checker, para_info: Dict,
+                         index: Optional[int] = None) -> List[ValidationError]:
+        """Проверка форматирования с замером времени каждой проверки"""
+        errors = []
+        for check_name, check in checker.checks:
+            start = time.perf_counter()
+            error = check(para_info)
+            self.record('formatting', class_name, check_name, time.perf_counter() - start, error is not None)
+            if error is not None:
+                errors.append(ValidationError(error[0], index, error[1]))
+        return errors
+
+    def check_content(self, class_name: str, checker, text: str, index: Optional[int] = None) -> List[ValidationError]:
+        """Проверка содержания с замером времени каждого правила"""
+        errors = []
+        for rule_name, rule_func in checker.rules:
+            start = time.perf_counter()
+            try:
+                failed = not rule_func(text)
+                error = ValidationError(ErrorCode.CONTENT_RULE, index, (rule_name,)) if failed else None
+            except Exception as e:
+                failed = True
+                error = ValidationError(ErrorCode.CONTENT_RULE_FAILED, index, (rule_name, str(e)))
+            self.record('content', class_name, rule_name, time.perf_counter() - start, failed,
+                        error is not None and error.code == ErrorCode.CONTENT_RULE_FAILED)
+            if error is not None:
+                errors.append(error)
+        return errors
+
+    def ordered_checks(self, class_name: str, formatting_checker=None, content_checker=None) -> List[Tuple]:
+        """Все проверки класса в порядке возрастания ожидаемой стоимости нахождения нарушения.
+
+        Элементы списка - (вид правила, название, функция). Правила без
+        статистики идут первыми, чтобы быстрее набрать по ним замеры.
+        """
+        checks = []
+        if formatting_checker is not None:
+            checks.extend(('formatting', name, check) for name, check in formatting_checker.checks)
+        if content_checker is not None:
+            checks.extend(('content', name, rule) for name, rule in content_checker.rules)
+
+        with self._lock:
+            scores = {(kind, name): self._stats[(kind, class_name, name)].cost_score()
+                      if (kind, class_name, name) in self._stats else 0.0
+                      for kind, name, _ in checks}
+        # sorted устойчива: при равной оценке сохраняется порядок объявления
+        return sorted(checks, key=lambda item: scores[(item[0], item[1])])
+
+    def first_violation(self, class_name: str, para_info: Dict, formatting_checker=None,
+                        content_checker=None, index: Optional[int] = None) -> Optional[ValidationError]:
+        """Первое найденное нарушение абзаца или None; проверки идут от дешевых к дорогим"""
+        text = para_info.get('text', '')
+        for kind, name, check in self.ordered_checks(class_name, formatting_checker, content_checker):
+            start = time.perf_counter()
+            error = None
+            raised = False
+            if kind == 'formatting':
+                found = check(para_info)
+                failed = found is not None
+                if failed:
+                    error = ValidationError(found[0], index, found[1])
+            else:
+                try:
+                    failed = not check(text)
+                    if failed:
+                        error = ValidationError(ErrorCode.CONTENT_RULE, index, (name,))
+                except Exception as e:
+                    failed = raised = True
+                    error = ValidationError(ErrorCode.CONTENT_RULE_FAILED, index, (name, str(e)))
+            self.record(kind, class_name, name, time.perf_counter() - start, failed, raised)
+            if failed:
+                return error
+        return None
+
+    def hottest(self, limit: int = 10) -> List[Dict]:
+        """Правила с наибольшим суммарным временем"""
+        with self._lock:
+            items = sorted(self._stats.items(), key=lambda item: item[1].total_time, reverse=True)[:limit]
+        return [
+            {
+                'kind': kind,
+                'class_name': class_name,
+                'rule': rule_name,
+                'calls': stats.calls,
+                'total_ms': stats.total_time * 1000,
+                'avg_us': stats.avg_time * 1_000_000,
+                'fail_rate': stats.fail_rate,
+                'errors': stats.errors
+            }
+            for (kind, class_name, rule_name), stats in items
+        ]
+
+    def reset(self):
+        """Сброс статистики"""
+        with self._lock:
+            self._stats.clear()
+
+    def save(self, path: str = DEFAULT_PROFILE_FILE):
+        """Сохранение статистики в JSON (атомарная замена файла)"""
+        with self._lock:
+            data = [[kind, class_name, rule_name, stats.calls, stats.failures, stats.errors, stats.total_time]
+                    for (kind, class_name, rule_name), stats in self._stats.items()]
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Не удалось сохранить статистику правил {path}: {e}")
+
+    def load(self, path: str = DEFAULT_PROFILE_FILE):
+        """Добавление статистики из файла к текущей"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Не удалось прочитать статистику правил {path}: {e}")
+            return
+
+        with self._lock:
+            for kind, class_name, rule_name, calls, failures, errors, total_time in data:
+                stats = self._stats.setdefault((kind, class_name, rule_name), RuleStats())
+                stats.calls += calls
+                stats.failures += failures
+                stats.errors += errors
+                stats.total_time += total_time
+
+
+_profiler: Optional[RuleProfiler] = None
+
+
+def get_profiler() -> Optional[RuleProfiler]:
+    """Включенный профилировщик правил или None"""
+    return _profiler
+
+
+def set_profiler(profiler: Optional[RuleProfiler]) -> Optional[RuleProfiler]:
+    """Включение профилирования (None - выключение); возвращает установленный профилировщик"""
+    global _profiler
+    _profiler = profiler
+    return profiler
@@ -0,0 +1,157 @@
+"""
+Пакетная проверка форматирования всех абзацев документа по столбцам свойств (NumPy)
+"""
+from typing import Dict, List, Optional, Sequence
+from validators.errors import ValidationError
+from validators.rule_plan import FormattingChecker, RulePlan, _to_alignment, get_rule_plan
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Коды выравнивания, не участвующие в сравнении
+_NO_ALIGNMENT = -1
+_UNKNOWN_ALIGNMENT = -2
+
+
+class FormattingColumns:
+    """Свойства форматирования абзацев, разложенные по массивам"""
+
+    def __init__(self, paragraphs_info: Sequence[Dict]):
+        self.font_name = np.array([p.get('font_name') for p in paragraphs_info], dtype=object)
+        self.font_size = self._floats([p.get('font_size') for p in paragraphs_info])
+        # Код выравнивания вычисляется один раз для каждого различного значения
+        codes = {}
+        alignment = []
+        for p in paragraphs_info:
+            value = p.get('alignment')
+            if value not in codes:
+                codes[value] = self._alignment_code(value)
+            alignment.append(codes[value])
+        self.alignment = np.array(alignment, dtype=np.int64)
+        self.is_bold = self._flags([p.get('is_bold') for p in paragraphs_info])
+        self.is_italic = self._flags([p.get('is_italic') for p in paragraphs_info])
+        self.first_line_indent = self._floats([p.get('first_line_indent') for p in paragraphs_info])
+
+    @staticmethod
+    def _floats(values: List) -> 'np.ndarray':
+        return np.array([np.nan if value is None else float(value) for value in values], dtype=np.float64)
+
+    @staticmethod
+    def _flags(values: List) -> 'np.ndarray':
+        # 1 - True, 0 - False, -1 - не задано или другое значение (NaN и т.п.): как и в
+        # поабзацной проверке, такое значение не равно ни одному из ожидаемых
+        return np.array([1 if value is True or value == 1 else 0 if value is False or value == 0 else -1
+                         for value in values], dtype=np.int8)
+
+    @staticmethod
+    def _alignment_code(value) -> int:
+        alignment = _to_alignment(value)
+        if alignment is None:
+            return _NO_ALIGNMENT
+        if isinstance(alignment, int):
+            return int(alignment)
+        return _UNKNOWN_ALIGNMENT
+
+
+def validate_formatting_bulk(paragraphs_info: Sequence[Dict], classes: Sequence[str],
+                             indices: Optional[Sequence[int]] = None,
+                             plan: Optional[RulePlan] = None) -> List[List[ValidationError]]:
+    """Ошибки форматирования для всех абзацев сразу.
+
+    Для каждого класса маски нарушений вычисляются сравнением столбцов,
+    записи ошибок создаются только для нарушивших абзацев. Результат совпадает
+    с поабзацной проверкой FormattingValidator.validate_formatting.
+    indices - номера абзацев для записей ошибок (по умолчанию не заполняются),
+    plan - снимок критериев анализа документа (по умолчанию текущие критерии).
+    """
+    if len(paragraphs_info) != len(classes):
+        raise ValueError("Число абзацев и число классов не совпадают")
+    if indices is None:
+        indices = [None] * len(paragraphs_info)
+
+    plan = plan or get_rule_plan()
+    if np is None:
+        return [_check_one(plan.formatting.get(cls), para_info, index)
+                for para_info, cls, index in zip(paragraphs_info, classes, indices)]
+
+    errors: List[List[ValidationError]] = [[] for _ in paragraphs_info]
+    if not errors:
+        return errors
+
+    columns = FormattingColumns(paragraphs_info)
+    labels = np.array(classes, dtype=object)
+
+    for class_name, checker in plan.formatting.items():
+        rows = np.flatnonzero(labels == class_name)
+        if rows.size == 0:
+            continue
+        for check_name, check in checker.checks:
+            violating = rows[_VIOLATIONS[check_name](checker, columns, rows)]
+            field = _FIELDS[check_name]
+            # Код и параметры ошибки зависят только от фактического значения свойства
+            found = {}
+            for row in violating.tolist():
+                para_info = paragraphs_info[row]
+                value = para_info.get(field)
+                error = found.get(value)
+                if error is None:
+                    error = found[value] = check(para_info)
+                errors[row].append(ValidationError(error[0], indices[row], error[1]))
+
+    return errors
+
+
+def _check_one(checker: FormattingChecker, para_info: Dict, index: Optional[int]) -> List[ValidationError]:
+    return checker.check(para_info, index) if checker is not None else []
+
+
+def _font_violations(checker, columns, rows):
+    return columns.font_name[rows] != checker.expected_font
+
+
+def _size_violations(checker, columns, rows):
+    size = columns.font_size[rows]
+    # Пустой и нулевой размер не проверяются, как и в поабзацной проверке
+    with np.errstate(invalid='ignore'):
+        return ~np.isnan(size) & (size != 0) & (np.abs(size - checker.expected_size) > 0.2)
+
+
+def _alignment_violations(checker, columns, rows):
+    alignment = columns.alignment[rows]
+    return (alignment != _NO_ALIGNMENT) & (alignment != checker.expected_alignment)
+
+
+def _bold_violations(checker, columns, rows):
+    return columns.is_bold[rows] != int(checker.expected_bold)
+
+
+def _italic_violations(checker, columns, rows):
+    return columns.is_italic[rows] != int(checker.expected_italic)
+
+
+def _indent_violations(checker, columns, rows):
+    indent = columns.first_line_indent[rows]
+    with np.errstate(invalid='ignore'):
+        return ~np.isnan(indent) & (np.abs(indent - checker.expected_indent_cm) > 0.1)
+
+
+_VIOLATIONS = {
+    'font_name': _font_violations,
+    'font_size': _size_violations,
+    'alignment': _alignment_violations,
+    'bold': _bold_violations,
+    'italic': _italic_violations,
+    'paragraph_indent': _indent_violations
+}
+
+# Свойство абзаца, проверяемое каждой проверкой
+_FIELDS = {
+    'font_name': 'font_name',
+    'font_size': 'font_size',
+    'alignment': 'alignment',
+    'bold': 'is_bold',
+    'italic': 'is_italic',
+    'paragraph_indent': 'first_line_indent'
+}